@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+生成物品图标雪碧图（在 download_images.py 之后运行）
+
+功能：
+- 把 web/public/images/items/ 中的图标按固定格子尺寸打包为若干张图集（1x: 96px，2x: 192px）
+- 写入 web/public/data/icon_atlas.json：itemId -> 图集序号/x/y/w/h（1x 坐标，2x 图集坐标乘以2）
+- 每个图标的格子位置固定不变；只重新生成包含新增/变化/删除图标的图集，其余图集文件不动
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    print("错误: 需要安装 Pillow 库")
+    print("运行: pip install Pillow")
+    sys.exit(1)
+
+
+SOURCE_DIR = Path('web/public/images/items')
+ATLAS_DIR = Path('web/public/images/atlas')
+INDEX_PATH = Path('web/public/data/icon_atlas.json')
+PUBLIC_ROOT = Path('web/public')
+
+# ItemCard: w-24 h-24 (96px)
+CELL_SIZE = 96
+SCALES = {'1x': 1, '2x': 2}
+COLUMNS = 16
+ROWS = 8
+SLOTS_PER_ATLAS = COLUMNS * ROWS
+WEBP_QUALITY = 85
+
+
+def file_hash(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def atlas_path(scale: str, atlas_idx: int) -> Path:
+    return ATLAS_DIR / f'items@{scale}-{atlas_idx}.webp'
+
+
+def load_index() -> dict:
+    if not INDEX_PATH.exists():
+        return {}
+    with open(INDEX_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def assign_slots(icons: dict, sources: dict) -> dict:
+    """保留已有图标的格子，删除已不存在的图标，新图标填入最小的空闲格子。返回 itemId -> slot"""
+    slots = {item_id: icon['slot'] for item_id, icon in icons.items() if item_id in sources}
+    used = set(slots.values())
+
+    next_free = 0
+    for item_id in sorted(sources, key=lambda i: (len(i), i)):
+        if item_id in slots:
+            continue
+        while next_free in used:
+            next_free += 1
+        slots[item_id] = next_free
+        used.add(next_free)
+
+    return slots
+
+
+def render_atlas(atlas_idx: int, members: dict, sources: dict) -> dict:
+    """重新生成一张图集的所有缩放版本。members: itemId -> slot。返回 itemId -> (w, h)"""
+    sizes = {}
+    canvases = {
+        scale: Image.new('RGBA', (COLUMNS * CELL_SIZE * factor, ROWS * CELL_SIZE * factor), (0, 0, 0, 0))
+        for scale, factor in SCALES.items()
+    }
+
+    for item_id, slot in members.items():
+        local = slot % SLOTS_PER_ATLAS
+        col, row = local % COLUMNS, local // COLUMNS
+
+        with Image.open(sources[item_id]) as img:
+            icon = img.convert('RGBA')
+
+        for scale, factor in SCALES.items():
+            edge = CELL_SIZE * factor
+            scaled = icon.copy()
+            scaled.thumbnail((edge, edge), Image.LANCZOS)
+            canvases[scale].paste(scaled, (col * edge, row * edge))
+            if scale == '1x':
+                sizes[item_id] = scaled.size
+
+    for scale, canvas in canvases.items():
+        canvas.save(atlas_path(scale, atlas_idx), 'WEBP', quality=WEBP_QUALITY, method=4)
+
+    return sizes
+
+
+def main():
+    print("=== 生成物品图标雪碧图 ===\n")
+
+    if not SOURCE_DIR.exists():
+        print(f"错误: 未找到 {SOURCE_DIR}")
+        print("请先运行: python3 data/download_images.py")
+        sys.exit(1)
+
+    ATLAS_DIR.mkdir(parents=True, exist_ok=True)
+
+    sources = {
+        p.stem: p for p in SOURCE_DIR.iterdir()
+        if p.is_file() and p.suffix.lower() in ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+    }
+    hashes = {item_id: file_hash(path) for item_id, path in sources.items()}
+
+    index = load_index()
+    layout_changed = (index.get('cellSize') != CELL_SIZE or index.get('columns') != COLUMNS
+                      or index.get('rows') != ROWS)
+    old_icons = {} if layout_changed else index.get('icons', {})
+
+    slots = assign_slots(old_icons, sources)
+    atlas_count = max(slots.values()) // SLOTS_PER_ATLAS + 1 if slots else 0
+
+    # 需要重新生成的图集：包含新增、内容变化或被删除图标的图集，以及缺少文件的图集
+    dirty = set()
+    for item_id, slot in slots.items():
+        old = old_icons.get(item_id)
+        if not old or old.get('hash') != hashes[item_id]:
+            dirty.add(slot // SLOTS_PER_ATLAS)
+    for item_id, icon in old_icons.items():
+        if item_id not in slots:
+            dirty.add(icon['slot'] // SLOTS_PER_ATLAS)
+    for atlas_idx in range(atlas_count):
+        if any(not atlas_path(scale, atlas_idx).exists() for scale in SCALES):
+            dirty.add(atlas_idx)
+    dirty = {a for a in dirty if a < atlas_count}
+
+    print(f"图标: {len(sources)} 个，图集: {atlas_count} 张 ({COLUMNS}x{ROWS} 格)")
+    print(f"需要重新生成的图集: {sorted(dirty) if dirty else '无'}\n")
+
+    icons = {}
+    for atlas_idx in range(atlas_count):
+        members = {i: s for i, s in slots.items() if s // SLOTS_PER_ATLAS == atlas_idx}
+        if atlas_idx in dirty:
+            sizes = render_atlas(atlas_idx, members, sources)
+            print(f"✓ 图集 {atlas_idx}: {len(members)} 个图标")
+        else:
+            sizes = {i: (old_icons[i]['w'], old_icons[i]['h']) for i in members}
+
+        for item_id, slot in members.items():
+            local = slot % SLOTS_PER_ATLAS
+            icons[item_id] = {
+                'atlas': atlas_idx,
+                'x': (local % COLUMNS) * CELL_SIZE,
+                'y': (local // COLUMNS) * CELL_SIZE,
+                'w': sizes[item_id][0],
+                'h': sizes[item_id][1],
+                'slot': slot,
+                'hash': hashes[item_id]
+            }
+
+    # 删除多余的旧图集文件
+    for scale in SCALES:
+        for stale in ATLAS_DIR.glob(f'items@{scale}-*.webp'):
+            idx = stale.stem.rsplit('-', 1)[-1]
+            if idx.isdigit() and int(idx) >= atlas_count:
+                stale.unlink()
+
+    atlases = {
+        scale: [
+            {
+                'path': '/' + atlas_path(scale, a).relative_to(PUBLIC_ROOT).as_posix(),
+                'hash': file_hash(atlas_path(scale, a))[:12]
+            }
+            for a in range(atlas_count)
+        ]
+        for scale in SCALES
+    }
+
+    INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(INDEX_PATH, 'w', encoding='utf-8') as f:
+        json.dump({
+            'cellSize': CELL_SIZE,
+            'columns': COLUMNS,
+            'rows': ROWS,
+            'scales': SCALES,
+            'atlases': atlases,
+            'icons': dict(sorted(icons.items(), key=lambda x: (len(x[0]), x[0])))
+        }, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "="*50)
+    print("完成:")
+    print(f"  重新生成图集: {len(dirty)} / {atlas_count}")
+    print(f"  索引: {INDEX_PATH}")
+    print("="*50)
+
+
+if __name__ == '__main__':
+    main()
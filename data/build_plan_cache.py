@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+预先计算所有可生产物品的生产方案（在 data/ 目录运行）
+
+功能：
+- 对 recipe_database.json 中 asProducts 的每个可生产物品计算最高效率方案和最小规模方案
+  （planner 包，与网页端 efficiencyCalculator.ts 结果一致），使用网页端默认的忽略设备
+- 写入 web/public/data/plan_cache.json，模拟器打开时直接显示，只有用户修改基础原料或忽略设备时才在浏览器中计算
+- 缓存以数据库内容哈希为键：databaseHash 与 extract_recipe_database.py 写入 recipe_database.json 的 databaseHash
+  相同（planner.graph.database_hash），前端与加载的配方库比较，判断缓存是否对应当前数据库；
+  数据库、忽略设备和 planner 中影响方案的模块（PLAN_MODULES）都没有变化时不重新计算
+
+缓存格式（紧凑数组，数值为 JSON 数字）：
+    {
+      "version": 1,
+      "databaseHash": "...", "ignoredDevices": [...], "plannerHash": "...",
+      "plans": {
+        "<itemId>": {
+          "efficiency": {"rate": 产出个/秒, "devices": [[物品ID, 配方ID, 数量, 产出个/秒], ...],
+                         "base": [[物品ID, 名称, 个/秒], ...]},
+          "minimum": {... devices 的每项可以有第 5 个元素：溢出倍数}
+        }
+      }
+    }
+
+用法：
+    python3 build_plan_cache.py           # 数据库未变化时跳过
+    python3 build_plan_cache.py --force   # 强制重新计算
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+
+from planner import Plan, RecipeGraph, plan_all
+from planner.constants import DATABASE_PATH, ROOT_DIR
+from planner.graph import database_hash, load_json, load_ignored_devices, load_item_names
+from publish import minify
+
+CACHE_PATH = ROOT_DIR / 'web/public/data/plan_cache.json'
+CACHE_VERSION = 1
+PLANNER_DIR = Path(__file__).resolve().parent / 'planner'
+# 影响方案结果的 planner 模块；其余模块（simulate、whatif 等）改动时缓存不必重新生成
+PLAN_MODULES = ('constants.py', 'graph.py', 'plan.py')
+
+
+def number(value):
+    return int(value) if value.denominator == 1 else float(value)
+
+
+def encode_plan(plan: Plan) -> Dict[str, Any]:
+    devices = []
+    for device in plan.devices:
+        entry = [device.item_id, device.recipe.recipe_id, number(device.count), number(device.production_rate)]
+        if device.has_overflow:
+            entry.append(number(device.overflow_rate))
+        devices.append(entry)
+    return {
+        'rate': number(plan.output_rate),
+        'devices': devices,
+        'base': [[m.item_id, m.name, number(m.rate)] for m in plan.base_materials],
+    }
+
+
+def planner_hash(modules: Iterable[str] = PLAN_MODULES) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(modules):
+        digest.update(name.encode('utf-8'))
+        digest.update((PLANNER_DIR / name).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def load_existing() -> Optional[Dict[str, Any]]:
+    if not CACHE_PATH.exists():
+        return None
+    try:
+        return load_json(CACHE_PATH)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预先计算所有可生产物品的生产方案')
+    parser.add_argument('--force', action='store_true', help='忽略已有缓存，重新计算')
+    args = parser.parse_args()
+
+    database = load_json(DATABASE_PATH)
+    key = {
+        'version': CACHE_VERSION,
+        'databaseHash': database_hash(database),
+        'ignoredDevices': sorted(load_ignored_devices()),
+        'plannerHash': planner_hash(),
+    }
+
+    existing = load_existing()
+    if not args.force and existing and all(existing.get(k) == v for k, v in key.items()):
+        print(f"✓ 方案缓存已是最新（数据库 {key['databaseHash']}）: {CACHE_PATH.relative_to(ROOT_DIR)}")
+        return
+
+    start = time.perf_counter()
+    graph = RecipeGraph(database, key['ignoredDevices'], load_item_names())
+    plans = plan_all(graph)
+    elapsed = time.perf_counter() - start
+
+    bundle = dict(key)
+    bundle['plans'] = {item_id: {kind: encode_plan(plan) for kind, plan in item_plans.items()}
+                       for item_id, item_plans in plans.items()}
+    content = minify(bundle)
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    CACHE_PATH.write_bytes(content)
+
+    print("=" * 60)
+    print("方案缓存")
+    print("=" * 60)
+    print(f"数据库哈希: {key['databaseHash']}（忽略设备 {len(key['ignoredDevices'])} 个）")
+    print(f"物品: {len(plans)} 个，计算耗时 {elapsed * 1000:.1f} ms")
+    print(f"✓ 已写入 {CACHE_PATH.relative_to(ROOT_DIR)}（{len(content) / 1024:.1f} KB）")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
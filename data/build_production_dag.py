@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+生成去重的生产依赖图（在 data/ 目录运行）
+
+功能：
+- 用 planner.dag.ProductionDag 为配方库中的所有物品各建一个共享节点（使用网页端默认的忽略设备），
+  每个节点带可用配方、原料（子节点）、可达的基础原料、到基础原料的最长链长度和所在循环
+- 写入 web/public/data/production_dag.json；客户端按物品 ID 引用共享节点，不必为每个目标重新展开依赖树
+- 附带位集传递闭包（planner.closure.ClosureIndex）：每个物品依赖的所有物品、用到它的所有物品，
+  客户端回答“哪些最终产品用到清水”时只需按位查询，不必反复遍历 asMaterials
+- 与 plan_cache.json 相同，以数据库内容哈希、忽略设备和 planner 中相关模块（DAG_MODULES）的哈希为键，都没有变化时不重新生成
+
+格式：
+    {
+      "version": 2,
+      "databaseHash": "...", "ignoredDevices": [...], "plannerHash": "...",
+      "baseItems": [],
+      "order": [物品ID, ...],            # 拓扑顺序，原料在前
+      "nodes": {
+        "<itemId>": {"name": 名称, "recipes": [配方ID, ...], "children": [物品ID, ...],
+                     "base": [物品ID, ...], "depth": 层数, "cycle": [物品ID, ...]（仅循环中的物品）}
+      },
+      "closure": {                       # 与 order 对齐，位集为十六进制字符串，第 i 位对应 order[i]
+        "upstream": [...], "downstream": [...], "height": [到最终产品的最长链长度, ...]
+      }
+    }
+
+用法：
+    python3 build_production_dag.py           # 数据库未变化时跳过
+    python3 build_production_dag.py --force   # 强制重新生成
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, Any, Optional
+
+from build_plan_cache import planner_hash
+from planner import ClosureIndex, ProductionDag, RecipeGraph
+from planner.constants import DATABASE_PATH, ROOT_DIR
+from planner.graph import database_hash, load_json, load_ignored_devices, load_item_names
+from publish import minify
+
+DAG_PATH = ROOT_DIR / 'web/public/data/production_dag.json'
+DAG_VERSION = 2
+DAG_MODULES = ('constants.py', 'graph.py', 'dag.py', 'closure.py')
+
+
+def load_existing() -> Optional[Dict[str, Any]]:
+    if not DAG_PATH.exists():
+        return None
+    try:
+        return load_json(DAG_PATH)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成去重的生产依赖图')
+    parser.add_argument('--force', action='store_true', help='忽略已有文件，重新生成')
+    args = parser.parse_args()
+
+    database = load_json(DATABASE_PATH)
+    key = {
+        'version': DAG_VERSION,
+        'databaseHash': database_hash(database),
+        'ignoredDevices': sorted(load_ignored_devices()),
+        'plannerHash': planner_hash(DAG_MODULES),
+    }
+
+    existing = load_existing()
+    if not args.force and existing and all(existing.get(k) == v for k, v in key.items()):
+        print(f"✓ 生产依赖图已是最新（数据库 {key['databaseHash']}）: {DAG_PATH.relative_to(ROOT_DIR)}")
+        return
+
+    start = time.perf_counter()
+    graph = RecipeGraph(database, key['ignoredDevices'], load_item_names())
+    dag = ProductionDag(graph)
+    closure = ClosureIndex(dag)
+    elapsed = time.perf_counter() - start
+
+    bundle = {**key, **dag.to_dict(), 'closure': closure.to_dict()}
+    content = minify(bundle)
+    DAG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    DAG_PATH.write_bytes(content)
+
+    targets = graph.producible_items()
+    tree_nodes = sum(dag.tree_size(item_id) for item_id in targets)
+    dag_nodes = sum(len(dag.subgraph(item_id)) for item_id in targets)
+
+    print("=" * 60)
+    print("生产依赖图")
+    print("=" * 60)
+    print(f"数据库哈希: {key['databaseHash']}（忽略设备 {len(key['ignoredDevices'])} 个）")
+    print(f"节点: {len(dag.nodes)} 个，最大深度 {max(n.depth for n in dag.nodes.values())}，"
+          f"构建耗时 {elapsed * 1000:.1f} ms")
+    print(f"{len(targets)} 个可生产物品: 依赖树共 {tree_nodes} 个节点，去重后 {dag_nodes} 个")
+    print(f"传递闭包: 依赖关系 {sum(bin(m).count('1') for m in closure.upstream_masks)} 对，"
+          f"最终产品 {len(closure.final_products())} 个")
+    print(f"✓ 已写入 {DAG_PATH.relative_to(ROOT_DIR)}（{len(content) / 1024:.1f} KB）")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
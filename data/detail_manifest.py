@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Manifest of fetched item_details files, used for incremental refresh.
+
+item_details_manifest.json maps itemId -> {
+    'hash':        sha256 of the response with the volatile top-level 'timestamp' removed,
+    'fetchedAt':   unix time the file was written,
+    'timestamp':   server 'timestamp' field of the response,
+    'catalogHash': sha256 of the catalog entry (name + image) at fetch time
+}
+
+item_details_changed.json lists the items whose content hash changed on the
+last refresh, so downstream extraction can process only that set.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Any, Optional
+
+
+MANIFEST_FILE = 'item_details_manifest.json'
+CHANGED_FILE = 'item_details_changed.json'
+
+
+def content_hash(data: Dict[str, Any]) -> str:
+    stable = {k: v for k, v in data.items() if k != 'timestamp'}
+    payload = json.dumps(stable, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def catalog_hash(entry: Optional[Dict[str, Any]]) -> str:
+    if not entry:
+        return ''
+    payload = f"{entry.get('name', '')}|{entry.get('image', '')}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict[str, Dict[str, Any]], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def record_detail(manifest: Dict[str, Dict[str, Any]], item_id: str, detail_path: str,
+                  catalog_entry: Optional[Dict[str, Any]] = None,
+                  fetched_at: Optional[float] = None) -> bool:
+    """Update the manifest entry from a detail file on disk. Returns True if its content changed."""
+    with open(detail_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    new_hash = content_hash(data)
+    previous = manifest.get(item_id, {})
+
+    manifest[item_id] = {
+        'hash': new_hash,
+        'fetchedAt': fetched_at if fetched_at is not None else time.time(),
+        'timestamp': data.get('timestamp', ''),
+        'catalogHash': catalog_hash(catalog_entry)
+    }
+    return previous.get('hash') != new_hash
+
+
+def seed_manifest(manifest: Dict[str, Dict[str, Any]], catalog: Dict[str, Dict[str, Any]],
+                  details_dir: str) -> int:
+    """Add entries for detail files fetched before the manifest existed (fetchedAt = file mtime)."""
+    seeded = 0
+    for item_id, entry in catalog.items():
+        detail_path = os.path.join(details_dir, f'{item_id}.json')
+        if item_id in manifest or not os.path.exists(detail_path):
+            continue
+        record_detail(manifest, item_id, detail_path, entry, os.path.getmtime(detail_path))
+        seeded += 1
+    return seeded
+
+
+def select_stale(catalog: Dict[str, Dict[str, Any]], manifest: Dict[str, Dict[str, Any]],
+                 details_dir: str, ttl: float, now: Optional[float] = None) -> Dict[str, str]:
+    """Return itemId -> reason for every catalog item that should be re-fetched."""
+    now = now if now is not None else time.time()
+    stale = {}
+    for item_id, entry in catalog.items():
+        record = manifest.get(item_id)
+        if record is None or not os.path.exists(os.path.join(details_dir, f'{item_id}.json')):
+            stale[item_id] = 'missing'
+        elif record.get('catalogHash') != catalog_hash(entry):
+            stale[item_id] = 'catalog'
+        elif now - record.get('fetchedAt', 0) > ttl:
+            stale[item_id] = 'ttl'
+    return stale
+
+
+def save_changed(changed: List[str], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'generatedAt': int(time.time()), 'changed': sorted(changed)}, f,
+                  ensure_ascii=False, indent=2)
+
+
+def load_changed(path: str) -> List[str]:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('changed', [])
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Single-pass parser for item_details files.
+
+Each detail file is read and walked once into a normalized table model
+(sections -> tables -> rows/columns -> cells holding entries and text).
+Synthesis tables, device production tables, manufacturing time tables and
+item_lookup metadata are all derived from that model, so the extract_*
+scripts no longer re-load and re-walk documentMap/blockMap on their own.
+main() also runs the synthesis-table reverse index of
+extract_device_productions.py, so its output matches running the separate
+extract scripts in order. pipeline.py runs it as the parse-details stage.
+
+Usage (from data/):
+    python3 detail_parser.py             # rebuild synthesis_tables, device_production_tables,
+                                         # manufacturing time and item_lookup in one corpus scan
+    python3 detail_parser.py --changed   # only items listed in item_details_changed.json
+"""
+
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+
+@dataclass
+class Cell:
+    """A table cell: ordered inline elements from all of its child blocks.
+
+    Each element is {'type': 'text', 'text': str|None} or
+    {'type': 'entry', 'id': str|None, 'count': str|None}; missing API fields
+    are kept as None so each consumer can apply its own defaults.
+    """
+    items: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def entries(self) -> List[Dict[str, Any]]:
+        return [i for i in self.items if i['type'] == 'entry']
+
+    @property
+    def texts(self) -> List[str]:
+        return [i['text'] for i in self.items if i['type'] == 'text' and i['text'] is not None]
+
+    def first_text(self) -> Optional[str]:
+        texts = self.texts
+        return texts[0] if texts else None
+
+
+@dataclass
+class Table:
+    table_id: str
+    row_ids: List[str]
+    column_ids: List[str]
+    cells: List[List[Cell]]
+
+    @property
+    def rows(self) -> int:
+        return len(self.row_ids)
+
+    @property
+    def columns(self) -> int:
+        return len(self.column_ids)
+
+
+@dataclass
+class Section:
+    """One documentMap entry (a tab/section of the wiki page)."""
+    doc_id: str
+    tables: List[Table]
+    has_synthesis_device: bool
+
+
+@dataclass
+class ParsedDetail:
+    item_id: str
+    item: Dict[str, Any]
+    sections: List[Section]
+    synthesis_tables: List[Dict[str, Any]]
+    production_tables: List[Dict[str, Any]]
+    time_mapping: Dict[str, str]
+    lookup_entry: Optional[Dict[str, Any]]
+
+
+def _inline_items(inline_elements: List[Dict]) -> List[Dict[str, Any]]:
+    items = []
+    for elem in inline_elements:
+        kind = elem.get('kind')
+        if kind == 'text' and 'text' in elem:
+            items.append({'type': 'text', 'text': elem['text'].get('text')})
+        elif kind == 'entry' and 'entry' in elem:
+            entry = elem['entry']
+            items.append({'type': 'entry', 'id': entry.get('id'), 'count': entry.get('count')})
+    return items
+
+
+def _build_children_index(block_map: Dict[str, Dict]) -> Dict[str, List[str]]:
+    index = {}
+    for block_id, block in block_map.items():
+        parent_id = block.get('parentId')
+        if parent_id:
+            index.setdefault(parent_id, []).append(block_id)
+    return index
+
+
+def parse_section(doc_id: str, block_map: Dict[str, Dict]) -> Section:
+    """Walk a blockMap once, collecting its tables and the 合成设备 marker."""
+    has_synthesis_device = False
+    table_blocks = []
+    block_items = {}
+
+    for block_id, block in block_map.items():
+        if 'text' in block:
+            items = _inline_items(block['text'].get('inlineElements', []))
+            block_items[block_id] = items
+            if not has_synthesis_device and block.get('kind') == 'text':
+                has_synthesis_device = any(
+                    i['type'] == 'text' and '合成设备' in (i['text'] or '') for i in items
+                )
+        if block.get('kind') == 'table' and 'table' in block:
+            table_blocks.append((block_id, block['table']))
+
+    children_index = None
+    tables = []
+    for block_id, table_data in table_blocks:
+        row_ids = table_data.get('rowIds', [])
+        column_ids = table_data.get('columnIds', [])
+        cell_map = table_data.get('cellMap', {})
+
+        cells = []
+        for row_id in row_ids:
+            row = []
+            for col_id in column_ids:
+                cell_id = f'{row_id}_{col_id}'
+                if cell_id in cell_map:
+                    child_ids = cell_map[cell_id].get('childIds', [])
+                else:
+                    if children_index is None:
+                        children_index = _build_children_index(block_map)
+                    child_ids = children_index.get(cell_id, [])
+
+                cell = Cell()
+                for child_id in child_ids:
+                    cell.items.extend(block_items.get(child_id, []))
+                row.append(cell)
+            cells.append(row)
+
+        tables.append(Table(block_id, row_ids, column_ids, cells))
+
+    return Section(doc_id, tables, has_synthesis_device)
+
+
+def parse_document(document: Dict[str, Any]) -> List[Section]:
+    sections = []
+    for doc_id, doc in document.get('documentMap', {}).items():
+        if 'blockMap' not in doc:
+            continue
+        sections.append(parse_section(doc_id, doc['blockMap']))
+    return sections
+
+
+# ---------------------------------------------------------------------------
+# 合成表格 (synthesis_tables)
+# ---------------------------------------------------------------------------
+
+def synthesis_cell_content(cell: Cell) -> List[Dict[str, str]]:
+    result = []
+    for i in cell.items:
+        if i['type'] == 'text':
+            if i['text']:
+                result.append({'type': 'text', 'text': i['text']})
+        else:
+            result.append({
+                'type': 'entry',
+                'id': i['id'] if i['id'] is not None else '',
+                'count': i['count'] if i['count'] is not None else '0'
+            })
+    return result
+
+
+# 设备 / 原料列中与物品并列的文字是注释（如“（液体模式）”“以上任意一种原料”），不是设备或原料
+ANNOTATED_HEADERS = ('合成设备', '原料需求')
+
+
+def strip_annotations(cell: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    if not any(i['type'] == 'entry' for i in cell):
+        return cell
+    return [i for i in cell if i['type'] == 'entry']
+
+
+def build_synthesis_tables(sections: List[Section]) -> List[Dict[str, Any]]:
+    tables = []
+    for section in sections:
+        if not section.has_synthesis_device:
+            continue
+
+        for table in section.tables:
+            rows = [[synthesis_cell_content(c) for c in row] for row in table.cells]
+            if rows:
+                annotated = [c for c, header in enumerate(rows[0])
+                             if any(i['type'] == 'text' and h in i['text'] for i in header for h in ANNOTATED_HEADERS)]
+                for row in rows[1:]:
+                    for c in annotated:
+                        if c < len(row):
+                            row[c] = strip_annotations(row[c])
+            tables.append({
+                'rows': table.rows,
+                'columns': table.columns,
+                'headers': rows[0] if rows else [],
+                'data': rows[1:]
+            })
+    return tables
+
+
+# ---------------------------------------------------------------------------
+# 设备生产表格 (device_production_tables)
+# ---------------------------------------------------------------------------
+
+def detect_table_format(table: Table) -> str:
+    """Detect if table uses row-header or column-header format."""
+    first_cell = table.cells[0][0].first_text()
+    if first_cell and '模式' in first_cell:
+        return 'row_header'
+
+    for cell in table.cells[0]:
+        text = cell.first_text()
+        if text and any(h in text for h in ['原料', '产物', '产品', '时间']):
+            return 'column_header'
+
+    return 'unknown'
+
+
+def extract_recipe_row(table: Table, row_idx: int, headers: Dict[str, str]) -> Dict[str, Any]:
+    materials = []
+    products = []
+    manufacturing_time = None
+
+    col_to_type = {}
+    for col_id, header in headers.items():
+        if not header:
+            continue
+        if '原料' in header or '需求' in header:
+            col_to_type[col_id] = 'material'
+        elif '产物' in header or '产品' in header:
+            col_to_type[col_id] = 'product'
+        elif '时间' in header or '时长' in header:
+            col_to_type[col_id] = 'time'
+
+    for col_idx, col_id in enumerate(table.column_ids):
+        cell_type = col_to_type.get(col_id)
+        if not cell_type:
+            continue
+
+        for i in table.cells[row_idx][col_idx].items:
+            if i['type'] == 'entry':
+                entry = {
+                    'id': i['id'] if i['id'] is not None else '',
+                    'count': i['count'] if i['count'] is not None else '1'
+                }
+                if cell_type == 'material':
+                    materials.append(entry)
+                elif cell_type == 'product':
+                    products.append(entry)
+            elif cell_type == 'time' and i['text'] is not None:
+                manufacturing_time = parse_time_seconds(i['text'])
+
+    return {
+        'materials': materials,
+        'products': products,
+        'manufacturingTime': manufacturing_time
+    }
+
+
+def build_production_tables(sections: List[Section]) -> List[Dict[str, Any]]:
+    """Find production tables with either row-header or column-header format."""
+    tables = []
+    for section in sections:
+        for table in section.tables:
+            if table.rows < 2 or table.columns < 2:
+                continue
+
+            table_format = detect_table_format(table)
+
+            if table_format == 'row_header':
+                # 种植机: Row 0=section, Row 1=headers, Rows 2+=data
+                mode = table.cells[0][0].first_text()
+                headers = {col_id: table.cells[1][c].first_text()
+                           for c, col_id in enumerate(table.column_ids)}
+                first_data_row = 2
+            elif table_format == 'column_header':
+                # 精炼炉: Row 0=headers, Rows 1+=data
+                mode = None
+                headers = {col_id: table.cells[0][c].first_text()
+                           for c, col_id in enumerate(table.column_ids)}
+                if not any(h for h in headers.values() if h and '产物' in h):
+                    continue
+                first_data_row = 1
+            else:
+                continue
+
+            recipes = []
+            for row_idx in range(first_data_row, table.rows):
+                recipe = extract_recipe_row(table, row_idx, headers)
+                if recipe['materials'] and recipe['products']:
+                    recipes.append(recipe)
+
+            if recipes:
+                tables.append({
+                    'tableId': table.table_id,
+                    'mode': mode,
+                    'headers': headers,
+                    'recipes': recipes,
+                    'format': table_format
+                })
+    return tables
+
+
+# ---------------------------------------------------------------------------
+# 制造时间 (消耗时长)
+# ---------------------------------------------------------------------------
+
+def parse_time_seconds(time_str: str) -> Optional[int]:
+    """"2s" -> 2；无法识别时返回 None"""
+    time_str = time_str.strip()
+    if time_str.endswith('s'):
+        try:
+            return int(time_str[:-1])
+        except ValueError:
+            pass
+    return None
+
+
+def recipe_time_key(material_ids: List[str], product_ids: List[str]) -> str:
+    """recipe_key format: "materials_ids|products_ids" (sorted, joined by comma)"""
+    return f"{','.join(sorted(material_ids))}|{','.join(sorted(product_ids))}"
+
+
+def build_time_mapping(sections: List[Section]) -> Dict[str, Any]:
+    """Map recipe_time_key -> manufacturing time (seconds; raw text if unparseable) from 消耗时长 tables."""
+    time_mapping = {}
+    for section in sections:
+        for table in section.tables:
+            if table.columns < 3 or table.rows < 2:
+                continue
+
+            header = table.cells[0][2]
+            if not any('消耗时长' in t for t in header.texts):
+                continue
+
+            for row in table.cells[1:]:
+                time_value = next((t.strip() for t in row[2].texts if t.strip()), None)
+                if not time_value:
+                    continue
+
+                material_ids = [e['id'] for e in row[0].entries if e['id']]
+                product_ids = [e['id'] for e in row[1].entries if e['id']]
+                seconds = parse_time_seconds(time_value)
+                time_mapping[recipe_time_key(material_ids, product_ids)] = (
+                    seconds if seconds is not None else time_value)
+    return time_mapping
+
+
+# ---------------------------------------------------------------------------
+# item_lookup 元数据
+# ---------------------------------------------------------------------------
+
+def build_lookup_entry(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    item_name = item.get('name', '')
+    item_id = item.get('itemId', '')
+    if not item_name or not item_id:
+        return None
+
+    sub_type = item.get('subType', {})
+    brief = item.get('brief', {})
+    return {
+        'itemId': item_id,
+        'name': item_name,
+        'image': brief.get('cover', '') if brief else '',
+        'subTypeID': sub_type.get('id', ''),
+        'subTypeName': sub_type.get('name', '')
+    }
+
+
+# ---------------------------------------------------------------------------
+# 入口
+# ---------------------------------------------------------------------------
+
+def parse_detail(data: Dict[str, Any], item_id: str = '') -> Optional[ParsedDetail]:
+    """Parse a loaded detail response. Returns None if code != 0 or no item."""
+    if data.get('code') != 0:
+        return None
+
+    item = data.get('data', {}).get('item', {})
+    if not item:
+        return None
+
+    sections = parse_document(item.get('document', {}))
+    return ParsedDetail(
+        item_id=item.get('itemId', item_id),
+        item=item,
+        sections=sections,
+        synthesis_tables=build_synthesis_tables(sections),
+        production_tables=build_production_tables(sections),
+        time_mapping=build_time_mapping(sections),
+        lookup_entry=build_lookup_entry(item)
+    )
+
+
+def parse_detail_file(filepath: str) -> Optional[ParsedDetail]:
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    item_id = os.path.splitext(os.path.basename(filepath))[0]
+    return parse_detail(data, item_id)
+
+
+def parse_corpus(details_dir: str = 'item_details',
+                 item_ids: Optional[List[str]] = None) -> Dict[str, ParsedDetail]:
+    """Read every detail file (or only item_ids) exactly once. Keyed by file stem (itemId)."""
+    wanted = set(item_ids) if item_ids is not None else None
+    parsed = {}
+    for filename in sorted(os.listdir(details_dir)):
+        if not filename.endswith('.json'):
+            continue
+
+        item_id = filename[:-len('.json')]
+        if wanted is not None and item_id not in wanted:
+            continue
+        try:
+            detail = parse_detail_file(os.path.join(details_dir, filename))
+        except Exception as e:
+            print(f"  错误处理 {filename}: {e}")
+            continue
+
+        if detail:
+            parsed[item_id] = detail
+    return parsed
+
+
+def _save_json(data, filepath: str):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    # 延迟导入，避免与 extract_* 脚本循环依赖
+    from extract_device_productions import load_item_lookup, build_device_productions
+    from extract_manufacturing_time import apply_time_mapping
+    from update_item_lookup_subtype import save_item_lookup
+    from detail_manifest import CHANGED_FILE, load_changed
+
+    only_changed = '--changed' in sys.argv
+
+    print("单次扫描 item_details 并生成所有派生表格...")
+    print("="*60)
+
+    if only_changed:
+        changed = load_changed(CHANGED_FILE)
+        print(f"\n仅处理 {CHANGED_FILE} 中的 {len(changed)} 个物品")
+        if not changed:
+            return
+        corpus = parse_corpus('item_details', changed)
+    else:
+        corpus = parse_corpus('item_details')
+    print(f"\n[1/4] 解析了 {len(corpus)} 个详情文件")
+
+    os.makedirs('synthesis_tables', exist_ok=True)
+    synthesis_count = 0
+    for item_id, detail in corpus.items():
+        output_path = os.path.join('synthesis_tables', f'{item_id}.json')
+        if detail.synthesis_tables:
+            _save_json({
+                'itemId': detail.item_id,
+                'name': detail.item.get('name', ''),
+                'tables': detail.synthesis_tables
+            }, output_path)
+            synthesis_count += 1
+        elif os.path.exists(output_path):
+            os.remove(output_path)
+    print(f"[2/4] 合成表格: {synthesis_count} 个 → synthesis_tables/")
+
+    # 设备表：先由合成表反向索引（extract_device_productions），再用设备详情中的生产表覆盖，
+    # 最后按设备详情中的时间表设置 manufacturingTime
+    item_lookup = load_item_lookup()
+    device_recipes = build_device_productions(item_lookup)
+    details = corpus
+    if only_changed:
+        # 未变化的设备也要重写（反向索引可能变化），需要它们的生产表和时间表
+        device_ids = set(device_recipes)
+        if os.path.exists('device_production_tables'):
+            device_ids |= {f[:-len('.json')] for f in os.listdir('device_production_tables') if f.endswith('.json')}
+        details = {**parse_corpus('item_details', sorted(device_ids - set(corpus))), **corpus}
+    from_details = set()
+    for item_id, detail in details.items():
+        recipes = [r for t in detail.production_tables for r in t['recipes']]
+        if recipes:
+            device_recipes[item_id] = recipes
+            from_details.add(item_id)
+
+    os.makedirs('device_production_tables', exist_ok=True)
+    timed_count = 0
+    for device_id, recipes in device_recipes.items():
+        device_table = {
+            'deviceId': device_id,
+            'deviceName': item_lookup.get(device_id, f"Unknown ({device_id})" if device_id in from_details
+                                          else f"Unknown Device ({device_id})"),
+            'recipeCount': len(recipes),
+            'recipes': recipes
+        }
+        detail = details.get(device_id)
+        if detail and detail.time_mapping:
+            apply_time_mapping(device_table, detail.time_mapping)
+            timed_count += 1
+        _save_json(device_table, os.path.join('device_production_tables', f'{device_id}.json'))
+    # 不再有配方的设备（如合成表中的注释文字曾被当作设备）
+    for filename in os.listdir('device_production_tables'):
+        if filename.endswith('.json') and filename[:-len('.json')] not in device_recipes:
+            os.remove(os.path.join('device_production_tables', filename))
+    print(f"[3/4] 设备生产表格: {len(device_recipes)} 个（{timed_count} 个有制造时间）→ device_production_tables/")
+
+    web_lookup_path = Path('..') / 'web' / 'public' / 'data' / 'item_lookup.json'
+    existing = {}
+    if web_lookup_path.exists():
+        with open(web_lookup_path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+    lookup = dict(existing) if only_changed else {}
+    for detail in corpus.values():
+        if detail.lookup_entry:
+            entry = detail.lookup_entry
+            # 保留 update_image_paths.py 改写的本地图片路径（详情中是远程 URL）
+            image = existing.get(entry['itemId'], {}).get('image')
+            if image and not image.startswith('http') and 'image' in entry:
+                entry = dict(entry, image=image)
+            lookup[entry['itemId']] = entry
+    save_item_lookup(lookup, web_lookup_path)
+    # extract_recipe_database / planner / download_images 读取的是 data/ 下的副本
+    save_item_lookup(lookup, Path('item_lookup.json'))
+    dist_lookup_path = Path('..') / 'web' / 'dist' / 'data' / 'item_lookup.json'
+    if dist_lookup_path.parent.exists():
+        save_item_lookup(lookup, dist_lookup_path)
+    print(f"[4/4] item_lookup: {len(lookup)} 个物品")
+
+    print("\n" + "="*60)
+    print("✅ 完成！")
+    print("="*60)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,17 +4,21 @@
 
 功能：
 - 从 item_lookup.json 读取所有图片URL
-- 并发下载到 web/public/images/items/
-- 支持断点续传
+- 并发下载到 web/public/images/items/（共享连接池的 Session）
+- 在 data/image_manifest.json 中记录 ETag/Last-Modified，重新运行时发送条件请求（304 直接跳过）
+- 已存在但被截断/损坏的文件会重新下载
 - 显示进度条
-- 验证图片有效性
+- 验证图片有效性（文件头、尺寸、结尾标记）
 """
 
 import json
 import os
+import struct
 import sys
+import threading
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
 from urllib.parse import urlparse
 import time
 
@@ -26,52 +30,204 @@ except ImportError:
     sys.exit(1)
 
 
-def download_image(url: str, filepath: str, max_retries: int = 3) -> tuple[bool, str]:
-    if os.path.exists(filepath):
-        return (True, f"已存在，跳过")
-    
+MANIFEST_PATH = 'data/image_manifest.json'
+MAX_WORKERS = 10
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+_session_lock = threading.Lock()
+_session = None
+
+
+def get_session() -> 'requests.Session':
+    """所有线程共享的 Session，连接池大小与线程数一致，复用 TLS 连接"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _session = session
+        return _session
+
+
+def probe_image(filepath: str) -> Optional[dict]:
+    """检查图片文件头、尺寸和结尾标记。返回 {'format', 'width', 'height'}，无效或被截断时返回 None"""
+    try:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    width = height = 0
+    fmt = None
+
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+        fmt = 'png'
+        width, height = struct.unpack('>II', data[16:24])
+        if not data.rstrip(b'\x00').endswith(b'IEND\xaeB`\x82'):
+            return None
+
+    elif data[:2] == b'\xff\xd8':
+        fmt = 'jpeg'
+        if not data.rstrip(b'\x00').endswith(b'\xff\xd9'):
+            return None
+        pos = 2
+        while pos + 9 < len(data):
+            if data[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = data[pos + 1]
+            if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                break
+            if marker == 0xD8 or marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                pos += 2
+                continue
+            pos += 2 + struct.unpack('>H', data[pos + 2:pos + 4])[0]
+
+    elif data[:6] in (b'GIF87a', b'GIF89a'):
+        fmt = 'gif'
+        width, height = struct.unpack('<HH', data[6:10])
+        if not data.endswith(b'\x3b'):
+            return None
+
+    elif data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        fmt = 'webp'
+        if struct.unpack('<I', data[4:8])[0] + 8 > len(data):
+            return None
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = (v & 0x3FFF for v in struct.unpack('<HH', data[26:30]))
+        elif chunk == b'VP8L':
+            bits = struct.unpack('<I', data[21:25])[0]
+            width, height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        elif chunk == b'VP8X':
+            width = int.from_bytes(data[24:27], 'little') + 1
+            height = int.from_bytes(data[27:30], 'little') + 1
+
+    if not fmt or width <= 0 or height <= 0:
+        return None
+
+    return {'format': fmt, 'width': width, 'height': height}
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path: str = MANIFEST_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def manifest_entry(url: str, headers, info: dict, filepath: str) -> dict:
+    return {
+        'url': url,
+        'etag': headers.get('ETag', ''),
+        'lastModified': headers.get('Last-Modified', ''),
+        'size': os.path.getsize(filepath),
+        **info
+    }
+
+
+def download_image(url: str, filepath: str, cached: Optional[dict] = None,
+                   max_retries: int = 3) -> tuple[bool, str, Optional[dict]]:
+    """下载单张图片。返回 (成功, 信息, 清单条目)。
+
+    文件有效且清单中有同一URL的 ETag/Last-Modified 时发送条件请求；文件有效但清单中没有记录时只发 HEAD
+    补充记录；URL 已变化（或记录没有 ETag/Last-Modified）、文件缺失或损坏时完整下载。
+    """
+    existing = probe_image(filepath) if os.path.exists(filepath) else None
+    corrupted = os.path.exists(filepath) and not existing
+    url_changed = bool(cached) and cached.get('url') != url
+
+    if existing and not url.startswith('http'):
+        # 已被 update_image_paths.py 改写为本地路径，无法再请求
+        return (True, "已存在，跳过", cached)
+
+    session = get_session()
+    tmp_path = f"{filepath}.part"
+
     for attempt in range(max_retries):
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-            
-            with requests.get(url, stream=True, headers=headers, timeout=30) as resp:
+            headers = {}
+            if existing and not cached:
+                with session.head(url, timeout=30, allow_redirects=True) as resp:
+                    resp.raise_for_status()
+                    return (True, "已存在，跳过", manifest_entry(url, resp.headers, existing, filepath))
+            if existing and not url_changed:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('lastModified'):
+                    headers['If-Modified-Since'] = cached['lastModified']
+
+            with session.get(url, stream=True, headers=headers, timeout=30) as resp:
+                if resp.status_code == 304:
+                    return (True, "未修改，跳过", {**cached, **existing, 'size': os.path.getsize(filepath)})
+
                 resp.raise_for_status()
                 
                 os.makedirs(os.path.dirname(filepath), exist_ok=True)
                 
-                with open(filepath, 'wb') as f:
-                    for chunk in resp.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                # 先写临时文件，验证通过后再替换，避免留下被截断的文件
+                try:
+                    with open(tmp_path, 'wb') as f:
+                        for chunk in resp.iter_content(chunk_size=8192):
+                            f.write(chunk)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
                 
-                if os.path.getsize(filepath) == 0:
-                    os.remove(filepath)
-                    return (False, "下载的文件大小为0")
+                if os.path.getsize(tmp_path) == 0:
+                    os.remove(tmp_path)
+                    return (False, "下载的文件大小为0", None)
                 
-                return (True, "下载成功")
+                expected = resp.headers.get('Content-Length')
+                size = os.path.getsize(tmp_path)
+                if expected and resp.headers.get('Content-Encoding') is None and int(expected) != size:
+                    os.remove(tmp_path)
+                    raise IOError(f"大小不符 {size}/{expected}")
+                
+                info = probe_image(tmp_path)
+                if not info:
+                    os.remove(tmp_path)
+                    raise IOError("图片无效或被截断")
+                
+                os.replace(tmp_path, filepath)
+                if not existing:
+                    message = "重新下载（原文件损坏）" if corrupted else "下载成功"
+                else:
+                    message = "已更新（URL已变化）" if url_changed else "已更新"
+                return (True, f"{message} {info['width']}x{info['height']}",
+                        manifest_entry(url, resp.headers, info, filepath))
                 
         except requests.exceptions.HTTPError as e:
             if e.response.status_code in [404, 403]:
-                return (False, f"HTTP {e.response.status_code}")
+                return (False, f"HTTP {e.response.status_code}", None)
             if attempt < max_retries - 1:
                 time.sleep(1)
                 continue
-            return (False, f"HTTP错误: {e.response.status_code}")
+            return (False, f"HTTP错误: {e.response.status_code}", None)
             
         except requests.exceptions.Timeout:
             if attempt < max_retries - 1:
                 time.sleep(2)
                 continue
-            return (False, "超时")
+            return (False, "超时", None)
             
         except Exception as e:
             if attempt < max_retries - 1:
                 time.sleep(1)
                 continue
-            return (False, f"异常: {str(e)}")
+            return (False, f"异常: {str(e)}", None)
     
-    return (False, "达到最大重试次数")
+    return (False, "达到最大重试次数", None)
 
 
 def get_extension(url: str) -> str:
@@ -123,11 +279,11 @@ def main():
         'errors': []
     }
     
-    max_workers = 10
+    manifest = load_manifest()
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = {
-            executor.submit(download_image, url, filepath): (item_id, name, url)
+            executor.submit(download_image, url, filepath, manifest.get(item_id)): (item_id, name, url)
             for item_id, url, filepath, name in tasks
         }
         
@@ -137,7 +293,9 @@ def main():
             item_id, name, url = futures[future]
             
             try:
-                success, message = future.result()
+                success, message, entry = future.result()
+                if entry:
+                    manifest[item_id] = entry
                 
                 status = '✓' if success else '✗'
                 print(f"[{completed}/{len(tasks)}] {status} {item_id} - {name}: {message}")
@@ -160,6 +318,8 @@ def main():
                 print(f"[{completed}/{len(tasks)}] ✗ {item_id} - {name}: 异常 {str(e)}")
                 results['failed'] += 1
     
+    save_manifest(manifest)
+    
     print("\n" + "="*50)
     print(f"下载完成:")
     print(f"  成功: {results['success']}")
@@ -6,12 +6,46 @@ Creates a unified recipe database with:
 - Deduplicated recipes (same device + materials + products)
 - Index by item as materials/products
 - Index by device
+
+Rebuilds are incremental: each source file's recipe contributions are cached
+in recipe_database_cache.json together with the file's content hash. Only
+recipes contributed by changed, added or removed files are re-resolved, and
+the indexes are updated in place. Run with --full to ignore the cache.
+
+The database also carries cycleAnalysis (strongly connected components of the
+product -> material item graph in topological order, the condensation DAG,
+cyclic components and deadlock cycle groups), computed with the web's default
+ignored devices by planner.graph so the browser and offline planners do not
+have to recompute it, and databaseHash (planner.graph.database_hash of the
+rest of the file), which the web compares with plan_cache.json.
+
+Recipe ids are content-addressed: 'recipe_' + the first 10 hex digits of
+sha256(recipe_key), lengthened only if two keys would share an id. Positional
+ids from older builds (recipe_0, recipe_1, ...) are migrated once; the
+old -> new map is written to recipe_id_migration.json and applied to the
+web custom recipe overrides.
 """
 
+import bisect
+import hashlib
 import json
 import os
-from collections import defaultdict
-from typing import Dict, List, Any
+import sys
+from typing import Dict, List, Any, Optional, Tuple
+
+from planner.graph import RecipeGraph, database_hash, load_ignored_devices
+
+
+CACHE_PATH = 'recipe_database_cache.json'
+CACHE_VERSION = 1
+SYNTHESIS_DIR = 'synthesis_tables'
+DEVICE_PROD_DIR = 'device_production_tables'
+MIGRATION_PATH = 'recipe_id_migration.json'
+CUSTOM_RECIPES_PATH = os.path.join('..', 'web', 'public', 'data', 'custom', 'recipes.json')
+
+# recipe id = 'recipe_' + sha256(recipe_key) 的前若干位十六进制；冲突时加长
+RECIPE_ID_PREFIX = 'recipe_'
+RECIPE_ID_HEX = 10
 
 
 def load_item_lookup() -> Dict[str, str]:
@@ -37,276 +71,498 @@ def load_real_device_ids() -> set:
     return set(d['itemId'] for d in devices)
 
 
-def parse_synthesis_tables(synthesis_dir: str, item_lookup: Dict[str, str],
-                          device_text_map: Dict[str, str]) -> Dict[str, Dict]:
+def recipe_key(device_id: str, material_ids: List[str], product_ids: List[str]) -> str:
+    """配方指纹用于去重：device|sorted mat:count|sorted prod:count"""
+    return f"{device_id}|{','.join(sorted(material_ids))}|{','.join(sorted(product_ids))}"
+
+
+def parse_synthesis_file(data: Dict[str, Any], item_lookup: Dict[str, str],
+                         device_text_map: Dict[str, str]) -> List[Tuple[str, Dict]]:
     """
-    Parse synthesis tables and extract recipes.
+    Extract recipes from one synthesis table file.
 
-    Returns: dict of recipe_id -> recipe_data
+    Returns: list of (recipe_key, recipe_data) in table order
     """
-    recipes = {}
+    contributions = []
+
+    for table in data.get('tables', []):
+        headers = table.get('headers', [])
+
+        device_col_idx = None
+        materials_col_idx = None
+        products_col_idx = None
+
+        # 动态列解析逻辑 (复用 extract_device_productions.py)
+        for idx, header_cells in enumerate(headers):
+            for cell in header_cells:
+                if cell.get('type') == 'text':
+                    text = cell.get('text', '')
+                    if '合成设备' in text and device_col_idx is None:
+                        device_col_idx = idx
+                    elif '原料需求' in text and materials_col_idx is None:
+                        materials_col_idx = idx
+                    elif '合成产物' in text and products_col_idx is None:
+                        products_col_idx = idx
+
+        if device_col_idx is None or materials_col_idx is None or products_col_idx is None:
+            continue
 
-    if not os.path.exists(synthesis_dir):
-        print(f"警告: {synthesis_dir} 目录不存在")
-        return recipes
+        for row in table.get('data', []):
+            if len(row) <= max(device_col_idx, materials_col_idx, products_col_idx):
+                continue
 
-    for filename in os.listdir(synthesis_dir):
-        if not filename.endswith('.json'):
-            continue
+            device_cell = row[device_col_idx]
+            materials_cell = row[materials_col_idx]
+            products_cell = row[products_col_idx]
 
-        filepath = os.path.join(synthesis_dir, filename)
+            for device_item in device_cell:
+                device_type = device_item.get('type')
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+                # Skip category header rows (count=0 indicates section/categorization)
+                if device_type == 'entry' and device_item.get('count', '1') == '0':
+                    continue
 
-        item_id = data['itemId']
+                if device_type == 'entry':
+                    device_id = device_item['id']
+                elif device_type == 'text':
+                    device_text = device_item.get('text', '').strip()
+                    # 使用 device_text_map 进行映射
+                    device_id = device_text_map.get(device_text, f"text_{device_text}")
+                else:
+                    continue
 
-        for table in data.get('tables', []):
-            headers = table.get('headers', [])
+                # 提取原料
+                materials = []
+                material_ids = []
+                for mat in materials_cell:
+                    if mat.get('type') == 'entry':
+                        mat_id = mat['id']
+                        mat_name = item_lookup.get(mat_id, f"Unknown({mat_id})")
+                        mat_count = mat.get('count', '1')
+                        materials.append({
+                            'id': mat_id,
+                            'name': mat_name,
+                            'count': mat_count
+                        })
+                        material_ids.append(f"{mat_id}:{mat_count}")
+
+                # 提取产物
+                products = []
+                product_ids = []
+                if products_cell:
+                    for prod in products_cell:
+                        if prod.get('type') == 'entry':
+                            prod_id = prod['id']
+                            prod_name = item_lookup.get(prod_id, f"Unknown({prod_id})")
+                            prod_count = prod.get('count', '1')
+                            products.append({
+                                'id': prod_id,
+                                'name': prod_name,
+                                'count': prod_count
+                            })
+                            product_ids.append(f"{prod_id}:{prod_count}")
 
-            device_col_idx = None
-            materials_col_idx = None
-            products_col_idx = None
+                if not materials or not products:
+                    continue
 
-            # 动态列解析逻辑 (复用 extract_device_productions.py)
-            for idx, header_cells in enumerate(headers):
-                for cell in header_cells:
-                    if cell.get('type') == 'text':
-                        text = cell.get('text', '')
-                        if '合成设备' in text and device_col_idx is None:
-                            device_col_idx = idx
-                        elif '原料需求' in text and materials_col_idx is None:
-                            materials_col_idx = idx
-                        elif '合成产物' in text and products_col_idx is None:
-                            products_col_idx = idx
+                contributions.append((recipe_key(device_id, material_ids, product_ids), {
+                    'deviceId': device_id,
+                    'deviceName': item_lookup.get(device_id, device_id),
+                    'materials': materials,
+                    'products': products,
+                    'source': 'synthesis_tables'
+                }))
 
-            if device_col_idx is None or materials_col_idx is None or products_col_idx is None:
-                continue
+    return contributions
 
-            for row in table.get('data', []):
-                if len(row) <= max(device_col_idx, materials_col_idx, products_col_idx):
-                    continue
 
-                device_cell = row[device_col_idx]
-                materials_cell = row[materials_col_idx]
-                products_cell = row[products_col_idx]
-
-                for device_item in device_cell:
-                    device_type = device_item.get('type')
-
-                    # Skip category header rows (count=0 indicates section/categorization)
-                    if device_type == 'entry' and device_item.get('count', '1') == '0':
-                        continue
-
-                    if device_type == 'entry':
-                        device_id = device_item['id']
-                    elif device_type == 'text':
-                        device_text = device_item.get('text', '').strip()
-                        # 使用 device_text_map 进行映射
-                        device_id = device_text_map.get(device_text, f"text_{device_text}")
-                    else:
-                        continue
-
-                    # 提取原料
-                    materials = []
-                    material_ids = []
-                    for mat in materials_cell:
-                        if mat.get('type') == 'entry':
-                            mat_id = mat['id']
-                            mat_name = item_lookup.get(mat_id, f"Unknown({mat_id})")
-                            mat_count = mat.get('count', '1')
-                            materials.append({
-                                'id': mat_id,
-                                'name': mat_name,
-                                'count': mat_count
-                            })
-                            material_ids.append(f"{mat_id}:{mat_count}")
-
-                    # 提取产物
-                    products = []
-                    product_ids = []
-                    if products_cell:
-                        for prod in products_cell:
-                            if prod.get('type') == 'entry':
-                                prod_id = prod['id']
-                                prod_name = item_lookup.get(prod_id, f"Unknown({prod_id})")
-                                prod_count = prod.get('count', '1')
-                                products.append({
-                                    'id': prod_id,
-                                    'name': prod_name,
-                                    'count': prod_count
-                                })
-                                product_ids.append(f"{prod_id}:{prod_count}")
-
-                    if not materials or not products:
-                        continue
-
-                    # 创建配方指纹用于去重
-                    recipe_key = f"{device_id}|{','.join(sorted(material_ids))}|{','.join(sorted(product_ids))}"
-                    recipe_id = f"recipe_{len(recipes)}"
-
-                    recipe_data = {
-                        'deviceId': device_id,
-                        'deviceName': item_lookup.get(device_id, device_id),
-                        'materials': materials,
-                        'products': products,
-                        'source': 'synthesis_tables'
-                    }
-
-                    # 如果已存在相同配方，保留信息更全的
-                    if recipe_key in recipes:
-                        existing = recipes[recipe_key]
-                        # 比较信息完整性（有 manufacturingTime 的优先）
-                        if 'manufacturingTime' in existing and 'manufacturingTime' not in recipe_data:
-                            continue
-                        elif 'manufacturingTime' not in existing and 'manufacturingTime' in recipe_data:
-                            recipes[recipe_key] = recipe_data
-                    else:
-                        recipes[recipe_key] = recipe_data
-
-    return recipes
-
-
-def parse_device_production_tables(device_prod_dir: str, item_lookup: Dict[str, str],
-                                  device_text_map: Dict[str, str],
-                                  existing_recipes: Dict[str, Dict],
-                                  real_device_ids: set = set()) -> Dict[str, Dict]:
+def parse_device_production_file(data: Dict[str, Any], item_lookup: Dict[str, str],
+                                 real_device_ids: set) -> List[Tuple[str, Dict]]:
     """
-    Parse device production tables and merge with existing recipes.
+    Extract recipes from one device production table file.
 
-    Returns: updated dict of recipe_id -> recipe_data
+    Returns: list of (recipe_key, recipe_data) in table order
     """
-    if not os.path.exists(device_prod_dir):
-        print(f"警告: {device_prod_dir} 目录不存在")
-        return existing_recipes
+    contributions = []
+    device_id = data['deviceId']
+
+    if device_id.isdigit() and real_device_ids and device_id not in real_device_ids:
+        return contributions
+
+    device_name = data.get('deviceName', item_lookup.get(device_id, device_id))
+
+    for recipe in data.get('recipes', []):
+        # 提取原料并添加名称
+        materials = []
+        material_ids = []
+        for mat in recipe.get('materials', []):
+            mat_id = mat.get('id', '')
+            mat_name = item_lookup.get(mat_id, f"Unknown({mat_id})")
+            mat_count = mat.get('count', '1')
+            materials.append({
+                'id': mat_id,
+                'name': mat_name,
+                'count': mat_count
+            })
+            material_ids.append(f"{mat_id}:{mat_count}")
+
+        # 提取产物并添加名称
+        products = []
+        product_ids = []
+        for prod in recipe.get('products', []):
+            prod_id = prod.get('id', '')
+            prod_name = item_lookup.get(prod_id, f"Unknown({prod_id})")
+            prod_count = prod.get('count', '1')
+            products.append({
+                'id': prod_id,
+                'name': prod_name,
+                'count': prod_count
+            })
+            product_ids.append(f"{prod_id}:{prod_count}")
+
+        if not products:
+            continue
+
+        recipe_data = {
+            'deviceId': device_id,
+            'deviceName': device_name,
+            'materials': materials,
+            'products': products,
+            'source': 'device_production_tables'
+        }
 
-    if real_device_ids is None:
-        real_device_ids = set()
+        # Preserve manufacturing time if available
+        if 'manufacturingTime' in recipe:
+            recipe_data['manufacturingTime'] = recipe['manufacturingTime']
 
-    for filename in os.listdir(device_prod_dir):
-        if not filename.endswith('.json'):
+        contributions.append((recipe_key(device_id, material_ids, product_ids), recipe_data))
+
+    return contributions
+
+
+def merge_recipe(existing: Optional[Dict], recipe_data: Dict) -> Dict:
+    """
+    同一配方指纹出现多次时，保留信息更全的：
+    - device_production_tables 的数据更完整，优先于 synthesis_tables
+    - 都来自 synthesis_tables 时有 manufacturingTime 的优先
+    - 其他情况保持先出现的
+    """
+    if existing is None:
+        return recipe_data
+    if existing['source'] == 'synthesis_tables' and recipe_data['source'] == 'device_production_tables':
+        return recipe_data
+    if (existing['source'] == recipe_data['source'] == 'synthesis_tables' and
+            'manufacturingTime' not in existing and 'manufacturingTime' in recipe_data):
+        return recipe_data
+    return existing
+
+
+def source_files() -> List[str]:
+    """所有来源文件，按合并顺序：合成表格在前，设备生产表格在后，各自按文件名排序"""
+    paths = []
+    for source_dir in (SYNTHESIS_DIR, DEVICE_PROD_DIR):
+        if not os.path.exists(source_dir):
+            print(f"警告: {source_dir} 目录不存在")
             continue
+        paths.extend(os.path.join(source_dir, filename)
+                     for filename in sorted(os.listdir(source_dir)) if filename.endswith('.json'))
+    return paths
+
+
+def source_order(path: str) -> Tuple[int, str]:
+    return (0 if path.startswith(SYNTHESIS_DIR) else 1, path)
+
+
+def parse_source_file(path: str, item_lookup: Dict[str, str], device_text_map: Dict[str, str],
+                      real_device_ids: set) -> List[Tuple[str, Dict]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if path.startswith(SYNTHESIS_DIR):
+        return parse_synthesis_file(data, item_lookup, device_text_map)
+    return parse_device_production_file(data, item_lookup, real_device_ids)
+
+
+def content_recipe_id(key: str, length: int = RECIPE_ID_HEX) -> str:
+    return RECIPE_ID_PREFIX + hashlib.sha256(key.encode('utf-8')).hexdigest()[:length]
+
+
+def is_content_recipe_id(recipe_id: str, key: str) -> bool:
+    digits = recipe_id[len(RECIPE_ID_PREFIX):]
+    return (recipe_id.startswith(RECIPE_ID_PREFIX) and len(digits) >= RECIPE_ID_HEX and
+            hashlib.sha256(key.encode('utf-8')).hexdigest().startswith(digits))
+
+
+def assign_recipe_id(key: str, id_map: Dict[str, str], taken: Dict[str, str]) -> str:
+    """
+    为新的配方指纹分配 id 并记录到 id_map/taken (recipe_id -> recipe_key)。
+    已分配的 id 不会因为后来的配方而改变：冲突时只加长新配方的 id。
+    """
+    if key in id_map:
+        return id_map[key]
+
+    for length in range(RECIPE_ID_HEX, 65):
+        recipe_id = content_recipe_id(key, length)
+        if taken.get(recipe_id, key) == key:
+            break
+        print(f"      ⚠️ recipe id 冲突: {recipe_id} ({taken[recipe_id]} / {key})，加长 id")
+    else:
+        raise ValueError(f"无法为配方分配唯一 id: {key}")
+
+    id_map[key] = recipe_id
+    taken[recipe_id] = key
+    return recipe_id
 
-        filepath = os.path.join(device_prod_dir, filename)
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+def check_id_map(id_map: Dict[str, str]) -> Dict[str, str]:
+    """检查 id 唯一，返回 recipe_id -> recipe_key"""
+    taken = {}
+    for key, recipe_id in id_map.items():
+        if recipe_id in taken:
+            raise ValueError(f"recipe id 冲突: {recipe_id} 同时对应 {taken[recipe_id]} 和 {key}")
+        taken[recipe_id] = key
+    return taken
 
-        device_id = data['deviceId']
 
-        if device_id.isdigit() and real_device_ids and device_id not in real_device_ids:
+def migrate_id_map(id_map: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    把旧的位置编号 id 换成内容寻址 id。
+
+    Returns: (新的 recipe_key -> recipe_id, 旧 id -> 新 id)
+    """
+    migrated = {key: recipe_id for key, recipe_id in id_map.items()
+                if is_content_recipe_id(recipe_id, key)}
+    taken = check_id_map(migrated)
+
+    migration = {}
+    for key in sorted(id_map):
+        if key in migrated:
             continue
+        migration[id_map[key]] = assign_recipe_id(key, migrated, taken)
 
-        device_id = data['deviceId']
-        device_name = data.get('deviceName', item_lookup.get(device_id, device_id))
-
-        for recipe in data.get('recipes', []):
-            # 提取原料并添加名称
-            materials = []
-            material_ids = []
-            for mat in recipe.get('materials', []):
-                mat_id = mat.get('id', '')
-                mat_name = item_lookup.get(mat_id, f"Unknown({mat_id})")
-                mat_count = mat.get('count', '1')
-                materials.append({
-                    'id': mat_id,
-                    'name': mat_name,
-                    'count': mat_count
-                })
-                material_ids.append(f"{mat_id}:{mat_count}")
-
-            # 提取产物并添加名称
-            products = []
-            product_ids = []
-            for prod in recipe.get('products', []):
-                prod_id = prod.get('id', '')
-                prod_name = item_lookup.get(prod_id, f"Unknown({prod_id})")
-                prod_count = prod.get('count', '1')
-                products.append({
-                    'id': prod_id,
-                    'name': prod_name,
-                    'count': prod_count
-                })
-                product_ids.append(f"{prod_id}:{prod_count}")
-
-            if not products:
-                continue
+    return migrated, migration
 
-            # 创建配方指纹用于去重
-            recipe_key = f"{device_id}|{','.join(sorted(material_ids))}|{','.join(sorted(product_ids))}"
-
-            recipe_data = {
-                'deviceId': device_id,
-                'deviceName': device_name,
-                'materials': materials,
-                'products': products,
-                'source': 'device_production_tables'
-            }
-
-            # Preserve manufacturing time if available
-            if 'manufacturingTime' in recipe:
-                recipe_data['manufacturingTime'] = recipe['manufacturingTime']
-
-            # 如果已存在相同配方，保留信息更全的
-            if recipe_key in existing_recipes:
-                existing = existing_recipes[recipe_key]
-                # device_production_tables 的数据更完整，优先使用
-                if existing['source'] == 'synthesis_tables':
-                    existing_recipes[recipe_key] = recipe_data
-                else:
-                    # 同源，保持原有的
-                    pass
-            else:
-                existing_recipes[recipe_key] = recipe_data
 
-    return existing_recipes
+def save_migration(migration: Dict[str, str], path: str = MIGRATION_PATH):
+    """合并到已有的迁移表（旧 id 只会迁移一次，已有条目保留）"""
+    existing = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+    existing.update(migration)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(existing.items())), f, ensure_ascii=False, indent=2)
+
+
+def migrate_custom_recipes(migration: Dict[str, str], path: str = CUSTOM_RECIPES_PATH) -> int:
+    """把 web 自定义配方中引用的旧 id 换成新 id，返回替换的数量"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    replaced = 0
+    recipes = {}
+    for recipe_id, recipe in data.get('recipes', {}).items():
+        new_id = migration.get(recipe_id, recipe_id)
+        if new_id != recipe_id:
+            replaced += 1
+            if isinstance(recipe, dict) and recipe.get('id') == recipe_id:
+                recipe['id'] = new_id
+        recipes[new_id] = recipe
+    data['recipes'] = recipes
+
+    deleted = data.get('deletedRecipes', [])
+    replaced += sum(1 for recipe_id in deleted if recipe_id in migration)
+    data['deletedRecipes'] = [migration.get(recipe_id, recipe_id) for recipe_id in deleted]
+
+    if replaced:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    return replaced
+
+
+def index_recipe(db: Dict[str, Any], recipe_data: Dict):
+    """把配方加入 asMaterials/asProducts/byDevice，列表保持按 id 排序"""
+    recipe_id = recipe_data['id']
+    targets = [db['asMaterials'].setdefault(mat['id'], []) for mat in recipe_data.get('materials', [])]
+    targets += [db['asProducts'].setdefault(prod['id'], []) for prod in recipe_data.get('products', [])]
+    targets.append(db['byDevice'].setdefault(recipe_data['deviceId'], []))
+
+    for ids in targets:
+        bisect.insort(ids, recipe_id)
+
+
+def unindex_recipe(db: Dict[str, Any], recipe_data: Dict):
+    """从索引中撤回配方，删除变空的索引项"""
+    recipe_id = recipe_data['id']
+    entries = [(db['asMaterials'], mat['id']) for mat in recipe_data.get('materials', [])]
+    entries += [(db['asProducts'], prod['id']) for prod in recipe_data.get('products', [])]
+    entries.append((db['byDevice'], recipe_data['deviceId']))
+
+    for index, item_id in entries:
+        ids = index.get(item_id, [])
+        if recipe_id in ids:
+            ids.remove(recipe_id)
+        if not ids:
+            index.pop(item_id, None)
+
 
+def empty_database() -> Dict[str, Any]:
+    return {'recipes': {}, 'asMaterials': {}, 'asProducts': {}, 'byDevice': {}}
 
-def build_recipe_database(recipes_dict: Dict[str, Dict]) -> Dict[str, Any]:
+
+# ---------------------------------------------------------------------------
+# incremental rebuild
+# ---------------------------------------------------------------------------
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def context_hash(item_lookup: Dict[str, str], device_text_map: Dict[str, str],
+                 real_device_ids: set) -> str:
+    """解析结果依赖的全局数据；变化时缓存的贡献全部失效"""
+    payload = json.dumps([CACHE_VERSION, item_lookup, device_text_map, sorted(real_device_ids)],
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_cache(path: str = CACHE_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        cache = json.load(f)
+    return cache if cache.get('version') == CACHE_VERSION else {}
+
+
+def save_cache(cache: Dict[str, Any], path: str = CACHE_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_database(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def seed_id_map(db: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """没有缓存时，从已有的配方库恢复 recipe_key -> id，保证第一次增量构建不改变 id"""
+    if not db:
+        return {}
+    id_map = {}
+    for recipe_id, recipe in db.get('recipes', {}).items():
+        key = recipe_key(recipe['deviceId'],
+                         [f"{m['id']}:{m['count']}" for m in recipe.get('materials', [])],
+                         [f"{p['id']}:{p['count']}" for p in recipe.get('products', [])])
+        id_map[key] = recipe_id
+    return id_map
+
+
+def update_recipe_database(db: Dict[str, Any], cache: Dict[str, Any],
+                           item_lookup: Dict[str, str], device_text_map: Dict[str, str],
+                           real_device_ids: set) -> Dict[str, int]:
     """
-    Build the final recipe database structure.
+    Bring db up to date with the source files, re-parsing only files whose
+    content hash differs from the cache. db and cache are updated in place.
 
-    Returns: dict with recipes, asMaterials, asProducts, byDevice
+    Returns: stats dict (files/changed/removed/added/updated/deleted)
     """
-    # 重新生成 recipe_id（使用数字序号）
-    recipe_id_map = {}
-    recipes_list = []
+    files = cache.setdefault('files', {})
+    id_map = cache.setdefault('ids', {})
+    taken = check_id_map(id_map)
+
+    paths = source_files()
+    stats = {'files': len(paths), 'changed': 0, 'removed': 0, 'added': 0, 'updated': 0, 'deleted': 0}
+
+    # 1. 找出变化的文件，撤回旧贡献、解析新贡献
+    affected = []
+    affected_set = set()
+
+    def mark(key: str):
+        if key not in affected_set:
+            affected_set.add(key)
+            affected.append(key)
+
+    for path in paths:
+        digest = file_hash(path)
+        entry = files.get(path)
+        if entry and entry['hash'] == digest:
+            continue
+        stats['changed'] += 1
+        for key, _ in (entry or {}).get('recipes', []):
+            mark(key)
+        contributions = parse_source_file(path, item_lookup, device_text_map, real_device_ids)
+        files[path] = {'hash': digest, 'recipes': [[key, data] for key, data in contributions]}
+        for key, _ in contributions:
+            mark(key)
+
+    present = set(paths)
+    for path in [p for p in files if p not in present]:
+        stats['removed'] += 1
+        for key, _ in files.pop(path).get('recipes', []):
+            mark(key)
+
+    if not affected:
+        return stats
+
+    # 2. 只为受影响的配方指纹重新合并所有来源的贡献
+    merged = {}
+    for path in sorted(files, key=source_order):
+        for key, recipe_data in files[path]['recipes']:
+            if key in affected_set:
+                merged[key] = merge_recipe(merged.get(key), recipe_data)
+
+    # 3. 原地更新配方和索引
+    for key in affected:
+        recipe_id = id_map.get(key)
+        old = db['recipes'].get(recipe_id) if recipe_id else None
+        new = merged.get(key)
+
+        if new is None:
+            if old is not None:
+                unindex_recipe(db, old)
+                del db['recipes'][recipe_id]
+                stats['deleted'] += 1
+            continue
 
-    for idx, recipe_data in enumerate(recipes_dict.values()):
-        recipe_id = f"recipe_{idx}"
-        recipe_id_map[id(recipe_data)] = recipe_id
-        recipe_data['id'] = recipe_id
-        recipes_list.append(recipe_data)
+        if recipe_id is None:
+            recipe_id = assign_recipe_id(key, id_map, taken)
 
-    # 按物品索引
-    as_materials = defaultdict(list)
-    as_products = defaultdict(list)
+        new = dict(new, id=recipe_id)
+        if old == new:
+            continue
 
-    for recipe_data in recipes_list:
-        recipe_id = recipe_data['id']
+        if old is not None:
+            unindex_recipe(db, old)
+            stats['updated'] += 1
+        else:
+            stats['added'] += 1
+        db['recipes'][recipe_id] = new
+        index_recipe(db, new)
 
-        # 作为原料的物品
-        for mat in recipe_data.get('materials', []):
-            as_materials[mat['id']].append(recipe_id)
+    # 与完整构建相同的顺序：配方按 id，索引项按其第一个配方 id（相同时按索引键）
+    db['recipes'] = dict(sorted(db['recipes'].items()))
+    for name in ('asMaterials', 'asProducts', 'byDevice'):
+        db[name] = dict(sorted(db[name].items(), key=lambda x: (x[1][0], x[0])))
+    return stats
 
-        # 作为产物的物品
-        for prod in recipe_data.get('products', []):
-            as_products[prod['id']].append(recipe_id)
 
-    # 按设备索引
-    by_device = defaultdict(list)
+def update_cycle_analysis(db: Dict[str, Any]) -> Dict[str, Any]:
+    """重新计算 cycleAnalysis（放在配方库最后）"""
+    db.pop('cycleAnalysis', None)
+    analysis = RecipeGraph(db, load_ignored_devices()).cycle_analysis()
+    db['cycleAnalysis'] = analysis
+    return analysis
 
-    for recipe_data in recipes_list:
-        recipe_id = recipe_data['id']
-        by_device[recipe_data['deviceId']].append(recipe_id)
 
-    # 转换为普通 dict
-    return {
-        'recipes': {r['id']: r for r in recipes_list},
-        'asMaterials': dict(as_materials),
-        'asProducts': dict(as_products),
-        'byDevice': dict(by_device)
-    }
+def update_database_hash(db: Dict[str, Any]) -> str:
+    """重新计算 databaseHash（放在配方库最后，其余内容都更新之后调用）"""
+    db.pop('databaseHash', None)
+    db['databaseHash'] = database_hash(db)
+    return db['databaseHash']
 
 
 def save_recipe_database(db: Dict[str, Any], output_path: str):
@@ -366,6 +622,8 @@ def verify_recipe_database(db: Dict[str, Any]) -> bool:
 
 
 def main():
+    full = '--full' in sys.argv
+
     print("开始提取配方库...")
     print("="*60)
 
@@ -377,24 +635,47 @@ def main():
     device_text_map = load_device_text_map()
     print(f"      加载了 {len(device_text_map)} 个文本设备映射")
 
-    print("\n[3/5] 解析合成表格...")
-    recipes = parse_synthesis_tables('synthesis_tables', item_lookup, device_text_map)
-    print(f"      从合成表格提取了 {len(recipes)} 个配方")
-
-    print("\n[4/5] 加载设备ID列表...")
+    print("\n[3/5] 加载设备ID列表...")
     real_device_ids = load_real_device_ids()
     print(f"      真实设备数: {len(real_device_ids)}")
 
-    print("\n[4/6] 解析设备生产表格...")
-    recipes = parse_device_production_tables('device_production_tables', item_lookup,
-                                            device_text_map, recipes, real_device_ids)
-    print(f"      合并后总配方数: {len(recipes)}")
+    print("\n[4/5] 加载缓存...")
+    db = load_database('recipe_database.json')
+    cache = load_cache()
+    context = context_hash(item_lookup, device_text_map, real_device_ids)
+
+    # 已分配的 id：优先用缓存中的映射，其次从现有配方库恢复
+    ids, migration = migrate_id_map(cache.get('ids') or seed_id_map(db))
+    if migration:
+        save_migration(migration)
+        print(f"      迁移了 {len(migration)} 个旧 recipe id → {MIGRATION_PATH}")
+        replaced = migrate_custom_recipes(migration)
+        if replaced:
+            print(f"      更新了自定义配方中的 {replaced} 个 id: {CUSTOM_RECIPES_PATH}")
+
+    if full or migration or not db or not cache or cache.get('context') != context:
+        reason = ('--full' if full else 'recipe id 迁移' if migration else '没有配方库' if not db else
+                  '没有缓存' if not cache else '物品名称/设备映射有变化')
+        print(f"      完整重建 ({reason})")
+        cache = {'version': CACHE_VERSION, 'context': context, 'files': {}, 'ids': ids}
+        db = empty_database()
+    else:
+        print(f"      增量更新 (缓存 {len(cache.get('files', {}))} 个文件)")
+
+    print("\n[5/5] 更新配方数据库...")
+    stats = update_recipe_database(db, cache, item_lookup, device_text_map, real_device_ids)
+    print(f"      来源文件: {stats['files']}，变化: {stats['changed']}，删除: {stats['removed']}")
+    print(f"      配方新增: {stats['added']}，更新: {stats['updated']}，删除: {stats['deleted']}")
+    print(f"      总配方数: {len(db['recipes'])}")
 
-    print("\n[6/6] 构建配方数据库...")
-    db = build_recipe_database(recipes)
+    analysis = update_cycle_analysis(db)
+    print(f"      强连通分量: {len(analysis['components'])}，循环: {len(analysis['cyclic'])}，"
+          f"死锁循环: {len(analysis['cycleGroups'])}（忽略设备 {len(analysis['ignoredDevices'])} 个）")
+    print(f"      内容哈希: {update_database_hash(db)}")
 
     print("\n保存配方数据库...")
     save_recipe_database(db, 'recipe_database.json')
+    save_cache(cache)
     print("✓ 已保存到 recipe_database.json")
 
     web_output_path = os.path.join('..', 'web', 'public', 'data', 'recipe_database.json')
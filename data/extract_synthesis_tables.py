@@ -2,102 +2,14 @@
 import json
 import os
 import sys
+import time
 
-
-def extract_cell_content(inline_elements):
-    result = []
-    
-    for elem in inline_elements:
-        if elem.get('kind') == 'text' and 'text' in elem:
-            text_content = elem['text'].get('text', '')
-            if text_content:
-                result.append({'type': 'text', 'text': text_content})
-        
-        elif elem.get('kind') == 'entry' and 'entry' in elem:
-            entry = elem['entry']
-            result.append({
-                'type': 'entry',
-                'id': entry.get('id', ''),
-                'count': entry.get('count', '0')
-            })
-    
-    return result
+from detail_parser import parse_document, build_synthesis_tables
 
 
 def extract_synthesis_table(item_data):
-    document = item_data.get('document', {})
-    document_map = document.get('documentMap', {})
-    
-    tables = []
-    
-    for doc_id, doc in document_map.items():
-        if 'blockMap' not in doc:
-            continue
-        
-        block_map = doc['blockMap']
-        
-        has_synthesis_device = False
-        for block_id, block in block_map.items():
-            if block.get('kind') == 'text' and 'text' in block:
-                inline_elements = block['text'].get('inlineElements', [])
-                for elem in inline_elements:
-                    if elem.get('kind') == 'text' and 'text' in elem:
-                        if '合成设备' in elem['text'].get('text', ''):
-                            has_synthesis_device = True
-                            break
-            if has_synthesis_device:
-                break
-        
-        if not has_synthesis_device:
-            continue
-        
-        table_blocks = []
-        for block_id, block in block_map.items():
-            if block.get('kind') == 'table':
-                table_blocks.append(block)
-        
-        if not table_blocks:
-            continue
-        
-        for table_block in table_blocks:
-            if 'table' not in table_block:
-                continue
-            
-            table_data = table_block['table']
-            row_ids = table_data.get('rowIds', [])
-            column_ids = table_data.get('columnIds', [])
-            
-            table_result = {
-                'rows': len(row_ids),
-                'columns': len(column_ids),
-                'headers': [],
-                'data': []
-            }
-            
-            for row_idx, row_id in enumerate(row_ids):
-                row_data = []
-                
-                for col_idx, col_id in enumerate(column_ids):
-                    cell_parent_id = f"{row_id}_{col_id}"
-                    
-                    cell_content = []
-                    for block_id, block in block_map.items():
-                        if block.get('parentId') == cell_parent_id:
-                            if 'text' in block:
-                                inline_elements = block['text'].get('inlineElements', [])
-                                cell_content = extract_cell_content(inline_elements)
-                            break
-                    
-                    row_data.append(cell_content)
-                
-                if row_idx == 0:
-                    table_result['headers'] = row_data
-                else:
-                    table_result['data'].append(row_data)
-            
-            tables.append(table_result)
-    
-    return tables
+    sections = parse_document(item_data.get('document', {}))
+    return build_synthesis_tables(sections)
 
 
 def process_item_file(input_file, output_file):
@@ -169,8 +81,33 @@ def process_all_items(input_dir='data/item_details', output_dir='data/synthesis_
     print(f"- 保存至: {output_dir}/")
 
 
+def benchmark(input_dir='data/item_details', rounds=5):
+    """对整个 item_details 语料计时 extract_synthesis_table（不含文件读写）"""
+    items = []
+    for filename in sorted(os.listdir(input_dir)):
+        if not filename.endswith('.json'):
+            continue
+        with open(os.path.join(input_dir, filename), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('code') == 0:
+            items.append(data.get('data', {}).get('item', {}))
+    
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            extract_synthesis_table(item)
+        timings.append(time.perf_counter() - start)
+    
+    print(f"文件数: {len(items)}, 轮数: {rounds}")
+    print(f"- 最快: {min(timings) * 1000:.2f} ms")
+    print(f"- 平均: {sum(timings) / len(timings) * 1000:.2f} ms")
+
+
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
+    if '--benchmark' in sys.argv:
+        benchmark()
+    elif len(sys.argv) > 1:
         input_file = sys.argv[1]
         output_file = sys.argv[2] if len(sys.argv) > 2 else input_file.replace('.json', '_table.json')
         
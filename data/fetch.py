@@ -1,6 +1,7 @@
+import argparse
 import json
 import os
-from playwright.sync_api import sync_playwright
+import sys
 
 
 def save_json(data, filepath: str):
@@ -13,57 +14,87 @@ def save_json(data, filepath: str):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def fetch_catalog(type_sub_id: int) -> list:
-    """获取指定类型的物品目录"""
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        try:
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                viewport={'width': 1920, 'height': 1080}
-            )
-            page = context.new_page()
-            
-            catalog_data = []
-            
-            def handle_response(response):
-                # 拦截catalog API响应
-                if 'wiki/item/catalog' in response.url and 'typeMainId=1' in response.url:
-                    try:
-                        json_data = response.json()
-                        if json_data.get('code') == 0 and 'data' in json_data:
-                            # 提取catalog数据
-                            catalog = json_data['data'].get('catalog', [])
-                            for main_type in catalog:
-                                for sub_type in main_type.get('typeSub', []):
-                                    # 只提取匹配的typeSubId
-                                    if sub_type.get('id') == str(type_sub_id):
-                                        for item in sub_type.get('items', []):
-                                            catalog_data.append({
-                                                'itemId': item.get('itemId', ''),
-                                                'name': item.get('name', ''),
-                                                'image': item.get('brief', {}).get('cover', '')
-                                            })
-                    except Exception as e:
-                        pass
-            
-            page.on('response', handle_response)
-            
-            # 访问页面触发API调用
-            page.goto('https://wiki.skland.com/', wait_until='networkidle', timeout=30000)
-            
-            return catalog_data
-        finally:
-            browser.close()
+# 可通过 --wiki-url 指向本地回放服务器 (fetch_replay.py serve)
+WIKI_URL = 'https://wiki.skland.com'
+
+# 已有下游脚本依赖的文件名；其他子类型保存为 type{id}_items.json
+SUBTYPE_FILES = {
+    '5': 'type5_devices.json',
+    '6': 'type6_items.json',
+}
+
+
+def subtype_filename(sub_type_id: str) -> str:
+    return SUBTYPE_FILES.get(sub_type_id, f'type{sub_type_id}_items.json')
+
+
+def split_catalog(json_data: dict) -> dict:
+    """把一次catalog响应拆分为所有子类型: {typeSubId: {'name': ..., 'items': [...]}}"""
+    subtypes = {}
+    catalog = json_data.get('data', {}).get('catalog', [])
+    for main_type in catalog:
+        for sub_type in main_type.get('typeSub', []):
+            sub_type_id = str(sub_type.get('id', ''))
+            entry = subtypes.setdefault(sub_type_id, {'name': sub_type.get('name', ''), 'items': []})
+            for item in sub_type.get('items', []):
+                entry['items'].append({
+                    'itemId': item.get('itemId', ''),
+                    'name': item.get('name', ''),
+                    'image': item.get('brief', {}).get('cover', '')
+                })
+    return subtypes
+
+
+def fetch_catalog_response(page, wiki_url: str = WIKI_URL) -> dict:
+    """访问一次首页，捕获 /wiki/item/catalog 的原始响应"""
+    captured = {}
+
+    def handle_catalog_response(response):
+        if 'wiki/item/catalog' in response.url and 'typeMainId=1' in response.url:
+            try:
+                json_data = response.json()
+                if json_data.get('code') == 0 and 'data' in json_data:
+                    captured['catalog'] = json_data
+            except Exception:
+                pass
+
+    page.on('response', handle_catalog_response)
+    page.goto(f'{wiki_url}/', wait_until='networkidle', timeout=30000)
+    page.remove_listener('response', handle_catalog_response)
+
+    return captured.get('catalog', {})
+
+
+def save_subtypes(subtypes: dict, output_dir: str = 'data'):
+    for sub_type_id, entry in sorted(subtypes.items(), key=lambda x: x[0]):
+        filepath = os.path.join(output_dir, subtype_filename(sub_type_id))
+        save_json(entry['items'], filepath)
+        print(f"- 子类型 {sub_type_id} ({entry['name']}): {len(entry['items'])} 个 → {filepath}")
+
+
+def load_raw_catalog(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 
 def main():
     """主函数：执行完整的数据收集流程"""
-    import time
-    
+    parser = argparse.ArgumentParser(description='获取物品目录（一次页面加载获取所有子类型）')
+    parser.add_argument('--raw', metavar='PATH',
+                        help='同时把原始catalog响应保存到该文件，便于离线重新处理')
+    parser.add_argument('--from-raw', metavar='PATH',
+                        help='不访问网站，直接从保存的原始catalog响应重新生成各子类型文件')
+    parser.add_argument('--wiki-url', default=WIKI_URL, help=f'wiki首页地址 (默认 {WIKI_URL})')
+    args = parser.parse_args()
+
+    if args.from_raw:
+        print(f"从原始catalog重新处理: {args.from_raw}")
+        subtypes = split_catalog(load_raw_catalog(args.from_raw))
+        save_subtypes(subtypes)
+        return
+
+    from playwright.sync_api import sync_playwright
+
     with sync_playwright() as p:
         browser = p.chromium.launch(
             headless=True,
@@ -77,63 +108,24 @@ def main():
         try:
             page = context.new_page()
             
-            # 1. 获取设备目录 (typeSubId=5)
-            print("正在获取设备目录 (typeSubId=5)...")
-            devices = []
-            
-            def handle_catalog_response(response):
-                if 'wiki/item/catalog' in response.url and 'typeMainId=1' in response.url:
-                    try:
-                        json_data = response.json()
-                        if json_data.get('code') == 0 and 'data' in json_data:
-                            catalog = json_data['data'].get('catalog', [])
-                            for main_type in catalog:
-                                for sub_type in main_type.get('typeSub', []):
-                                    if sub_type.get('id') == '5':
-                                        for item in sub_type.get('items', []):
-                                            devices.append({
-                                                'itemId': item.get('itemId', ''),
-                                                'name': item.get('name', ''),
-                                                'image': item.get('brief', {}).get('cover', '')
-                                            })
-                    except:
-                        pass
-            
-            page.on('response', handle_catalog_response)
-            page.goto('https://wiki.skland.com/', wait_until='networkidle', timeout=30000)
-            page.remove_listener('response', handle_catalog_response)
-            
-            save_json(devices, 'data/type5_devices.json')
-            print(f"已提取 {len(devices)} 个设备")
+            # 1. 一次页面加载获取完整目录（包含所有子类型）
+            print("正在获取物品目录...")
+            raw_catalog = fetch_catalog_response(page, args.wiki_url.rstrip('/'))
             
-            # 2. 获取物品目录 (typeSubId=6)
-            print("正在获取物品目录 (typeSubId=6)...")
-            items = []
+            if not raw_catalog:
+                print("错误: 未捕获到 /wiki/item/catalog 响应")
+                sys.exit(1)
             
-            def handle_items_response(response):
-                if 'wiki/item/catalog' in response.url and 'typeMainId=1' in response.url:
-                    try:
-                        json_data = response.json()
-                        if json_data.get('code') == 0 and 'data' in json_data:
-                            catalog = json_data['data'].get('catalog', [])
-                            for main_type in catalog:
-                                for sub_type in main_type.get('typeSub', []):
-                                    if sub_type.get('id') == '6':
-                                        for item in sub_type.get('items', []):
-                                            items.append({
-                                                'itemId': item.get('itemId', ''),
-                                                'name': item.get('name', ''),
-                                                'image': item.get('brief', {}).get('cover', '')
-                                            })
-                    except:
-                        pass
+            if args.raw:
+                save_json(raw_catalog, args.raw)
+                print(f"原始catalog已保存至 {args.raw}")
             
-            page.on('response', handle_items_response)
-            page.goto('https://wiki.skland.com/', wait_until='networkidle', timeout=30000)
-            page.remove_listener('response', handle_items_response)
+            # 2. 拆分并保存所有子类型
+            subtypes = split_catalog(raw_catalog)
+            save_subtypes(subtypes)
             
-            save_json(items, 'data/type6_items.json')
-            print(f"已提取 {len(items)} 个物品")
+            devices = subtypes.get('5', {}).get('items', [])
+            items = subtypes.get('6', {}).get('items', [])
             
             # 3. 获取所有物品的详细信息
             output_dir = 'data/item_details'
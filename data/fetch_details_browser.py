@@ -1,143 +1,360 @@
 #!/usr/bin/env python3
+import argparse
+import asyncio
 import json
 import os
+import statistics
 import time
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
+
+from detail_manifest import (
+    MANIFEST_FILE, CHANGED_FILE, load_manifest, save_manifest, record_detail,
+    seed_manifest, select_stale, save_changed
+)
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 5.0
+DEFAULT_TTL_HOURS = 24 * 7
+
+# 可通过 --wiki-url/--api-url 指向本地回放服务器 (fetch_replay.py serve)
+WIKI_URL = 'https://wiki.skland.com'
+API_URL = 'https://zonai.skland.com/web/v1'
+SIGNING_HEADERS = ('timestamp', 'sign', 'did', 'platform', 'vname')
+
+
+def load_catalog() -> dict:
+    """itemId -> catalog entry (设备在前，物品在后)"""
+    catalog = {}
+
+    for path in ('data/type5_devices.json', 'data/type6_items.json'):
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for entry in json.load(f):
+                    catalog[entry['itemId']] = entry
+
+    return catalog
 
 
 def load_item_ids() -> list:
-    all_item_ids = []
-    
-    if os.path.exists('data/type5_devices.json'):
-        with open('data/type5_devices.json', 'r', encoding='utf-8') as f:
-            devices = json.load(f)
-            all_item_ids.extend([d['itemId'] for d in devices])
-    
-    if os.path.exists('data/type6_items.json'):
-        with open('data/type6_items.json', 'r', encoding='utf-8') as f:
-            items = json.load(f)
-            all_item_ids.extend([i['itemId'] for i in items])
-    
-    return all_item_ids
-
-
-def fetch_item_detail_via_page(page, item_id: str, output_dir: str, verbose: bool = False) -> bool:
+    return list(load_catalog())
+
+
+class RateLimiter:
+    """全局请求速率限制：所有 worker 共享，每秒最多发起 rate 个请求"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+                now = self._next_slot
+            self._next_slot = now + self.interval
+
+
+class SigningContext:
+    """从浏览器发出的 /wiki/item/info 请求中捕获的签名头，供直接API请求复用"""
+
+    def __init__(self):
+        self.headers = {}
+
+    def update_from_request(self, request_headers: dict):
+        headers = {k: v for k, v in request_headers.items() if k.lower() in SIGNING_HEADERS}
+        if headers:
+            self.headers = headers
+
+
+def save_detail(data: dict, output_file: str):
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+async def fetch_item_detail_direct(context, item_id: str, output_dir: str,
+                                   signing: SigningContext, verbose: bool = False,
+                                   wiki_url: str = WIKI_URL, api_url: str = API_URL) -> bool:
+    """直接请求 /wiki/item/info（共享浏览器 cookies 和已捕获的签名头），不渲染页面。
+
+    返回 False 表示签名被拒绝或请求失败，调用方应回退到页面导航。
+    """
+    output_file = os.path.join(output_dir, f"{item_id}.json")
+    url = f"{api_url}/wiki/item/info?id={item_id}"
+
+    try:
+        response = await context.request.get(url, headers={
+            **signing.headers,
+            'Origin': wiki_url,
+            'Referer': f'{wiki_url}/'
+        }, timeout=30000)
+
+        if not response.ok:
+            if verbose:
+                print(f"  ✗ Direct HTTP {response.status}: {item_id}")
+            return False
+
+        data = await response.json()
+        if data.get('code') != 0:
+            if verbose:
+                print(f"  ✗ Direct API rejected: code={data.get('code')}, message={data.get('message')}")
+            return False
+
+        save_detail(data, output_file)
+        return True
+
+    except Exception as e:
+        if verbose:
+            print(f"  ✗ Direct exception: {str(e)}")
+        return False
+
+
+async def fetch_item_detail_via_page(page, item_id: str, output_dir: str, verbose: bool = False,
+                                     signing: SigningContext = None, overwrite: bool = False,
+                                     wiki_url: str = WIKI_URL) -> bool:
     output_file = os.path.join(output_dir, f"{item_id}.json")
-    
-    if os.path.exists(output_file):
+
+    if os.path.exists(output_file) and not overwrite:
         return False
-    
-    url = f"https://wiki.skland.com/endfield/detail?mainTypeId=1&subTypeId=6&gameEntryId={item_id}"
-    
+
+    url = f"{wiki_url}/endfield/detail?mainTypeId=1&subTypeId=6&gameEntryId={item_id}"
+
     try:
         if verbose:
             print(f"  Navigating to: {url}")
-        
-        with page.expect_response(
+
+        async with page.expect_response(
             lambda r: '/wiki/item/info' in r.url and r.status == 200,
             timeout=30000
         ) as response_info:
-            page.goto(url, wait_until='domcontentloaded', timeout=30000)
-        
-        response = response_info.value
-        data = response.json()
-        
+            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+
+        response = await response_info.value
+        data = await response.json()
+
+        if signing is not None:
+            signing.update_from_request(await response.request.all_headers())
+
         if data.get('code') == 0:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            save_detail(data, output_file)
             return True
         else:
             if verbose:
                 print(f"  ✗ API error: code={data.get('code')}, message={data.get('message')}")
             return False
-            
+
     except Exception as e:
         if verbose:
             print(f"  ✗ Exception: {str(e)}")
         return False
 
 
-def main():
-    import sys
-    
-    print("正在加载物品列表...")
-    item_ids = load_item_ids()
-    
-    if not item_ids:
-        print("错误: 未找到物品列表文件")
-        print("请先运行: python3 data/fetch.py")
+def print_latency_stats(latencies: dict):
+    """打印每个物品的耗时统计（秒）"""
+    if not latencies:
         return
-    
-    test_limit = None
-    verbose = False
-    if len(sys.argv) > 1:
-        if '--test' in sys.argv:
-            test_limit = 3
-            item_ids = item_ids[:test_limit]
-            print(f"测试模式: 只获取前 {test_limit} 个物品\n")
-        if '--verbose' in sys.argv or '-v' in sys.argv:
-            verbose = True
-            print(f"详细模式: 显示调试信息\n")
-    
+
+    values = sorted(latencies.values())
+
+    def percentile(p: float) -> float:
+        return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+    slowest = sorted(latencies.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    print(f"\n耗时统计 ({len(values)} 个请求):")
+    print(f"- 平均: {statistics.mean(values):.2f}s")
+    print(f"- P50: {percentile(0.5):.2f}s  P90: {percentile(0.9):.2f}s  P99: {percentile(0.99):.2f}s")
+    print(f"- 最快: {values[0]:.2f}s  最慢: {values[-1]:.2f}s")
+    print(f"- 最慢的物品: {', '.join(f'{item_id}({t:.2f}s)' for item_id, t in slowest)}")
+
+
+async def fetch_all(item_ids: list, output_dir: str, workers: int, rate: float, verbose: bool,
+                    direct: bool = False, refresh: set = None,
+                    manifest: dict = None, catalog: dict = None,
+                    wiki_url: str = WIKI_URL, api_url: str = API_URL) -> dict:
+    """refresh: 需要覆盖重新获取的物品（其余已存在的文件跳过）；manifest 会就地更新"""
     total = len(item_ids)
-    print(f"找到 {total} 个物品\n")
-    
-    output_dir = 'data/item_details'
-    os.makedirs(output_dir, exist_ok=True)
-    
-    success_count = 0
-    skip_count = 0
-    fail_count = 0
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
+    refresh = refresh or set()
+    manifest = manifest if manifest is not None else {}
+    catalog = catalog or {}
+    stats = {'success': 0, 'skip': 0, 'fail': 0, 'direct': 0, 'navigate': 0, 'changed': []}
+    latencies = {}
+
+    queue = asyncio.Queue()
+    for idx, item_id in enumerate(item_ids, 1):
+        queue.put_nowait((idx, item_id))
+
+    limiter = RateLimiter(rate)
+    stop = asyncio.Event()
+    signing = SigningContext()
+
+    async def fetch_one(page, item_id: str) -> bool:
+        # 直连模式：签名头就绪后直接请求API，被拒绝时回退到页面导航（同时刷新签名头）
+        if direct and signing.headers:
+            if await fetch_item_detail_direct(page.context, item_id, output_dir, signing, verbose,
+                                              wiki_url, api_url):
+                stats['direct'] += 1
+                return True
+            await limiter.wait()
+
+        result = await fetch_item_detail_via_page(page, item_id, output_dir, verbose, signing,
+                                                  overwrite=item_id in refresh, wiki_url=wiki_url)
+        if result:
+            stats['navigate'] += 1
+        return result
+
+    async def worker(page):
+        while not stop.is_set():
+            try:
+                idx, item_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            output_file = os.path.join(output_dir, f"{item_id}.json")
+
+            if os.path.exists(output_file) and item_id not in refresh:
+                stats['skip'] += 1
+                print(f"[{idx}/{total}] {item_id} ⊘ (已存在)")
+                continue
+
+            await limiter.wait()
+            start = time.monotonic()
+            result = await fetch_one(page, item_id)
+            latencies[item_id] = time.monotonic() - start
+
+            if result:
+                stats['success'] += 1
+                changed = record_detail(manifest, item_id, output_file, catalog.get(item_id))
+                if changed:
+                    stats['changed'].append(item_id)
+                mark = '' if changed else ', 无变化'
+                print(f"[{idx}/{total}] {item_id} ✓ ({latencies[item_id]:.2f}s{mark})")
+            else:
+                stats['fail'] += 1
+                print(f"[{idx}/{total}] {item_id} ✗")
+
+                if stats['fail'] >= 3 and stats['success'] == 0 and not stop.is_set():
+                    stop.set()
+                    print("\n连续3次失败，停止执行")
+                    print("建议：检查网络连接或使用 --verbose 查看详细错误")
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(
             headless=True,
             args=['--disable-blink-features=AutomationControlled']
         )
-        context = browser.new_context(
+        context = await browser.new_context(
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             viewport={'width': 1920, 'height': 1080}
         )
-        
+
         try:
-            page = context.new_page()
-            
-            print(f"开始批量获取...\n")
-            
-            for idx, item_id in enumerate(item_ids, 1):
-                output_file = os.path.join(output_dir, f"{item_id}.json")
-                
-                if os.path.exists(output_file):
-                    skip_count += 1
-                    print(f"[{idx}/{total}] {item_id} ⊘ (已存在)")
-                    continue
-                
-                result = fetch_item_detail_via_page(page, item_id, output_dir, verbose)
-                
-                if result:
-                    success_count += 1
-                    print(f"[{idx}/{total}] {item_id} ✓")
-                else:
-                    fail_count += 1
-                    print(f"[{idx}/{total}] {item_id} ✗")
-                    
-                    if fail_count >= 3 and success_count == 0:
-                        print("\n连续3次失败，停止执行")
-                        print("建议：检查网络连接或使用 --verbose 查看详细错误")
-                        break
-                
-                time.sleep(0.2)
-            
-            page.close()
-            
-            print(f"\n完成！")
-            print(f"- 成功: {success_count} 个")
-            print(f"- 跳过: {skip_count} 个")
-            print(f"- 失败: {fail_count} 个")
-            print(f"- 保存至: {output_dir}/")
-        
+            pages = [await context.new_page() for _ in range(max(1, workers))]
+
+            mode = '直连API' if direct else '页面导航'
+            print(f"开始批量获取 ({mode}, {len(pages)} 个并发页面, 限速 {rate:g} 请求/秒)...\n")
+
+            await asyncio.gather(*(worker(page) for page in pages))
+
+            for page in pages:
+                await page.close()
+
         finally:
-            browser.close()
+            await browser.close()
+
+    stats['latencies'] = latencies
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='通过浏览器批量获取物品详情')
+    parser.add_argument('--test', action='store_true', help='测试模式: 只获取前3个物品')
+    parser.add_argument('--verbose', '-v', action='store_true', help='显示调试信息')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'并发页面数 (默认 {DEFAULT_WORKERS})')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'全局限速，每秒最多请求数，0 表示不限速 (默认 {DEFAULT_RATE:g})')
+    parser.add_argument('--direct', action='store_true',
+                        help='直连模式: 首次导航捕获签名后直接请求 /wiki/item/info，被拒绝时回退到页面导航')
+    parser.add_argument('--refresh', action='store_true',
+                        help='增量刷新: 重新获取超过 --ttl 或目录条目有变化的物品，并报告内容变化')
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL_HOURS,
+                        help=f'增量刷新的过期时间（小时，默认 {DEFAULT_TTL_HOURS}）')
+    parser.add_argument('--wiki-url', default=WIKI_URL, help=f'wiki页面地址 (默认 {WIKI_URL})')
+    parser.add_argument('--api-url', default=API_URL, help=f'API地址 (默认 {API_URL})')
+    args = parser.parse_args()
+
+    print("正在加载物品列表...")
+    catalog = load_catalog()
+    item_ids = list(catalog)
+
+    if not item_ids:
+        print("错误: 未找到物品列表文件")
+        print("请先运行: python3 data/fetch.py")
+        return
+
+    if args.test:
+        test_limit = 3
+        item_ids = item_ids[:test_limit]
+        print(f"测试模式: 只获取前 {test_limit} 个物品\n")
+    if args.verbose:
+        print(f"详细模式: 显示调试信息\n")
+
+    total = len(item_ids)
+    print(f"找到 {total} 个物品\n")
+
+    output_dir = 'data/item_details'
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest_path = os.path.join('data', MANIFEST_FILE)
+    changed_path = os.path.join('data', CHANGED_FILE)
+    manifest = load_manifest(manifest_path)
+    seeded = seed_manifest(manifest, catalog, output_dir)
+    if seeded:
+        print(f"清单: 为 {seeded} 个已有文件补充记录\n")
+
+    refresh = set()
+    if args.refresh:
+        stale = select_stale({i: catalog[i] for i in item_ids}, manifest, output_dir, args.ttl * 3600)
+        refresh = set(stale)
+        item_ids = [i for i in item_ids if i in refresh]
+        reasons = {}
+        for reason in stale.values():
+            reasons[reason] = reasons.get(reason, 0) + 1
+        print(f"增量刷新: {len(item_ids)} 个物品需要重新获取 "
+              f"(缺失 {reasons.get('missing', 0)}, 目录变化 {reasons.get('catalog', 0)}, "
+              f"超过{args.ttl:g}小时 {reasons.get('ttl', 0)})\n")
+
+    started = time.monotonic()
+    try:
+        stats = asyncio.run(fetch_all(item_ids, output_dir, args.workers, args.rate, args.verbose,
+                                      direct=args.direct, refresh=refresh,
+                                      manifest=manifest, catalog=catalog,
+                                      wiki_url=args.wiki_url.rstrip('/'),
+                                      api_url=args.api_url.rstrip('/')))
+    finally:
+        save_manifest(manifest, manifest_path)
+    elapsed = time.monotonic() - started
+
+    print(f"\n完成！(总耗时 {elapsed:.1f}s)")
+    print(f"- 成功: {stats['success']} 个")
+    print(f"- 跳过: {stats['skip']} 个")
+    print(f"- 失败: {stats['fail']} 个")
+    if args.direct:
+        print(f"  (直连API: {stats['direct']} 个, 页面导航: {stats['navigate']} 个)")
+    print(f"- 保存至: {output_dir}/")
+
+    changed = stats['changed']
+    save_changed(changed, changed_path)
+    print(f"\n内容有变化: {len(changed)} 个 (列表已保存至 {changed_path})")
+    if changed:
+        print(f"  {', '.join(changed[:20])}{' ...' if len(changed) > 20 else ''}")
+
+    print_latency_stats(stats['latencies'])
 
 
 if __name__ == '__main__':
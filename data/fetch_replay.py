@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Offline record/replay for the fetch layer.
+
+record: pack captured responses into an archive directory
+    <archive>/catalog.json        raw /wiki/item/catalog response (fetch.py --raw)
+    <archive>/info/{itemId}.json  /wiki/item/info responses (item_details files)
+
+serve: run a local stand-in for wiki.skland.com + zonai.skland.com that
+replays the archive, with configurable latency and error injection:
+    GET /                              page that fetches the catalog API
+    GET /endfield/detail?gameEntryId=  page that fetches the info API
+    GET /web/v1/wiki/item/catalog      archived catalog
+    GET /web/v1/wiki/item/info?id=     archived info
+
+Usage (from repo root):
+    python3 data/fetch.py --raw data/catalog_raw.json
+    python3 data/fetch_replay.py record --catalog data/catalog_raw.json --details data/item_details
+    python3 data/fetch_replay.py serve --latency 200 --jitter 100 --error-rate 0.05 --reject-rate 0.05
+    python3 data/fetch_details_browser.py --wiki-url http://127.0.0.1:8765 --api-url http://127.0.0.1:8765/web/v1
+"""
+
+import argparse
+import html
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+DEFAULT_ARCHIVE = 'data/replay_archive'
+DEFAULT_PORT = 8765
+
+# 签名被拒绝时API返回的错误（与 fetch_all_details.sh 中的认证错误码一致）
+REJECT_RESPONSE = {'code': 10001, 'message': '签名校验失败', 'timestamp': '0', 'data': {}}
+
+INDEX_PAGE = """<!doctype html>
+<html><body><p>replay</p>
+<script>fetch('/web/v1/wiki/item/catalog?typeMainId=1&typeSubId=5');</script>
+</body></html>"""
+
+DETAIL_PAGE = """<!doctype html>
+<html><body><p>replay {item_html}</p>
+<script>fetch('/web/v1/wiki/item/info?id=' + encodeURIComponent({item_js}));</script>
+</body></html>"""
+
+
+# ---------------------------------------------------------------------------
+# record
+# ---------------------------------------------------------------------------
+
+def record_archive(archive_dir: str, catalog_path: str = None, details_dir: str = None) -> dict:
+    """Copy a raw catalog response and detail responses into archive_dir."""
+    counts = {'catalog': 0, 'info': 0}
+    info_dir = os.path.join(archive_dir, 'info')
+    os.makedirs(info_dir, exist_ok=True)
+
+    if catalog_path and os.path.exists(catalog_path):
+        shutil.copyfile(catalog_path, os.path.join(archive_dir, 'catalog.json'))
+        counts['catalog'] = 1
+
+    if details_dir and os.path.exists(details_dir):
+        for filename in os.listdir(details_dir):
+            if filename.endswith('.json'):
+                shutil.copyfile(os.path.join(details_dir, filename), os.path.join(info_dir, filename))
+                counts['info'] += 1
+
+    return counts
+
+
+def load_archive(archive_dir: str) -> dict:
+    """Load the archive into memory: {'catalog': bytes|None, 'info': {itemId: bytes}}"""
+    archive = {'catalog': None, 'info': {}}
+
+    catalog_path = os.path.join(archive_dir, 'catalog.json')
+    if os.path.exists(catalog_path):
+        with open(catalog_path, 'rb') as f:
+            archive['catalog'] = f.read()
+
+    info_dir = os.path.join(archive_dir, 'info')
+    if os.path.exists(info_dir):
+        for filename in os.listdir(info_dir):
+            if filename.endswith('.json'):
+                with open(os.path.join(info_dir, filename), 'rb') as f:
+                    archive['info'][filename[:-len('.json')]] = f.read()
+
+    return archive
+
+
+# ---------------------------------------------------------------------------
+# serve
+# ---------------------------------------------------------------------------
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, archive: dict, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, reject_rate: float = 0.0, seed: int = None):
+        super().__init__(address, ReplayHandler)
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reject_rate = reject_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'catalog': 0, 'info': 0, 'pages': 0,
+                      'errors': 0, 'rejects': 0, 'missing': 0}
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def draw(self) -> tuple:
+        """(延迟秒数, 注入结果)；注入结果为 'error'、'reject' 或 None"""
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            roll = self.random.random()
+        if roll < self.error_rate:
+            return delay, 'error'
+        if roll < self.error_rate + self.reject_rate:
+            return delay, 'reject'
+        return delay, None
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_api(self, body: bytes):
+        delay, injected = self.server.draw()
+        if delay:
+            time.sleep(delay)
+
+        if injected == 'error':
+            self.server.count('errors')
+            self.send_body(500, b'{"code":500,"message":"injected error"}', 'application/json')
+        elif injected == 'reject':
+            self.server.count('rejects')
+            self.send_body(200, json.dumps(REJECT_RESPONSE, ensure_ascii=False).encode('utf-8'),
+                           'application/json')
+        else:
+            self.send_body(200, body, 'application/json')
+
+    def do_GET(self):
+        self.server.count('requests')
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+
+        if parsed.path.endswith('/wiki/item/catalog'):
+            self.server.count('catalog')
+            if self.server.archive['catalog'] is None:
+                self.server.count('missing')
+                self.send_body(404, b'{"code":404,"message":"not recorded"}', 'application/json')
+                return
+            self.send_api(self.server.archive['catalog'])
+
+        elif parsed.path.endswith('/wiki/item/info'):
+            self.server.count('info')
+            item_id = query.get('id', [''])[0]
+            body = self.server.archive['info'].get(item_id)
+            if body is None:
+                self.server.count('missing')
+                self.send_body(404, b'{"code":404,"message":"not recorded"}', 'application/json')
+                return
+            self.send_api(body)
+
+        elif parsed.path.startswith('/endfield/detail'):
+            self.server.count('pages')
+            item_id = query.get('gameEntryId', [''])[0]
+            # 查询参数原样来自请求：HTML 中转义，脚本中作为 JSON 字符串（再转义 < 防止提前闭合 script）
+            page = DETAIL_PAGE.format(item_html=html.escape(item_id),
+                                      item_js=json.dumps(item_id).replace('<', '\\u003c'))
+            self.send_body(200, page.encode('utf-8'), 'text/html; charset=utf-8')
+
+        elif parsed.path == '/':
+            self.server.count('pages')
+            self.send_body(200, INDEX_PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+
+        else:
+            self.send_body(404, b'', 'text/plain')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='fetch 层的离线录制/回放')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help='把已捕获的响应打包为回放存档')
+    record.add_argument('--archive', default=DEFAULT_ARCHIVE, help=f'存档目录 (默认 {DEFAULT_ARCHIVE})')
+    record.add_argument('--catalog', help='原始catalog响应 (fetch.py --raw 的输出)')
+    record.add_argument('--details', default='data/item_details', help='/wiki/item/info 响应目录')
+
+    serve = subparsers.add_parser('serve', help='启动本地回放服务器')
+    serve.add_argument('--archive', default=DEFAULT_ARCHIVE, help=f'存档目录 (默认 {DEFAULT_ARCHIVE})')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve.add_argument('--latency', type=float, default=0, help='API响应延迟（毫秒）')
+    serve.add_argument('--jitter', type=float, default=0, help='延迟随机抖动范围（±毫秒）')
+    serve.add_argument('--error-rate', type=float, default=0, help='返回HTTP 500的概率')
+    serve.add_argument('--reject-rate', type=float, default=0, help='返回签名错误 (code=10001) 的概率')
+    serve.add_argument('--seed', type=int, default=None, help='随机种子，固定后延迟和错误注入可复现')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        counts = record_archive(args.archive, args.catalog, args.details)
+        print(f"已录制到 {args.archive}/")
+        print(f"- catalog: {counts['catalog']} 个")
+        print(f"- info: {counts['info']} 个")
+        return
+
+    archive = load_archive(args.archive)
+    server = ReplayServer((args.host, args.port), archive,
+                          latency=args.latency / 1000, jitter=args.jitter / 1000,
+                          error_rate=args.error_rate, reject_rate=args.reject_rate, seed=args.seed)
+
+    base = f"http://{args.host}:{server.server_port}"
+    print(f"回放服务器: {base}  (catalog: {'有' if archive['catalog'] else '无'}, info: {len(archive['info'])} 个)")
+    print(f"  python3 data/fetch.py --wiki-url {base}")
+    print(f"  python3 data/fetch_details_browser.py --wiki-url {base} --api-url {base}/web/v1")
+    print("按 Ctrl+C 停止\n")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\n请求统计:")
+        for key, value in server.stats.items():
+            print(f"- {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+图片优化：在 download_images.py 之后运行
+
+功能：
+- 把 web/public/images/items/ 中的原图重新压缩为 WebP（以及可用时的 AVIF）
+- 为搜索网格生成 1x/2x 缩略图（ItemCard 显示尺寸为 96px）
+- 使用进程池并行处理
+- 原图内容未变化且输出文件齐全时跳过
+- 写入 data/image_variants.json，publish.py 用它把发布的 item_lookup.json 指向最优版本（提交的文件保持原图路径）
+- 原图已删除的物品从清单中移除，并删除其优化版本
+"""
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+try:
+    from PIL import Image, features
+except ImportError:
+    print("错误: 需要安装 Pillow 库")
+    print("运行: pip install Pillow")
+    sys.exit(1)
+
+
+SOURCE_DIR = Path('web/public/images/items')
+OUTPUT_DIR = SOURCE_DIR / 'optimized'
+MANIFEST_PATH = 'data/image_variants.json'
+PUBLIC_ROOT = Path('web/public')
+
+# ItemCard: w-24 h-24 (96px)
+THUMBNAIL_SIZES = {'1x': 96, '2x': 192}
+WEBP_QUALITY = 82
+AVIF_QUALITY = 60
+# 网格使用的版本：2x WebP 覆盖高DPI屏幕，兼容性也足够
+PREFERRED_VARIANT = ('2x', 'webp')
+
+
+def file_hash(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def public_path(path: Path) -> str:
+    return '/' + path.relative_to(PUBLIC_ROOT).as_posix()
+
+
+def output_formats() -> list:
+    formats = ['webp']
+    if features.check('avif'):
+        formats.append('avif')
+    return formats
+
+
+def save_variant(image: 'Image.Image', path: Path, fmt: str):
+    if fmt == 'webp':
+        image.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif fmt == 'avif':
+        image.save(path, 'AVIF', quality=AVIF_QUALITY, speed=8)
+
+
+def optimize_image(item_id: str, source: str, formats: list) -> dict:
+    """在子进程中运行：生成全尺寸和缩略图的所有格式，返回清单条目"""
+    source_path = Path(source)
+    variants = {}
+
+    with Image.open(source_path) as img:
+        img.load()
+        image = img.convert('RGBA') if img.mode not in ('RGB', 'RGBA') else img.copy()
+
+    sizes = {'full': None, **THUMBNAIL_SIZES}
+    for size_name, edge in sizes.items():
+        if edge is None or max(image.size) <= edge:
+            resized = image
+        else:
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+
+        suffix = '' if size_name == 'full' else f'@{size_name}'
+        for fmt in formats:
+            out_path = OUTPUT_DIR / f"{item_id}{suffix}.{fmt}"
+            save_variant(resized, out_path, fmt)
+            variants.setdefault(size_name, {})[fmt] = {
+                'path': public_path(out_path),
+                'bytes': out_path.stat().st_size,
+                'width': resized.size[0],
+                'height': resized.size[1]
+            }
+
+    return {
+        'source': public_path(source_path),
+        'sourceHash': file_hash(source_path),
+        'sourceBytes': source_path.stat().st_size,
+        'variants': variants
+    }
+
+
+def is_up_to_date(entry: dict, source_path: Path, formats: list) -> bool:
+    if not entry or entry.get('sourceHash') != file_hash(source_path):
+        return False
+    for size_name in ('full', *THUMBNAIL_SIZES):
+        for fmt in formats:
+            variant = entry.get('variants', {}).get(size_name, {}).get(fmt)
+            if not variant or not (PUBLIC_ROOT / variant['path'].lstrip('/')).exists():
+                return False
+    return True
+
+
+def preferred_path(entry: dict) -> str:
+    size_name, fmt = PREFERRED_VARIANT
+    variant = entry.get('variants', {}).get(size_name, {}).get(fmt)
+    return variant['path'] if variant else entry.get('source', '')
+
+
+def prune_manifest(manifest: dict, item_ids: set) -> int:
+    """移除原图已不存在的条目及其输出文件，返回移除的条目数"""
+    removed = [item_id for item_id in manifest if item_id not in item_ids]
+    for item_id in removed:
+        for formats in manifest.pop(item_id).get('variants', {}).values():
+            for variant in formats.values():
+                path = PUBLIC_ROOT / variant['path'].lstrip('/')
+                if path.exists():
+                    path.unlink()
+    return len(removed)
+
+
+def load_manifest() -> dict:
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    print("=== 优化物品图片 ===\n")
+
+    if not SOURCE_DIR.exists():
+        print(f"错误: 未找到 {SOURCE_DIR}")
+        print("请先运行: python3 data/download_images.py")
+        sys.exit(1)
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    formats = output_formats()
+    print(f"输出格式: {', '.join(formats)}")
+    if 'avif' not in formats:
+        print("  (当前 Pillow 不支持 AVIF，只生成 WebP)")
+
+    manifest = load_manifest()
+    sources = sorted(p for p in SOURCE_DIR.iterdir()
+                     if p.is_file() and p.suffix.lower() in ('.png', '.jpg', '.jpeg', '.gif', '.webp'))
+    pruned = prune_manifest(manifest, {p.stem for p in sources})
+
+    tasks = []
+    skipped = 0
+    for source_path in sources:
+        item_id = source_path.stem
+        if is_up_to_date(manifest.get(item_id), source_path, formats):
+            skipped += 1
+            continue
+        tasks.append((item_id, str(source_path)))
+
+    print(f"找到 {len(sources)} 张原图，需要处理 {len(tasks)} 张，跳过 {skipped} 张\n")
+
+    failed = 0
+    with ProcessPoolExecutor() as executor:
+        futures = {
+            executor.submit(optimize_image, item_id, source, formats): item_id
+            for item_id, source in tasks
+        }
+
+        for completed, future in enumerate(as_completed(futures), 1):
+            item_id = futures[future]
+            try:
+                entry = future.result()
+                entry['preferred'] = preferred_path(entry)
+                manifest[item_id] = entry
+                size_name, fmt = PREFERRED_VARIANT
+                preferred = entry['variants'][size_name][fmt]['bytes']
+                print(f"[{completed}/{len(tasks)}] ✓ {item_id}: {entry['sourceBytes']} → {preferred} 字节 "
+                      f"({size_name} {fmt})")
+            except Exception as e:
+                failed += 1
+                print(f"[{completed}/{len(tasks)}] ✗ {item_id}: {str(e)}")
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    source_total = sum(e['sourceBytes'] for e in manifest.values())
+    preferred_total = sum(
+        e['variants'][PREFERRED_VARIANT[0]][PREFERRED_VARIANT[1]]['bytes'] for e in manifest.values()
+    )
+
+    print("\n" + "="*50)
+    print("优化完成:")
+    print(f"  处理: {len(tasks) - failed}")
+    print(f"  跳过: {skipped}")
+    print(f"  移除（原图已删除）: {pruned}")
+    print(f"  失败: {failed}")
+    if source_total:
+        print(f"  原图总大小: {source_total / 1024:.0f} KB")
+        print(f"  网格版本总大小: {preferred_total / 1024:.0f} KB ({preferred_total / source_total:.0%})")
+    print(f"  清单: {MANIFEST_PATH}")
+    print("="*50)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Dependency-aware pipeline runner.
+
+Each stage declares the script it runs, the paths it reads and writes and
+the stages it must run after. A stage is skipped when all of its inputs
+(including its own script) are unchanged since its last successful run,
+all of its outputs exist and no dependency changed its outputs during the
+current run. Stages whose dependencies are finished run concurrently.
+
+Change detection is make-style with a content check: a file whose mtime and
+size match the recorded values is assumed unchanged; otherwise it is hashed,
+and only a different sha256 makes the stage stale. Fingerprints are kept in
+data/pipeline_state.json.
+
+Network stages (fetch-*, download-images) and publish (which needs a web
+build) are manual: they only run when named explicitly, otherwise their
+existing outputs are used as sources.
+
+Usage (from any directory):
+    python3 data/pipeline.py                       # 运行所有过期的阶段
+    python3 data/pipeline.py extract-recipe-database
+    python3 data/pipeline.py --status              # 只显示各阶段是否过期
+    python3 data/pipeline.py --force parse-details
+    python3 data/pipeline.py fetch-details extract-recipe-database
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_PATH = 'data/pipeline_state.json'
+DEFAULT_JOBS = 4
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    # 'root': 在仓库根目录运行；'data': 在 data/ 目录运行（脚本使用的相对路径不同）
+    cwd: str
+    inputs: List[str]
+    outputs: List[str]
+    deps: List[str] = field(default_factory=list)
+    args: List[str] = field(default_factory=list)
+    manual: bool = False
+
+
+# 所有路径都相对于仓库根目录；目录表示其下所有文件，支持 glob
+STAGES = [
+    Stage('fetch-catalogs', 'data/fetch.py', 'root',
+          inputs=[],
+          outputs=['data/type5_devices.json', 'data/type6_items.json'],
+          manual=True),
+    Stage('fetch-details', 'data/fetch_details_browser.py', 'root',
+          inputs=['data/type5_devices.json', 'data/type6_items.json'],
+          outputs=['data/item_details'],
+          deps=['fetch-catalogs'], args=['--refresh'], manual=True),
+    # 单次扫描 item_details：合成表、设备生产表（含反向索引和制造时间）和 item_lookup
+    Stage('parse-details', 'data/detail_parser.py', 'data',
+          inputs=['data/item_details', 'data/type5_devices.json', 'data/type6_items.json',
+                  'data/extract_device_productions.py', 'data/extract_manufacturing_time.py',
+                  'data/update_item_lookup_subtype.py'],
+          outputs=['data/synthesis_tables', 'data/device_production_tables',
+                   'data/item_lookup.json', 'web/public/data/item_lookup.json'],
+          deps=['fetch-details']),
+    Stage('extract-recipe-database', 'data/extract_recipe_database.py', 'data',
+          inputs=['data/synthesis_tables', 'data/device_production_tables', 'data/item_lookup.json',
+                  'data/overrides', 'data/type5_devices.json', 'data/planner/graph.py',
+                  'web/public/data/overrides/ignored_devices.json'],
+          outputs=['data/recipe_database.json', 'web/public/data/recipe_database.json'],
+          deps=['parse-details']),
+    Stage('export-recipe-columnar', 'data/recipe_columnar.py', 'data',
+          inputs=['data/recipe_database.json'],
+          outputs=['data/recipe_database.compact.json', 'data/recipe_database.bin'],
+          deps=['extract-recipe-database']),
+    Stage('build-plan-cache', 'data/build_plan_cache.py', 'data',
+          inputs=['data/recipe_database.json', 'data/item_lookup.json', 'data/planner/constants.py',
+                  'data/planner/graph.py', 'data/planner/plan.py',
+                  'web/public/data/overrides/ignored_devices.json'],
+          outputs=['web/public/data/plan_cache.json'],
+          deps=['extract-recipe-database']),
+    Stage('build-production-dag', 'data/build_production_dag.py', 'data',
+          inputs=['data/recipe_database.json', 'data/item_lookup.json', 'data/planner/constants.py',
+                  'data/planner/graph.py', 'data/planner/dag.py', 'data/planner/closure.py',
+                  'data/build_plan_cache.py', 'web/public/data/overrides/ignored_devices.json'],
+          outputs=['web/public/data/production_dag.json'],
+          deps=['extract-recipe-database']),
+    Stage('download-images', 'data/download_images.py', 'root',
+          inputs=['data/item_lookup.json'],
+          outputs=['web/public/images/items/*.png'],
+          manual=True),
+    Stage('optimize-images', 'data/optimize_images.py', 'root',
+          inputs=['web/public/images/items/*.png'],
+          outputs=['data/image_variants.json'],
+          deps=['download-images']),
+    Stage('build-icon-atlas', 'data/build_icon_atlas.py', 'root',
+          inputs=['web/public/images/items/*.png'],
+          outputs=['web/public/data/icon_atlas.json'],
+          deps=['download-images']),
+    # 把 item_lookup.json 中的远程图片 URL 改为本地原图路径
+    # （优化版本和 item_details 的封面路径由 publish 在发布的副本中处理）
+    Stage('update-image-paths', 'data/update_image_paths.py', 'root',
+          inputs=['web/public/data/item_lookup.json'],
+          outputs=['web/public/data/item_lookup.json'],
+          deps=['parse-details']),
+    # 最小化/精简/预压缩后写入构建产物 web/dist/data（源文件不变）；需要先在 web/ 运行 npm run build
+    Stage('publish', 'data/publish.py', 'root',
+          inputs=['data/item_details', 'data/recipe_database.json',
+                  'data/recipe_database.compact.json', 'data/recipe_database.bin',
+                  'web/public/data/item_lookup.json', 'web/public/data/icon_atlas.json',
+                  'web/public/data/overrides', 'web/public/data/plan_cache.json',
+                  'web/public/data/production_dag.json',
+                  'data/image_variants.json', 'data/project_details.py', 'data/update_image_paths.py'],
+          outputs=['web/dist/data/manifest.json'],
+          deps=['extract-recipe-database', 'export-recipe-columnar', 'build-plan-cache',
+                'build-production-dag', 'build-icon-atlas', 'optimize-images', 'update-image-paths'],
+          manual=True),
+]
+
+
+# ---------------------------------------------------------------------------
+# fingerprints
+# ---------------------------------------------------------------------------
+
+class Fingerprinter:
+    """File fingerprints with an mtime+size cache in front of sha256."""
+
+    def __init__(self, cache: Dict[str, List[Any]]):
+        # relpath -> [mtime_ns, size, sha256]
+        self.cache = cache
+        self.lock = threading.Lock()
+
+    def file_hash(self, rel_path: str) -> str:
+        st = os.stat(os.path.join(ROOT, rel_path))
+        with self.lock:
+            cached = self.cache.get(rel_path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+
+        with open(os.path.join(ROOT, rel_path), 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with self.lock:
+            self.cache[rel_path] = [st.st_mtime_ns, st.st_size, digest]
+        return digest
+
+    def expand(self, pattern: str) -> List[str]:
+        """Relative paths of every file matched by a path, directory or glob."""
+        full = os.path.join(ROOT, pattern)
+        matches = glob.glob(full) if glob.has_magic(pattern) else ([full] if os.path.exists(full) else [])
+
+        files = []
+        for match in matches:
+            if os.path.isdir(match):
+                for dirpath, dirnames, filenames in os.walk(match):
+                    dirnames.sort()
+                    files.extend(os.path.join(dirpath, name) for name in filenames)
+            else:
+                files.append(match)
+        return sorted(os.path.relpath(p, ROOT) for p in files)
+
+    def fingerprint(self, pattern: str) -> Optional[str]:
+        """Combined hash of everything a path pattern covers; None if it matches nothing."""
+        files = self.expand(pattern)
+        if not files:
+            return None
+        if len(files) == 1 and files[0] == pattern:
+            return self.file_hash(pattern)
+
+        h = hashlib.sha256()
+        for rel_path in files:
+            h.update(f"{rel_path}\0{self.file_hash(rel_path)}\n".encode('utf-8'))
+        return h.hexdigest()
+
+
+def stage_inputs(stage: Stage) -> List[str]:
+    return [stage.script] + stage.inputs
+
+
+def input_fingerprints(stage: Stage, fp: Fingerprinter) -> Dict[str, Optional[str]]:
+    return {pattern: fp.fingerprint(pattern) for pattern in stage_inputs(stage)}
+
+
+def output_fingerprints(stage: Stage, fp: Fingerprinter) -> Dict[str, Optional[str]]:
+    return {pattern: fp.fingerprint(pattern) for pattern in stage.outputs}
+
+
+def staleness(stage: Stage, record: Optional[Dict[str, Any]], fp: Fingerprinter) -> Optional[str]:
+    """Reason the stage must run, or None if it is up to date."""
+    missing = [out for out in stage.outputs if not fp.expand(out)]
+    if missing:
+        return f"缺少输出 {missing[0]}"
+    if record is None:
+        return "没有运行记录"
+
+    recorded = record.get('inputs', {})
+    for pattern, digest in input_fingerprints(stage, fp).items():
+        if recorded.get(pattern) != digest:
+            return f"输入变化 {pattern}"
+    return None
+
+
+# ---------------------------------------------------------------------------
+# state
+# ---------------------------------------------------------------------------
+
+def load_state() -> Dict[str, Any]:
+    path = os.path.join(ROOT, STATE_PATH)
+    if not os.path.exists(path):
+        return {'files': {}, 'stages': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    state.setdefault('files', {})
+    state.setdefault('stages', {})
+    return state
+
+
+def save_state(state: Dict[str, Any]):
+    with open(os.path.join(ROOT, STATE_PATH), 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+# ---------------------------------------------------------------------------
+# scheduling
+# ---------------------------------------------------------------------------
+
+def stage_map() -> Dict[str, Stage]:
+    return {stage.name: stage for stage in STAGES}
+
+
+def select_stages(targets: List[str]) -> List[str]:
+    """Targets plus all of their upstream stages, in declaration (topological) order."""
+    stages = stage_map()
+    selected = set()
+    pending = list(targets) if targets else list(stages)
+    while pending:
+        name = pending.pop()
+        if name in selected:
+            continue
+        selected.add(name)
+        pending.extend(stages[name].deps)
+    return [stage.name for stage in STAGES if stage.name in selected]
+
+
+class Runner:
+    def __init__(self, targets: List[str], force: bool = False, jobs: int = DEFAULT_JOBS):
+        self.stages = stage_map()
+        self.explicit = set(targets)
+        self.order = select_stages(targets)
+        self.force = force
+        self.jobs = jobs
+        self.state = load_state()
+        self.fp = Fingerprinter(self.state['files'])
+        self.print_lock = threading.Lock()
+        self.results: Dict[str, str] = {}
+        # 本次运行中输出有变化的阶段
+        self.changed = set()
+
+    def log(self, message: str):
+        with self.print_lock:
+            print(message, flush=True)
+
+    def decide(self, stage: Stage) -> Optional[str]:
+        """Reason to run the stage now, or None to skip it."""
+        if stage.manual and stage.name not in self.explicit:
+            return None
+        if self.force and stage.name in self.explicit:
+            return "--force"
+        # 上游在本次运行中改变了输出（包括原地修改同一目录的阶段）
+        for dep in stage.deps:
+            if dep in self.changed:
+                return f"上游 {dep} 输出变化"
+        return staleness(stage, self.state['stages'].get(stage.name), self.fp)
+
+    def execute(self, stage: Stage) -> bool:
+        cwd = ROOT if stage.cwd == 'root' else os.path.join(ROOT, 'data')
+        script = os.path.join(ROOT, stage.script)
+        started = time.time()
+
+        process = subprocess.Popen(
+            [sys.executable, script] + stage.args,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            env={**os.environ, 'PYTHONUNBUFFERED': '1'}
+        )
+        for line in process.stdout:
+            self.log(f"[{stage.name}] {line.rstrip()}")
+        code = process.wait()
+
+        elapsed = time.time() - started
+        if code != 0:
+            self.log(f"✗ {stage.name} 失败 (exit {code}, {elapsed:.1f}s)")
+            return False
+
+        previous = self.state['stages'].get(stage.name, {})
+        outputs = output_fingerprints(stage, self.fp)
+        if previous.get('outputs') != outputs:
+            self.changed.add(stage.name)
+
+        self.state['stages'][stage.name] = {
+            'inputs': input_fingerprints(stage, self.fp),
+            'outputs': outputs,
+            'finishedAt': int(time.time()),
+            'seconds': round(elapsed, 2)
+        }
+        self.log(f"✓ {stage.name} 完成 ({elapsed:.1f}s)")
+        return True
+
+    def status(self):
+        for name in self.order:
+            stage = self.stages[name]
+            if stage.manual and name not in self.explicit:
+                missing = [out for out in stage.outputs if not self.fp.expand(out)]
+                note = f"手动阶段，缺少输出 {missing[0]}" if missing else "手动阶段"
+                print(f"  {name:28} - {note}")
+                continue
+            reason = self.decide(stage)
+            print(f"  {name:28} {'过期: ' + reason if reason else '最新'}")
+
+    def run(self) -> bool:
+        remaining = list(self.order)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while remaining or running:
+                for name in list(remaining):
+                    stage = self.stages[name]
+                    dep_results = [self.results.get(dep) for dep in stage.deps if dep in self.order]
+                    if None in dep_results:
+                        continue
+                    remaining.remove(name)
+
+                    if 'failed' in dep_results or 'blocked' in dep_results:
+                        self.results[name] = 'blocked'
+                        self.log(f"- {name}: 上游失败，跳过")
+                        continue
+
+                    reason = self.decide(stage)
+                    if reason is None:
+                        if stage.manual and name not in self.explicit:
+                            missing = [out for out in stage.outputs if not self.fp.expand(out)]
+                            if missing:
+                                self.results[name] = 'failed'
+                                self.log(f"✗ {name}: 缺少 {missing[0]}，请先运行: "
+                                         f"python3 data/pipeline.py {name}")
+                                continue
+                        self.results[name] = 'fresh'
+                        self.log(f"- {name}: 最新，跳过")
+                        continue
+
+                    self.log(f"▶ {name}: {reason}")
+                    running[executor.submit(self.execute, stage)] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        self.log(f"✗ {name}: {e}")
+                        ok = False
+                    self.results[name] = 'ran' if ok else 'failed'
+                save_state(self.state)
+
+        save_state(self.state)
+        return 'failed' not in self.results.values()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按依赖关系运行数据处理流程，只运行过期的阶段')
+    parser.add_argument('targets', nargs='*', help='要更新的阶段（默认全部）；会同时检查其上游阶段')
+    parser.add_argument('--status', action='store_true', help='只显示各阶段状态，不运行')
+    parser.add_argument('--force', action='store_true', help='强制运行指定的阶段')
+    parser.add_argument('--jobs', '-j', type=int, default=DEFAULT_JOBS,
+                        help=f'最多同时运行的阶段数 (默认 {DEFAULT_JOBS})')
+    parser.add_argument('--list', action='store_true', help='列出所有阶段')
+    args = parser.parse_args()
+
+    stages = stage_map()
+    unknown = [t for t in args.targets if t not in stages]
+    if unknown:
+        print(f"错误: 未知阶段 {', '.join(unknown)}")
+        print(f"可用阶段: {', '.join(stages)}")
+        sys.exit(2)
+
+    if args.list:
+        for stage in STAGES:
+            deps = ', '.join(stage.deps) or '-'
+            print(f"  {stage.name:28} {stage.script:45} 依赖: {deps}{'  (手动)' if stage.manual else ''}")
+        return
+
+    runner = Runner(args.targets, force=args.force, jobs=args.jobs)
+
+    if args.status:
+        print("阶段状态:")
+        runner.status()
+        return
+
+    print("=== 运行数据处理流程 ===\n")
+    started = time.time()
+    ok = runner.run()
+
+    counts = {}
+    for result in runner.results.values():
+        counts[result] = counts.get(result, 0) + 1
+
+    print("\n" + "="*60)
+    print(f"运行: {counts.get('ran', 0)}  跳过: {counts.get('fresh', 0)}  "
+          f"失败: {counts.get('failed', 0)}  未运行: {counts.get('blocked', 0)}")
+    print(f"耗时: {time.time() - started:.1f}s")
+    print("="*60)
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+生产方案规划（Python 版，与网页端 efficiencyCalculator.ts 结果一致）
+
+    from planner import load_graph, Planner, plan_all
+
+    graph = load_graph()                      # 加载 recipe_database.json，构建一次
+    plans = Planner(graph).plan('53')         # {'efficiency': Plan, 'minimum': Plan}
+    everything = plan_all(graph)              # 所有可生产物品
+    best = Optimizer(graph).optimize('53', rate=1, objective='devices')  # 线性规划选择配方组合
+    totals = RequirementSolver(graph).solve({'53': 1, '29': 2})         # 多个目标合计的需求（每秒）
+    nodes = ProductionDag(graph).subgraph('53')  # 去重的依赖子图，每个节点带可达基础原料和深度
+    lost = ClosureIndex(ProductionDag(graph)).unbuildable_if_ignored(['173'])  # 忽略设备后无法生产的物品
+    engine = WhatIfEngine(load_graph(ignored_devices=()), ['173'])         # 增量切换忽略设备 / 基础原料
+    result = simulate(plans['efficiency'], duration=3600)                   # 离散事件仿真：实际产速、缓存、停工
+
+命令行（在 data/ 目录运行）：python3 -m planner --help
+"""
+
+from .constants import TRANSFER_RATE_PER_PIPE, BASE_MATERIAL_EXTRACTION_RATE
+from .closure import ClosureIndex
+from .dag import DagNode, ProductionDag
+from .graph import Ingredient, Recipe, RecipeGraph, load_graph
+from .matrix import Requirements, RequirementSolver, StoichiometryMatrix
+from .optimize import Byproduct, OptimizationError, OptimizedPlan, Optimizer, RecipeRun, optimize_all
+from .plan import BaseMaterial, Connection, DevicePlan, Plan, Planner, plan_all
+from .simulate import BufferStats, GroupStats, SimulationResult, Simulator, simulate
+from .whatif import WhatIfEngine
+
+__all__ = [
+    'TRANSFER_RATE_PER_PIPE', 'BASE_MATERIAL_EXTRACTION_RATE',
+    'Ingredient', 'Recipe', 'RecipeGraph', 'load_graph',
+    'ClosureIndex', 'DagNode', 'ProductionDag',
+    'BaseMaterial', 'Connection', 'DevicePlan', 'Plan', 'Planner', 'plan_all',
+    'Requirements', 'RequirementSolver', 'StoichiometryMatrix',
+    'Byproduct', 'OptimizationError', 'OptimizedPlan', 'Optimizer', 'RecipeRun', 'optimize_all',
+    'BufferStats', 'GroupStats', 'SimulationResult', 'Simulator', 'simulate',
+    'WhatIfEngine',
+]
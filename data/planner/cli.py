@@ -0,0 +1,434 @@
+"""
+命令行入口（在 data/ 目录运行）
+
+    python3 -m planner 53                    # 最高效率方案 + 最小规模方案
+    python3 -m planner 精炼炉 --rate 1/2      # 指定产速（个/秒，可写分数）
+    python3 -m planner 53 --base 381,570     # 把物品当作基础原料
+    python3 -m planner --all --json plans.json [--exact]
+    python3 -m planner --all --benchmark
+    python3 -m planner 53 --optimize devices --rate 1 [--integer] [--max-pipes 2] [--max-extraction 4]
+    python3 -m planner --factory 53:1,29:1/2       # 多个目标合计的基础原料和设备（--factory all：所有物品）
+    python3 -m planner 381 --closure               # 依赖的物品、用到它的物品和最终产品
+    python3 -m planner --impact 173,174            # 再忽略这些设备后无法生产的物品
+    python3 -m planner --what-if 173,-虚拟_设备制造 --base 194   # 修改忽略设备（- 表示恢复）和基础原料后的变化
+    python3 -m planner 480 --simulate 3600 [--scale 100]         # 离散事件仿真：实际产速、缓存、稳态时间、停工
+    python3 -m planner --all --simulate 3600                     # 仿真所有方案，检查是否达到计划产速
+"""
+
+import argparse
+import json
+import sys
+import time
+from fractions import Fraction
+from pathlib import Path
+from typing import Optional
+
+from .closure import ClosureIndex
+from .constants import DATABASE_PATH, TRANSFER_RATE_PER_PIPE
+from .dag import ProductionDag
+from .graph import load_graph, load_ignored_devices
+from .matrix import RequirementSolver, StoichiometryMatrix
+from .optimize import OBJECTIVES, SOLVERS, OptimizedPlan, OptimizationError, Optimizer, optimize_all
+from .plan import Plan, Planner, plan_all, WAREHOUSE, OUTPUT
+from .simulate import STEADY_TOLERANCE, SimulationResult, simulate
+from .whatif import WhatIfEngine
+
+BENCHMARK_REPEAT = 5
+
+
+def format_number(value: Fraction) -> str:
+    if value.denominator == 1:
+        return str(value.numerator)
+    return f"{float(value):.4g} ({value})"
+
+
+def print_plan(plan: Plan):
+    print(f"\n【{plan.name}】{plan.target_name} ({plan.target_id})")
+    print(f"  产出: {format_number(plan.output_rate)} 个/秒，设备总数: {format_number(plan.total_devices)}")
+
+    print("  设备:")
+    for device in plan.devices:
+        overflow = f"  溢出 {float(device.overflow_rate):.2f}x" if device.has_overflow else ''
+        print(f"    {device.recipe.device_name} × {format_number(device.count)} -> "
+              f"{plan_name(plan, device.item_id)} {format_number(device.production_rate)} 个/秒{overflow}")
+
+    if plan.base_materials:
+        print("  基础原料:")
+        for material in plan.base_materials:
+            print(f"    {material.name} ({material.item_id}): {format_number(material.rate)} 个/秒")
+
+    if plan.connections:
+        print("  物料流:")
+        for conn in plan.connections:
+            source = '仓库' if conn.source == WAREHOUSE else plan_name(plan, conn.source)
+            print(f"    {source} -> {plan_name(plan, conn.target)}: {plan_name(plan, conn.item_id)} "
+                  f"{format_number(conn.rate)} 个/秒（{conn.pipes} 条管道）")
+
+    if plan.bottleneck:
+        print(f"  瓶颈: {plan.bottleneck['description']}")
+
+
+def plan_name(plan: Plan, item_id: str) -> str:
+    for device in plan.devices:
+        for ingredient in device.recipe.products + device.recipe.materials:
+            if ingredient.item_id == item_id and ingredient.name:
+                return ingredient.name
+    for material in plan.base_materials:
+        if material.item_id == item_id:
+            return material.name
+    return item_id
+
+
+def print_optimized(plan: OptimizedPlan, greedy: Optional[Plan] = None):
+    title = '整数规划' if plan.integer else '线性规划'
+    status = '' if plan.proven else '（未证明最优）'
+    print(f"\n【{title}：{'最少设备' if plan.objective == 'devices' else '最少基础原料'}】"
+          f"{plan.target_name} ({plan.target_id}) 求解器 {plan.solver}{status}")
+    print(f"  产出: {format_number(plan.output_rate)} 个/秒，设备总数: {format_number(plan.total_devices)}，"
+          f"基础原料: {format_number(plan.base_rate)} 个/秒（{plan.extraction_ports} 个取料口），"
+          f"管道: {plan.total_pipes} 条")
+    if greedy is not None:
+        print(f"  对比最短制造时间方案: 设备 {format_number(greedy.total_devices)}，"
+              f"基础原料 {format_number(sum((m.rate for m in greedy.base_materials), Fraction(0)))} 个/秒")
+
+    print("  配方:")
+    for run in plan.runs:
+        products = '、'.join(f"{p.name or p.item_id}×{p.count}" for p in run.recipe.products)
+        print(f"    {run.recipe.device_name} × {format_number(run.devices)} -> {products} ({run.recipe.recipe_id})")
+
+    if plan.base_materials:
+        print("  基础原料:")
+        for material in plan.base_materials:
+            print(f"    {material.name} ({material.item_id}): {format_number(material.rate)} 个/秒")
+
+    if plan.byproducts:
+        print("  多余产出:")
+        for byproduct in plan.byproducts:
+            print(f"    {byproduct.name} ({byproduct.item_id}): {format_number(byproduct.rate)} 个/秒")
+
+    if plan.connections:
+        names = {m.item_id: m.name for m in plan.base_materials}
+        for run in plan.runs:
+            for ingredient in run.recipe.products + run.recipe.materials:
+                names.setdefault(ingredient.item_id, ingredient.name)
+        print("  物料流:")
+        for conn in plan.connections:
+            source = '仓库' if conn.source == WAREHOUSE else conn.source
+            target = '输出' if conn.target == OUTPUT else conn.target
+            print(f"    {source} -> {target}: {names.get(conn.item_id) or conn.item_id} "
+                  f"{format_number(conn.rate)} 个/秒（{conn.pipes} 条管道）")
+
+
+def run_optimizer(args, graph, base_items):
+    options = {
+        'rate': args.rate if args.rate is not None else TRANSFER_RATE_PER_PIPE,
+        'objective': args.optimize,
+        'integer': args.integer,
+        'max_pipes': args.max_pipes,
+        'max_extraction': args.max_extraction,
+    }
+    try:
+        if args.all:
+            plans = optimize_all(graph, base_items=base_items, solver=args.solver, **options)
+        else:
+            item_id = graph.resolve_item(args.item)
+            if item_id is None:
+                print(f"✗ 找不到物品: {args.item}")
+                sys.exit(1)
+            plans = {item_id: Optimizer(graph, base_items, args.solver).optimize(item_id, **options)}
+    except OptimizationError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    if args.json:
+        write_json({item_id: plan.to_dict(args.exact) for item_id, plan in plans.items()}, args.json)
+        return
+    planner = Planner(graph, base_items)
+    for item_id, plan in plans.items():
+        print_optimized(plan, planner.rate_plan(item_id, options['rate']))
+
+
+def parse_demands(spec: str, graph, default_rate: Fraction) -> dict:
+    """'all' 或 '物品[:速率],物品[:速率]'"""
+    if spec == 'all':
+        return {item_id: default_rate for item_id in graph.producible_items()}
+    demands = {}
+    for part in filter(None, spec.split(',')):
+        query, _, rate = part.partition(':')
+        item_id = graph.resolve_item(query)
+        if item_id is None:
+            print(f"✗ 找不到物品: {query}")
+            sys.exit(1)
+        demands[item_id] = demands.get(item_id, Fraction(0)) + (Fraction(rate) if rate else default_rate)
+    return demands
+
+
+def run_factory(args, graph, base_items):
+    demands = parse_demands(args.factory, graph, args.rate if args.rate is not None else Fraction(1))
+    start = time.perf_counter()
+    totals = RequirementSolver(graph, base_items).solve(demands)
+    elapsed = time.perf_counter() - start
+    devices = totals.devices(graph)
+
+    if args.json:
+        number = str if args.exact else float
+        write_json({
+            'demands': {item_id: number(rate) for item_id, rate in demands.items()},
+            'baseMaterials': {item_id: number(rate) for item_id, rate in totals.base.items() if rate},
+            'devices': {recipe_id: number(count) for recipe_id, count in devices.items() if count},
+            'production': {item_id: number(rate) for item_id, rate in totals.production.items() if rate},
+            'matrix': StoichiometryMatrix(graph).to_dict(),
+        }, args.json, f'{len(demands)} 个目标的合计需求')
+        return
+
+    matrix = StoichiometryMatrix(graph)
+    print(f"配方矩阵: {matrix.shape[0]} 物品 × {matrix.shape[1]} 配方，非零元素 {matrix.nnz}")
+    print(f"目标: {len(demands)} 个，计算耗时 {elapsed * 1000:.1f} ms")
+    print(f"设备总数: {format_number(sum(devices.values(), Fraction(0)))}")
+    print("基础原料:")
+    for item_id, rate in sorted(totals.base.items(), key=lambda e: -e[1]):
+        if rate:
+            print(f"  {graph.name(item_id)} ({item_id}): {format_number(rate)} 个/秒")
+    print("设备:")
+    for recipe_id, count in sorted(devices.items(), key=lambda e: -e[1]):
+        recipe = graph.recipes[recipe_id]
+        products = '、'.join(p.name or p.item_id for p in recipe.products)
+        print(f"  {recipe.device_name} × {format_number(count)} -> {products} ({recipe_id})")
+
+
+def run_closure(args, graph, base_items):
+    index = ClosureIndex(ProductionDag(graph, base_items))
+
+    def names(item_ids):
+        return '、'.join(f"{graph.name(i)} ({i})" for i in item_ids) or '无'
+
+    if args.impact:
+        devices = [d for d in args.impact.split(',') if d]
+        start = time.perf_counter()
+        lost = index.unbuildable_if_ignored(devices)
+        elapsed = time.perf_counter() - start
+        print(f"再忽略设备 {', '.join(devices)} 后无法生产: {len(lost)} 个（{elapsed * 1e6:.0f} µs）")
+        for item_id in lost:
+            print(f"  {graph.name(item_id)} ({item_id})")
+        return
+
+    item_id = graph.resolve_item(args.item)
+    if item_id is None:
+        print(f"✗ 找不到物品: {args.item}")
+        sys.exit(1)
+    node = index.dag.nodes.get(item_id) or index.dag.subgraph(item_id)[0]
+    print(f"{graph.name(item_id)} ({item_id})：深度 {node.depth}，到最终产品 "
+          f"{index.height[index.index[item_id]] if item_id in index.index else 0} 步")
+    print(f"  直接原料: {names(index.upstream(item_id, 1))}")
+    print(f"  依赖的全部物品: {names(index.upstream(item_id))}")
+    print(f"  基础原料: {names(sorted(node.base, key=lambda i: (len(i), i)))}")
+    print(f"  直接使用者: {names(index.downstream(item_id, 1))}")
+    print(f"  用到它的全部物品: {names(index.downstream(item_id))}")
+    print(f"  用到它的最终产品: {names(index.final_products(item_id))}")
+
+
+def run_what_if(args, base_items):
+    graph = load_graph(args.db, ignored_devices=())
+    default = set(() if args.include_ignored else load_ignored_devices())
+    engine = WhatIfEngine(graph, default)
+    before = {item_id: (engine.craftable(item_id), engine.cheapest(item_id)) for item_id in engine.closure.items}
+
+    ignored = set(default)
+    for spec in filter(None, args.what_if.split(',')):
+        if spec.startswith('-'):
+            ignored.discard(spec[1:])
+        else:
+            ignored.add(spec.lstrip('+'))
+    start = time.perf_counter()
+    changed = engine.update(ignored, base_items)
+    elapsed = time.perf_counter() - start
+
+    print(f"忽略设备 {len(ignored)} 个，自定义基础原料 {len(base_items)} 个："
+          f"{len(changed)} 个物品变化（{elapsed * 1000:.2f} ms）")
+    for item_id in changed:
+        was_craftable, was_recipe = before[item_id]
+        recipe = engine.cheapest(item_id)
+        if was_craftable and not engine.craftable(item_id):
+            change = '改为基础原料'
+        elif not was_craftable and engine.craftable(item_id):
+            change = f"可以生产: {recipe.device_name} ({recipe.recipe_id})"
+        else:
+            change = f"{was_recipe.device_name} ({was_recipe.recipe_id}) -> {recipe.device_name} ({recipe.recipe_id})"
+        print(f"  {graph.name(item_id)} ({item_id}): {change}，成本 {engine.cost(item_id):.4g}")
+    print(f"可生产物品: {len(engine.craftable_items())} 个")
+
+
+def print_simulation(result: SimulationResult, plan: Plan):
+    names = {}
+    for device in plan.devices:
+        for ingredient in device.recipe.products + device.recipe.materials:
+            names.setdefault(ingredient.item_id, ingredient.name or ingredient.item_id)
+
+    steady = f"{result.steady_state_time:.0f} 秒" if result.steady_state_time is not None else '未达到'
+    print(f"\n【仿真：{plan.name}】{plan.target_name} ({plan.target_id}) "
+          f"{result.duration:.0f} 秒，设备 {sum(g.count for g in result.groups)} 台")
+    print(f"  计划产速: {result.planned_rate:.4g} 个/秒，稳态产速: {result.output_rate:.4g} 个/秒，"
+          f"平均: {result.average_rate:.4g} 个/秒，共产出 {result.produced:.0f} 个")
+    print(f"  达到稳态: {steady}；事件 {result.events} 个，耗时 {result.wall_seconds:.2f} 秒")
+
+    hotspots = result.hotspots()
+    if hotspots:
+        print("  停工热点（设备·秒）:")
+        for group in hotspots:
+            reasons = [f"缺少{names.get(item_id, item_id)} {seconds:.0f}" for item_id, seconds in
+                       sorted(group.starved.items(), key=lambda e: -e[1])]
+            if group.blocked:
+                reasons.append(f"产物积压 {group.blocked:.0f}")
+            print(f"    {group.device_name} × {group.count} -> {names.get(group.item_id, group.item_id)}："
+                  f"利用率 {group.utilization:.0%}，{'，'.join(reasons)}")
+
+    print("  缓存（平均 / 峰值 / 最终 / 容量）:")
+    for buffer in sorted(result.buffers, key=lambda b: -b.average / b.capacity)[:10]:
+        kind = '输入' if buffer.kind == 'input' else '输出'
+        print(f"    {names.get(buffer.group, buffer.group)} {kind} {names.get(buffer.item_id, buffer.item_id)}: "
+              f"{buffer.average:.1f} / {buffer.peak:.0f} / {buffer.final:.0f} / {buffer.capacity:.0f}")
+    if result.surplus:
+        print("  多余产出:")
+        for item_id, amount in result.surplus.items():
+            print(f"    {names.get(item_id, item_id)} ({item_id}): {amount:.0f} 个")
+
+
+def run_simulation(args, graph, base_items):
+    item_id = graph.resolve_item(args.item)
+    if item_id is None:
+        print(f"✗ 找不到物品: {args.item}")
+        sys.exit(1)
+    planner = Planner(graph, base_items)
+    plan = planner.rate_plan(item_id, args.rate) if args.rate is not None else planner.efficiency_plan(item_id)
+    result = simulate(plan, args.simulate, scale=args.scale)
+    if args.json:
+        write_json(result.to_dict(), args.json, f'{plan.target_name} 的仿真结果')
+    else:
+        print_simulation(result, plan)
+
+
+def run_simulation_check(args, graph, base_items):
+    """仿真 plan_all 的每个方案，稳态产速低于计划产速（超过 STEADY_TOLERANCE）或仿真出错时以 1 退出"""
+    start = time.perf_counter()
+    plans = plan_all(graph, base_items=base_items, rate=args.rate)
+    results = {}
+    failed = 0
+    for item_id, item_plans in plans.items():
+        for kind, plan in item_plans.items():
+            result = simulate(plan, args.simulate, scale=args.scale)
+            results.setdefault(item_id, {})[kind] = result
+            if result.output_rate < result.planned_rate * (1 - STEADY_TOLERANCE):
+                failed += 1
+                print(f"✗ {plan.target_name} ({item_id}) {plan.name}: 计划产速 {result.planned_rate:.4g} 个/秒，"
+                      f"稳态产速 {result.output_rate:.4g} 个/秒")
+
+    total = sum(len(item_plans) for item_plans in results.values())
+    if args.json:
+        write_json({item_id: {kind: result.to_dict() for kind, result in item_results.items()}
+                    for item_id, item_results in results.items()}, args.json, f'{total} 个方案的仿真结果')
+    mark = '✗' if failed else '✓'
+    print(f"{mark} 仿真 {len(plans)} 个物品的 {total} 个方案（{args.simulate:.0f} 秒）："
+          f"{total - failed} 个达到计划产速，{failed} 个未达到，耗时 {time.perf_counter() - start:.1f} 秒")
+    if failed:
+        sys.exit(1)
+
+
+def write_json(output, path: str, description: Optional[str] = None):
+    if path == '-':
+        json.dump(output, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"✓ 已写入 {description or f'{len(output)} 个物品的方案'}: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='根据 recipe_database.json 计算生产方案')
+    parser.add_argument('item', nargs='?', help='目标物品 ID 或名称')
+    parser.add_argument('--rate', type=Fraction, help='目标产出速率（个/秒），不指定时计算最高效率和最小规模方案')
+    parser.add_argument('--base', default='', help='视为基础原料的物品 ID，逗号分隔')
+    parser.add_argument('--all', action='store_true', help='规划所有可生产的物品')
+    parser.add_argument('--db', type=Path, default=DATABASE_PATH, help='配方数据库路径')
+    parser.add_argument('--include-ignored', action='store_true', help='不排除网页端默认忽略的设备')
+    parser.add_argument('--json', metavar='PATH', help='以 JSON 输出方案（- 表示标准输出）')
+    parser.add_argument('--exact', action='store_true', help='JSON 中的数量输出为精确分数字符串')
+    parser.add_argument('--benchmark', action='store_true', help='与 --all 一起使用：统计全部规划耗时')
+    parser.add_argument('--optimize', choices=OBJECTIVES,
+                        help='用线性规划在所有配方中选择：devices 最少设备，base 最少基础原料（默认产速为一条管道）')
+    parser.add_argument('--integer', action='store_true', help='与 --optimize 一起使用：设备数为整数')
+    parser.add_argument('--max-pipes', type=int, help='与 --optimize 一起使用：每种物品最多使用的管道数')
+    parser.add_argument('--max-extraction', type=int, help='与 --optimize 一起使用：每种基础原料最多的取料口数')
+    parser.add_argument('--factory', metavar='SPEC',
+                        help="多个目标合计的需求：'all' 或 '物品[:速率],...'（速率默认 --rate 或 1 个/秒）")
+    parser.add_argument('--closure', action='store_true', help='输出物品的传递闭包（依赖的物品、用到它的物品）')
+    parser.add_argument('--impact', metavar='DEVICES', help='再忽略这些设备（逗号分隔）后无法生产的物品')
+    parser.add_argument('--what-if', metavar='DEVICES',
+                        help='在默认忽略设备上再忽略这些设备（逗号分隔，-设备 表示恢复），与 --base 一起列出变化的物品')
+    parser.add_argument('--simulate', type=float, metavar='SECONDS',
+                        help='对物品的方案（指定 --rate 时为该产速，否则为最高效率方案）做离散事件仿真；'
+                             '与 --all 一起使用时仿真所有方案并检查是否达到计划产速')
+    parser.add_argument('--scale', type=int, default=1, help='与 --simulate 一起使用：设备数和管道数的倍数')
+    parser.add_argument('--solver', choices=SOLVERS, default='auto',
+                        help='线性规划求解器：highs 需要 scipy，simplex 为纯 Python 精确求解（默认自动选择）')
+    args = parser.parse_args()
+
+    if not args.item and not args.all and not args.factory and not args.impact and args.what_if is None:
+        parser.error('需要指定物品、--all、--factory、--impact 或 --what-if')
+
+    if args.what_if is not None:
+        run_what_if(args, [i for i in args.base.split(',') if i])
+        return
+
+    start = time.perf_counter()
+    graph = load_graph(args.db, ignored_devices=() if args.include_ignored else None)
+    load_seconds = time.perf_counter() - start
+    base_items = [i for i in args.base.split(',') if i]
+
+    if args.factory:
+        run_factory(args, graph, base_items)
+        return
+
+    if args.simulate is not None:
+        if args.all:
+            run_simulation_check(args, graph, base_items)
+        elif not args.item:
+            parser.error('--simulate 需要指定物品或 --all')
+        else:
+            run_simulation(args, graph, base_items)
+        return
+
+    if args.closure or args.impact:
+        run_closure(args, graph, base_items)
+        return
+
+    if args.optimize:
+        run_optimizer(args, graph, base_items)
+        return
+
+    if args.all:
+        if args.benchmark:
+            best = None
+            for _ in range(BENCHMARK_REPEAT):
+                start = time.perf_counter()
+                plans = plan_all(graph, base_items=base_items, rate=args.rate)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"加载配方图: {load_seconds * 1000:.1f} ms")
+            print(f"规划 {len(plans)} 个物品: 最快 {best * 1000:.1f} ms（{BENCHMARK_REPEAT} 次）")
+        else:
+            plans = plan_all(graph, base_items=base_items, rate=args.rate)
+    else:
+        item_id = graph.resolve_item(args.item)
+        if item_id is None:
+            print(f"✗ 找不到物品: {args.item}")
+            sys.exit(1)
+        plans = {item_id: Planner(graph, base_items).plan(item_id, args.rate)}
+
+    if args.json:
+        write_json({item_id: {kind: plan.to_dict(args.exact) for kind, plan in item_plans.items()}
+                    for item_id, item_plans in plans.items()}, args.json)
+    elif not args.benchmark:
+        for item_plans in plans.values():
+            for plan in item_plans.values():
+                print_plan(plan)
@@ -0,0 +1,282 @@
+"""
+传递闭包索引：每个物品依赖的所有物品（upstream）和用到它的所有物品（downstream）
+
+物品按 ProductionDag.order（拓扑顺序，原料在前）编号，闭包存为 Python 整数位集，第 i 位对应 items[i]。
+闭包按强连通分量计算一次：分量的 upstream 是所有子节点及其 upstream 的并集，循环中的物品互相包含；
+downstream 按逆拓扑顺序同样计算。查询都是位运算，不再反复遍历 asMaterials：
+
+    index = ClosureIndex(ProductionDag(graph))
+    index.final_products('381')            # 链条中用到清水的最终产品
+    index.upstream('201', max_depth=2)     # 两步以内的原料
+    index.unbuildable_if_ignored(['173'])  # 忽略设备后无法再生产的物品
+
+unbuildable_if_ignored 只在被忽略设备的产物及其 downstream 所在的分量内重新计算可生产物品，其余物品保持原状态。
+循环（如种子 ↔ 作物）与 RecipeGraph / 网页端 buildCycleGroups 使用同一条死锁规则：初始状态下死锁循环中的物品
+已经没有配方（作为基础原料）；忽略设备后，在受影响的物品图强连通分量内按剩余配方重新划分，新出现的死锁循环中的
+物品同样无法再生产。没有死锁的循环按稳态处理，只要循环外的原料可得就可以生产。
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, FrozenSet, Set
+
+from .dag import ProductionDag
+from .graph import strongly_connected_components
+
+
+def bits(mask: int) -> Iterable[int]:
+    """位集中为 1 的位（从低到高）"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ClosureIndex:
+    """ProductionDag 上的位集传递闭包"""
+
+    def __init__(self, dag: ProductionDag):
+        self.dag = dag
+        self.items: List[str] = list(dag.order)
+        self.index: Dict[str, int] = {item_id: i for i, item_id in enumerate(self.items)}
+        n = len(self.items)
+
+        # 直接原料 / 直接使用者
+        self.materials = [0] * n
+        self.consumers = [0] * n
+        for i, item_id in enumerate(self.items):
+            for child in dag.nodes[item_id].children:
+                j = self.index[child]
+                self.materials[i] |= 1 << j
+                self.consumers[j] |= 1 << i
+
+        # 同一分量在 order 中相邻；cycle 为空时分量只有自身
+        components: List[List[int]] = []
+        for i, item_id in enumerate(self.items):
+            cycle = dag.nodes[item_id].cycle
+            if components and cycle and self.items[components[-1][0]] in cycle:
+                components[-1].append(i)
+            else:
+                components.append([i])
+
+        self.upstream_masks = [0] * n
+        self.downstream_masks = [0] * n
+        self.height = [0] * n  # 到最终产品的最长链长度（一个循环算一步）
+        for ordering, direct, closure in ((components, self.materials, self.upstream_masks),
+                                          (components[::-1], self.consumers, self.downstream_masks)):
+            for members in ordering:
+                cyclic = bool(dag.nodes[self.items[members[0]]].cycle)
+                own = sum(1 << i for i in members) if cyclic else 0
+                mask = own
+                for i in members:
+                    for j in bits(direct[i] & ~own):
+                        mask |= (1 << j) | closure[j]
+                for i in members:
+                    closure[i] = mask
+        for members in components[::-1]:
+            own = set(members)
+            height = 0
+            for i in members:
+                for j in bits(self.consumers[i]):
+                    if j not in own:
+                        height = max(height, self.height[j] + 1)
+            for i in members:
+                self.height[i] = height
+
+        self.final_mask = sum(1 << i for i in range(n) if not self.consumers[i])
+
+        # 分量（拓扑顺序）、每个物品所在的分量、每个分量的位集
+        self.components = components
+        self.component_of = [0] * n
+        self.component_masks: List[int] = []
+        for c, members in enumerate(components):
+            for i in members:
+                self.component_of[i] = c
+            self.component_masks.append(sum(1 << i for i in members))
+
+        # 可生产物品的计算用：每个物品的可用配方、配方原料位集、每个设备的配方
+        self._item_recipes: List[List[str]] = [[r.recipe_id for r in dag.nodes[item_id].recipes]
+                                               for item_id in self.items]
+        self._recipe_materials: Dict[str, int] = {}
+        self._recipe_products: Dict[str, int] = {}
+        self._device_recipes: Dict[str, List[str]] = {}
+        for i, item_id in enumerate(self.items):
+            for recipe in dag.nodes[item_id].recipes:
+                if recipe.recipe_id not in self._recipe_materials:
+                    self._recipe_materials[recipe.recipe_id] = self.mask(m.item_id for m in recipe.materials)
+                    self._recipe_products[recipe.recipe_id] = 0
+                    self._device_recipes.setdefault(recipe.device_id, []).append(recipe.recipe_id)
+                self._recipe_products[recipe.recipe_id] |= 1 << i
+        self.raw_mask = sum(1 << i for i, item_id in enumerate(self.items) if dag.nodes[item_id].is_base)
+        self.buildable_mask = self._evaluate(self.raw_mask, range(len(components)), frozenset())
+
+        # 死锁规则用：物品图（所有配方）的强连通分量和每个设备的所有配方，与 RecipeGraph 相同
+        graph = dag.graph
+        self._graph_component_of: Dict[str, int] = {item_id: c for c, members in enumerate(graph.components)
+                                                    for item_id in members}
+        self._graph_producers: Dict[str, List[str]] = {}
+        self._graph_device_recipes: Dict[str, List[str]] = {}
+        for recipe in graph.recipes.values():
+            self._graph_device_recipes.setdefault(recipe.device_id, []).append(recipe.recipe_id)
+            for product in recipe.products:
+                self._graph_producers.setdefault(product.item_id, []).append(recipe.recipe_id)
+
+    # -- 位集与物品 ---------------------------------------------------------
+
+    def mask(self, item_ids: Iterable[str]) -> int:
+        """物品 -> 位集（不在图中的物品忽略）"""
+        mask = 0
+        for item_id in item_ids:
+            i = self.index.get(item_id)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def items_of(self, mask: int) -> List[str]:
+        """位集 -> 物品（拓扑顺序）"""
+        return [self.items[i] for i in bits(mask)]
+
+    # -- 查询 ---------------------------------------------------------------
+
+    def _reach(self, item_id: str, direct: List[int], closure: List[int], max_depth: Optional[int]) -> int:
+        i = self.index.get(item_id)
+        if i is None:
+            return 0
+        if max_depth is None:
+            return closure[i]
+        seen = frontier = direct[i]
+        for _ in range(max_depth - 1):
+            following = 0
+            for j in bits(frontier):
+                following |= direct[j]
+            frontier = following & ~seen
+            if not frontier:
+                break
+            seen |= frontier
+        return seen
+
+    def upstream(self, item_id: str, max_depth: Optional[int] = None) -> List[str]:
+        """item_id 依赖的所有物品；max_depth 限制步数（1 为直接原料）"""
+        return self.items_of(self._reach(item_id, self.materials, self.upstream_masks, max_depth))
+
+    def downstream(self, item_id: str, max_depth: Optional[int] = None) -> List[str]:
+        """用到 item_id 的所有物品；max_depth 限制步数（1 为直接使用者）"""
+        return self.items_of(self._reach(item_id, self.consumers, self.downstream_masks, max_depth))
+
+    def depends_on(self, item_id: str, other_id: str) -> bool:
+        i, j = self.index.get(item_id), self.index.get(other_id)
+        return i is not None and j is not None and bool(self.upstream_masks[i] >> j & 1)
+
+    def distance(self, item_id: str, material_id: str) -> Optional[int]:
+        """从 item_id 沿原料到 material_id 的最少步数；不依赖时为 None"""
+        if not self.depends_on(item_id, material_id):
+            return None
+        target = 1 << self.index[material_id]
+        seen = frontier = self.materials[self.index[item_id]]
+        steps = 1
+        while not frontier & target:
+            following = 0
+            for j in bits(frontier):
+                following |= self.materials[j]
+            frontier = following & ~seen
+            seen |= frontier
+            steps += 1
+        return steps
+
+    def final_products(self, item_id: Optional[str] = None) -> List[str]:
+        """不被任何配方使用的物品；指定 item_id 时只返回链条中用到它的"""
+        if item_id is None:
+            return self.items_of(self.final_mask)
+        return self.items_of(self._reach(item_id, self.consumers, self.downstream_masks, None) & self.final_mask)
+
+    # -- 忽略设备的影响 -------------------------------------------------------
+
+    def _evaluate(self, available: int, component_ids: Iterable[int], removed: FrozenSet[str], dead: int = 0) -> int:
+        """按拓扑顺序计算各分量中可以生产的物品；dead 是死锁循环中的物品，不能生产。
+
+        没有死锁的循环按稳态处理（与 RequirementSolver 相同）：循环内的物品互为原料，只要求循环外的原料可得；
+        分量内反复去掉没有可用配方的物品，剩下的就是能自我维持的部分。
+        """
+        for c in component_ids:
+            alive = self.component_masks[c] & ~dead
+            while alive:
+                reachable = available | alive
+                keep = 0
+                for i in bits(alive):
+                    for recipe_id in self._item_recipes[i]:
+                        if recipe_id not in removed and not self._recipe_materials[recipe_id] & ~reachable:
+                            keep |= 1 << i
+                            break
+                if keep == alive:
+                    break
+                alive = keep
+            available |= alive
+        return available
+
+    def device_recipes(self, device_ids: Iterable[str]) -> FrozenSet[str]:
+        """这些设备的所有配方（包括没有净产出的配方）"""
+        return frozenset(recipe_id for device_id in device_ids
+                         for recipe_id in self._graph_device_recipes.get(device_id, ()))
+
+    def graph_components_of(self, recipe_ids: Iterable[str]) -> Set[int]:
+        """这些配方的产物所在的物品图分量（graph.components 下标）"""
+        recipes = self.dag.graph.recipes
+        return {self._graph_component_of[product.item_id]
+                for recipe_id in recipe_ids for product in recipes[recipe_id].products}
+
+    def deadlocks(self, removed: FrozenSet[str], graph_components: Iterable[int]) -> int:
+        """去掉 removed 配方后，这些物品图分量中新出现的死锁循环中的物品（RecipeGraph._find_deadlocks 的规则）。
+
+        在分量内按剩余配方重新求强连通分量，没有任何物品存在原料全部在循环外的配方的循环就是死锁。
+        在这个索引中已经全部是基础原料的分量（如初始配方图中的死锁循环）不计入。
+        """
+        graph = self.dag.graph
+        dead = 0
+        for c in graph_components:
+            members = graph.components[c]
+            if not graph.is_cyclic(members) or not self.mask(members) & ~self.raw_mask:
+                continue
+            member_set = set(members)
+            adjacency = {}
+            for item_id in members:
+                targets = {}
+                for recipe_id in self._graph_producers.get(item_id, ()):
+                    if recipe_id not in removed:
+                        for material in graph.recipes[recipe_id].materials:
+                            if material.item_id in member_set:
+                                targets[material.item_id] = None
+                adjacency[item_id] = list(targets)
+            for group in strongly_connected_components(adjacency):
+                if len(group) == 1 and group[0] not in adjacency[group[0]]:
+                    continue
+                inside = set(group)
+                if not any(all(m.item_id not in inside for m in recipe.materials)
+                           for item_id in group for recipe in graph.as_products.get(item_id, [])
+                           if recipe.recipe_id not in removed):
+                    dead |= self.mask(group)
+        return dead
+
+    def unbuildable_if_ignored(self, device_ids: Iterable[str]) -> List[str]:
+        """再忽略这些设备后无法生产的物品（原本可以生产，失去了所有可用配方链或落入死锁循环）"""
+        removed = self.device_recipes(device_ids)
+        if not removed:
+            return []
+
+        dead = self.deadlocks(removed, self.graph_components_of(removed))
+        affected = dead
+        for recipe_id in removed:
+            affected |= self._recipe_products.get(recipe_id, 0)
+        if not affected:
+            return []
+        for i in bits(affected):
+            affected |= self.downstream_masks[i]
+
+        components = sorted({self.component_of[i] for i in bits(affected)})
+        buildable = self._evaluate((self.buildable_mask & ~affected) | self.raw_mask, components, removed, dead)
+        return self.items_of(self.buildable_mask & ~buildable)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """与 order 对齐：位集为十六进制字符串（第 i 位对应 order[i]）"""
+        return {
+            'upstream': [format(mask, 'x') for mask in self.upstream_masks],
+            'downstream': [format(mask, 'x') for mask in self.downstream_masks],
+            'height': self.height,
+        }
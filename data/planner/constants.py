@@ -0,0 +1,46 @@
+"""
+与网页端共用的常量
+
+数值以 web/src/utils/constants.ts 为准：导入时解析该文件，找不到文件或常量时使用下面的默认值。
+"""
+
+import re
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+ROOT_DIR = DATA_DIR.parent
+
+DATABASE_PATH = DATA_DIR / 'recipe_database.json'
+ITEM_LOOKUP_PATH = DATA_DIR / 'item_lookup.json'
+IGNORED_DEVICES_PATH = ROOT_DIR / 'web/public/data/overrides/ignored_devices.json'
+WEB_CONSTANTS_PATH = ROOT_DIR / 'web/src/utils/constants.ts'
+
+# recipeLoader.ts: manufacturingTime 缺失时按 2 秒计算
+DEFAULT_MANUFACTURING_TIME = Fraction(2)
+# dependencyTree.ts: buildDependencyTree 的 maxDepth
+MAX_DEPTH = 50
+
+_DEFAULTS = {
+    'TRANSFER_RATE_PER_PIPE': Fraction(1, 2),
+    'BASE_MATERIAL_EXTRACTION_RATE': Fraction(1, 2),
+}
+_CONSTANT_PATTERN = re.compile(r'export\s+const\s+([A-Z_]+)\s*=\s*([0-9.]+)\s*;')
+
+
+def load_web_constants(path: Path = WEB_CONSTANTS_PATH) -> Dict[str, Fraction]:
+    constants = dict(_DEFAULTS)
+    if path.exists():
+        for name, value in _CONSTANT_PATTERN.findall(path.read_text(encoding='utf-8')):
+            if name in constants:
+                constants[name] = Fraction(value)
+    return constants
+
+
+_WEB_CONSTANTS = load_web_constants()
+
+# 每条管道每秒传输的物品数
+TRANSFER_RATE_PER_PIPE = _WEB_CONSTANTS['TRANSFER_RATE_PER_PIPE']
+# 每个基础原料取料口每秒提供的物品数
+BASE_MATERIAL_EXTRACTION_RATE = _WEB_CONSTANTS['BASE_MATERIAL_EXTRACTION_RATE']
@@ -0,0 +1,151 @@
+"""
+去重的生产依赖图（网页端 buildDependencyTree 的共享节点版本）
+
+buildDependencyTree 为每个父节点重新展开原料子树，被多处使用的中间产物（如铁制零件）会被重复构建。
+ProductionDag 每个物品只有一个节点，子节点按物品 ID 引用共享节点，并为每个节点记忆化计算闭包数据：
+- recipes：可用配方（graph.producers，死锁循环中的物品没有配方），顺序与 asProducts 相同
+- children：所有可用配方的原料（去重，顺序与依赖树相同）
+- base：沿所有配方可达的基础原料（没有可用配方或被指定为基础原料的物品）
+- depth：到基础原料的最长制造链长度（基础原料为 0，一个循环算一步）
+- cycle：所在循环（强连通分量）的成员，不在循环中时为空
+
+闭包按强连通分量的拓扑顺序（原料在前）计算，每个分量只计算一次，分量内的物品共用同一份闭包。
+subgraph(target) 给出单个目标的去重子图；build_production_dag.py 把全局图写入 production_dag.json。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Any, Iterable, FrozenSet
+
+from .graph import RecipeGraph, Recipe, strongly_connected_components
+
+
+@dataclass(frozen=True)
+class DagNode:
+    item_id: str
+    name: str
+    recipes: List[Recipe]
+    children: List[str]
+    base: FrozenSet[str]
+    depth: int
+    cycle: FrozenSet[str]
+
+    @property
+    def is_base(self) -> bool:
+        return not self.recipes
+
+    def to_dict(self) -> Dict[str, Any]:
+        node = {
+            'name': self.name,
+            'recipes': [r.recipe_id for r in self.recipes],
+            'children': self.children,
+            'base': sorted(self.base, key=lambda i: (len(i), i)),
+            'depth': self.depth,
+        }
+        if self.cycle:
+            node['cycle'] = sorted(self.cycle, key=lambda i: (len(i), i))
+        return node
+
+
+class ProductionDag:
+    """所有物品的共享节点依赖图；base_items 与 Planner 相同，视为基础原料不再展开。
+
+    with_deadlocks=True 时死锁循环中的物品也保留 asProducts 中的配方（WhatIfEngine 按忽略设备自己判断死锁）。
+    """
+
+    def __init__(self, graph: RecipeGraph, base_items: Iterable[str] = (), with_deadlocks: bool = False):
+        self.graph = graph
+        self.base_items = frozenset(base_items)
+
+        self._recipes: Dict[str, List[Recipe]] = {}
+        adjacency: Dict[str, List[str]] = {}
+        for item_id in graph.adjacency:
+            if item_id in self.base_items:
+                recipes = []
+            elif with_deadlocks:
+                recipes = graph.as_products.get(item_id, [])
+            else:
+                recipes = graph.producers(item_id)
+            children: Dict[str, None] = {}
+            for recipe in recipes:
+                for material in recipe.materials:
+                    children.setdefault(material.item_id, None)
+            self._recipes[item_id] = recipes
+            adjacency[item_id] = list(children)
+
+        self.nodes: Dict[str, DagNode] = {}
+        self.order: List[str] = []  # 拓扑顺序，原料在前
+        # Tarjan 按逆拓扑顺序输出分量（后继先完成），正好是原料在前
+        for component in strongly_connected_components(adjacency):
+            self._close(component, adjacency)
+
+    def _close(self, component: List[str], adjacency: Dict[str, List[str]]):
+        members = frozenset(component)
+        cyclic = len(component) > 1 or component[0] in adjacency[component[0]]
+        base = set()
+        depth = 0
+        for item_id in component:
+            if not self._recipes[item_id]:
+                base.add(item_id)
+                continue
+            depth = max(depth, 1)
+            for child in adjacency[item_id]:
+                if child not in members:
+                    node = self.nodes[child]
+                    base |= node.base
+                    depth = max(depth, node.depth + 1)
+
+        base = frozenset(base)
+        cycle = members if cyclic else frozenset()
+        for item_id in component:
+            self.nodes[item_id] = DagNode(item_id, self.graph.name(item_id), self._recipes[item_id],
+                                          adjacency[item_id], base, depth, cycle)
+            self.order.append(item_id)
+
+    def __getitem__(self, item_id: str) -> DagNode:
+        return self.nodes[item_id]
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.nodes
+
+    def subgraph(self, target_id: str) -> List[DagNode]:
+        """target_id 依赖的所有节点（含自身），每个物品一次，按拓扑顺序（原料在前）"""
+        if target_id not in self.nodes:
+            # 不出现在任何可用配方中的物品只能作为基础原料
+            return [DagNode(target_id, self.graph.name(target_id), [], [], frozenset({target_id}), 0, frozenset())]
+        reachable = {target_id}
+        stack = [target_id]
+        while stack:
+            for child in self.nodes[stack.pop()].children:
+                if child not in reachable:
+                    reachable.add(child)
+                    stack.append(child)
+        return [self.nodes[item_id] for item_id in self.order if item_id in reachable]
+
+    def tree_size(self, target_id: str) -> int:
+        """buildDependencyTree 展开后的节点数（路径上重复出现的物品截断为叶子），用于和去重后的节点数比较"""
+        if target_id not in self.nodes:
+            return 1
+        sizes: Dict[str, int] = {}
+
+        def expand(item_id: str, path: FrozenSet[str]) -> int:
+            node = self.nodes[item_id]
+            if item_id in path:
+                return 1
+            # 不在循环中的物品，子树与到达它的路径无关，可以复用
+            if not node.cycle and item_id in sizes:
+                return sizes[item_id]
+            size = 1 + sum(expand(child, path | {item_id}) for child in node.children
+                           if child not in self.base_items)
+            if not node.cycle:
+                sizes[item_id] = size
+            return size
+
+        return expand(target_id, frozenset())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ignoredDevices': sorted(self.graph.ignored_devices),
+            'baseItems': sorted(self.base_items),
+            'order': self.order,
+            'nodes': {item_id: self.nodes[item_id].to_dict() for item_id in self.order},
+        }
@@ -0,0 +1,285 @@
+"""
+物品/配方图：加载 recipe_database.json，和网页端 recipeLoader.ts 使用相同的过滤规则
+
+- 忽略设备（overrides/ignored_devices.json）上的配方整体去掉
+- asProducts/asMaterials 只保留有净产出的配方（hasNetOutput）
+- cycle_groups：无法从外部进入的强连通分量（buildCycleGroups），其中的物品视为无法生产
+- components：物品图（产物 -> 原料）的强连通分量，按拓扑顺序排列（原料所在的分量在前）
+
+extract_recipe_database.py 用 cycle_analysis() 把分量、缩点图和死锁循环写入配方库的 cycleAnalysis；
+加载时忽略设备与其中记录的相同就直接使用，不再重新计算。
+databaseHash 是其余内容的哈希（database_hash()），网页端用它判断 plan_cache.json 是否对应当前配方库。
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, FrozenSet, Tuple
+
+from .constants import DATABASE_PATH, ITEM_LOOKUP_PATH, IGNORED_DEVICES_PATH, DEFAULT_MANUFACTURING_TIME
+
+
+@dataclass(frozen=True)
+class Ingredient:
+    item_id: str
+    name: str
+    count: Fraction
+
+
+@dataclass(frozen=True)
+class Recipe:
+    recipe_id: str
+    device_id: str
+    device_name: str
+    materials: Tuple[Ingredient, ...]
+    products: Tuple[Ingredient, ...]
+    time: Fraction  # 秒
+
+    def has_net_output(self) -> bool:
+        for product in self.products:
+            material = next((m for m in self.materials if m.item_id == product.item_id), None)
+            consumed = material.count if material else 0
+            if product.count - consumed > 0:
+                return True
+        return False
+
+    def product_count(self, item_id: str) -> Fraction:
+        """每次制造产出 item_id 的数量（与网页端相同：找不到时用第一个产物，<=0 时按 1）"""
+        entry = next((p for p in self.products if p.item_id == item_id), None)
+        if entry is None and self.products:
+            entry = self.products[0]
+        if entry is None or entry.count <= 0:
+            return Fraction(1)
+        return entry.count
+
+
+def parse_count(value: Any) -> Fraction:
+    if value is None or value == '':
+        return Fraction(0)
+    return Fraction(str(value))
+
+
+def parse_time(value: Any) -> Fraction:
+    # recipeLoader.ts: recipe.manufacturingTime || 2
+    if not value:
+        return DEFAULT_MANUFACTURING_TIME
+    return Fraction(str(value))
+
+
+def parse_recipe(recipe_id: str, data: Dict[str, Any]) -> Recipe:
+    def ingredients(entries):
+        return tuple(Ingredient(e['id'], e.get('name', ''), parse_count(e.get('count'))) for e in entries)
+
+    return Recipe(
+        recipe_id=recipe_id,
+        device_id=data['deviceId'],
+        device_name=data.get('deviceName', data['deviceId']),
+        materials=ingredients(data.get('materials', [])),
+        products=ingredients(data.get('products', [])),
+        time=parse_time(data.get('manufacturingTime')),
+    )
+
+
+def strongly_connected_components(adjacency: Dict[str, List[str]]) -> List[List[str]]:
+    """Tarjan（迭代实现，避免深图递归溢出）"""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in adjacency:
+        if root in index:
+            continue
+        work = [(root, iter(adjacency.get(root, ())))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, successors = work[-1]
+            advanced = False
+            for succ in successors:
+                if succ not in index:
+                    index[succ] = low[succ] = counter
+                    counter += 1
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(adjacency.get(succ, ()))))
+                    advanced = True
+                    break
+                if succ in on_stack:
+                    low[node] = min(low[node], index[succ])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+
+class RecipeGraph:
+    """一次构建、多次规划共用的配方图"""
+
+    def __init__(self, database: Dict[str, Any], ignored_devices: Iterable[str] = (),
+                 item_names: Optional[Dict[str, str]] = None):
+        self.ignored_devices = frozenset(ignored_devices)
+        self.recipes: Dict[str, Recipe] = {}
+        for recipe_id, data in database.get('recipes', {}).items():
+            if data.get('deviceId') in self.ignored_devices:
+                continue
+            self.recipes[recipe_id] = parse_recipe(recipe_id, data)
+
+        self.as_products = self._index(database.get('asProducts', {}))
+        self.as_materials = self._index(database.get('asMaterials', {}))
+
+        self.names: Dict[str, str] = dict(item_names or {})
+        for recipe in self.recipes.values():
+            for entry in recipe.materials + recipe.products:
+                if entry.name:
+                    self.names.setdefault(entry.item_id, entry.name)
+
+        self.adjacency = self._build_adjacency()
+        shipped = database.get('cycleAnalysis')
+        if shipped and set(shipped.get('ignoredDevices', [])) == self.ignored_devices:
+            self.components = [list(c) for c in shipped['components']]
+            deadlocks = shipped['cycleGroups']
+        else:
+            self.components = strongly_connected_components(self.adjacency)
+            deadlocks = self._find_deadlocks()
+        self.cycle_groups: Dict[str, FrozenSet[str]] = {}
+        for index in deadlocks:
+            members = frozenset(self.components[index])
+            for item_id in members:
+                self.cycle_groups[item_id] = members
+
+    def _index(self, source: Dict[str, List[str]]) -> Dict[str, List[Recipe]]:
+        index = {}
+        for key, recipe_ids in source.items():
+            recipes = [self.recipes[r] for r in recipe_ids if r in self.recipes]
+            recipes = [r for r in recipes if r.has_net_output()]
+            if recipes:
+                index[key] = recipes
+        return index
+
+    def _build_adjacency(self) -> Dict[str, List[str]]:
+        """产物 -> 原料（所有配方，和 buildItemAdjacency 相同）"""
+        adjacency: Dict[str, Dict[str, None]] = {}
+        for recipe in self.recipes.values():
+            for product in recipe.products:
+                targets = adjacency.setdefault(product.item_id, {})
+                for material in recipe.materials:
+                    adjacency.setdefault(material.item_id, {})
+                    targets[material.item_id] = None
+        return {item_id: list(targets) for item_id, targets in adjacency.items()}
+
+    def is_cyclic(self, component: List[str]) -> bool:
+        return len(component) > 1 or component[0] in self.adjacency.get(component[0], ())
+
+    def _find_deadlocks(self) -> List[int]:
+        """死锁循环在 components 中的下标"""
+        deadlocks = []
+        for index, component in enumerate(self.components):
+            if not self.is_cyclic(component):
+                continue
+            # 只要有一个物品存在全部原料都在分量外的配方，就能从外部进入，不算死锁
+            members = set(component)
+            safe = any(
+                all(m.item_id not in members for m in recipe.materials)
+                for item_id in component
+                for recipe in self.as_products.get(item_id, [])
+            )
+            if not safe:
+                deadlocks.append(index)
+        return deadlocks
+
+    @property
+    def topo_order(self) -> List[str]:
+        """所有物品的拓扑顺序：每个物品排在它的原料之后（同一循环中的物品相邻）"""
+        return [item_id for component in self.components for item_id in component]
+
+    def cycle_analysis(self) -> Dict[str, Any]:
+        """写入配方库的 cycleAnalysis：分量按拓扑顺序排列，condensation[i] 是分量 i 的原料所在分量（下标都小于 i）"""
+        component_of = {item_id: i for i, component in enumerate(self.components) for item_id in component}
+        condensation = []
+        for i, component in enumerate(self.components):
+            targets = {component_of[m] for item_id in component for m in self.adjacency.get(item_id, ())}
+            targets.discard(i)
+            condensation.append(sorted(targets))
+        deadlocks = set(self.cycle_groups.values())
+        return {
+            'ignoredDevices': sorted(self.ignored_devices),
+            'components': self.components,
+            'condensation': condensation,
+            'cyclic': [i for i, c in enumerate(self.components) if self.is_cyclic(c)],
+            'cycleGroups': [i for i, c in enumerate(self.components) if frozenset(c) in deadlocks],
+        }
+
+    def name(self, item_id: str) -> str:
+        return self.names.get(item_id) or f'物品 {item_id}'
+
+    def producers(self, item_id: str) -> List[Recipe]:
+        """可用于生产 item_id 的配方；死锁循环中的物品没有可用配方"""
+        if item_id in self.cycle_groups:
+            return []
+        return self.as_products.get(item_id, [])
+
+    def producible_items(self) -> List[str]:
+        return [item_id for item_id in self.as_products if item_id not in self.cycle_groups]
+
+    def resolve_item(self, query: str) -> Optional[str]:
+        """物品 ID 或名称 -> 物品 ID"""
+        if query in self.names or query in self.as_products:
+            return query
+        for item_id, name in self.names.items():
+            if name == query:
+                return item_id
+        return None
+
+
+def load_json(path: Path) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def database_hash(database: Dict[str, Any]) -> str:
+    """配方库内容哈希（不含 databaseHash 字段本身）：写入配方库，方案缓存和生产依赖图以它为键"""
+    content = {key: value for key, value in database.items() if key != 'databaseHash'}
+    payload = json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def load_ignored_devices(path: Path = IGNORED_DEVICES_PATH) -> List[str]:
+    if not path.exists():
+        return []
+    return load_json(path).get('ignoredDevices', [])
+
+
+def load_item_names(path: Path = ITEM_LOOKUP_PATH) -> Dict[str, str]:
+    if not path.exists():
+        return {}
+    return {item_id: item.get('name', '') for item_id, item in load_json(path).items()}
+
+
+def load_graph(database_path: Path = DATABASE_PATH,
+               ignored_devices: Optional[Iterable[str]] = None) -> RecipeGraph:
+    """ignored_devices 为 None 时使用网页端默认的忽略设备列表"""
+    if ignored_devices is None:
+        ignored_devices = load_ignored_devices()
+    return RecipeGraph(load_json(Path(database_path)), ignored_devices, load_item_names())
@@ -0,0 +1,248 @@
+"""
+配方化学计量矩阵和批量需求计算
+
+StoichiometryMatrix：物品 × 配方的稀疏矩阵（按配方列压缩存储），元素是每次制造的净产出
+（产物为正、原料为负），rates 是每台设备每秒的制造次数（1 / 制造时间）。安装了 scipy 时
+to_scipy() 返回 scipy.sparse.csc_matrix，否则只使用纯 Python 结构。
+
+RequirementSolver：对任意多个目标一次性求总需求（“整个工厂需要什么”）
+- 配方选择与 Planner 相同（每个物品制造时间最短的配方），基础原料规则也相同
+- 按所选配方构成的物品图的拓扑顺序（原料在前）为每个物品计算一次“每秒 1 个”的单位需求，
+  共享的子树只计算一次；多个目标的需求是单位需求的线性组合
+- 所选配方构成循环时（如种子 ↔ 作物），对该强连通分量解线性方程组 (I - A)x = e，得到稳态需求；
+  这和网页端在重复物品处截断并当作基础原料不同。方程组奇异（循环没有净产出）时该分量的物品按基础原料处理
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from .graph import RecipeGraph, Recipe, strongly_connected_components
+from .plan import Planner
+
+
+class StoichiometryMatrix:
+    """物品 × 配方稀疏矩阵（CSC：每列是一个配方的 (物品行, 净产出) 列表）"""
+
+    def __init__(self, graph: RecipeGraph):
+        self.recipes: List[Recipe] = list(graph.recipes.values())
+        self.recipe_index = {r.recipe_id: j for j, r in enumerate(self.recipes)}
+
+        items: Dict[str, None] = {}
+        for recipe in self.recipes:
+            for entry in recipe.materials + recipe.products:
+                items.setdefault(entry.item_id, None)
+        self.items: List[str] = list(items)
+        self.item_index = {item_id: i for i, item_id in enumerate(self.items)}
+
+        self.indptr = [0]
+        self.indices: List[int] = []
+        self.data: List[Fraction] = []
+        for recipe in self.recipes:
+            net: Dict[int, Fraction] = defaultdict(Fraction)
+            for product in recipe.products:
+                net[self.item_index[product.item_id]] += product.count
+            for material in recipe.materials:
+                net[self.item_index[material.item_id]] -= material.count
+            for row in sorted(net):
+                if net[row]:
+                    self.indices.append(row)
+                    self.data.append(net[row])
+            self.indptr.append(len(self.indices))
+
+        # 每台设备每秒的制造次数
+        self.rates: List[Fraction] = [1 / r.time for r in self.recipes]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.items), len(self.recipes)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    def column(self, recipe_id: str) -> Dict[str, Fraction]:
+        """配方每次制造的净产出：物品 -> 数量"""
+        j = self.recipe_index[recipe_id]
+        return {self.items[self.indices[k]]: self.data[k] for k in range(self.indptr[j], self.indptr[j + 1])}
+
+    def net_rates(self, devices: Dict[str, Fraction]) -> Dict[str, Fraction]:
+        """给定每个配方的设备数，各物品每秒的净产出（S · diag(rates) · x）"""
+        result: Dict[str, Fraction] = defaultdict(Fraction)
+        for recipe_id, count in devices.items():
+            j = self.recipe_index[recipe_id]
+            crafts = count * self.rates[j]
+            for k in range(self.indptr[j], self.indptr[j + 1]):
+                result[self.items[self.indices[k]]] += self.data[k] * crafts
+        return {item_id: value for item_id, value in result.items() if value}
+
+    def to_scipy(self):
+        """scipy.sparse.csc_matrix（浮点）；未安装 scipy 时抛出 ImportError"""
+        if sparse is None:
+            raise ImportError('to_scipy() 需要安装 scipy')
+        return sparse.csc_matrix(([float(v) for v in self.data], self.indices, self.indptr), shape=self.shape)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 可序列化的 CSC 结构（数量为分数字符串）"""
+        return {
+            'shape': list(self.shape),
+            'items': self.items,
+            'recipes': [r.recipe_id for r in self.recipes],
+            'indptr': self.indptr,
+            'indices': self.indices,
+            'data': [str(v) for v in self.data],
+            'rates': [str(v) for v in self.rates],
+        }
+
+
+@dataclass
+class Requirements:
+    """每秒的需求；crafts/devices 以配方 ID 为键"""
+    base: Dict[str, Fraction] = field(default_factory=lambda: defaultdict(Fraction))
+    crafts: Dict[str, Fraction] = field(default_factory=lambda: defaultdict(Fraction))
+    production: Dict[str, Fraction] = field(default_factory=lambda: defaultdict(Fraction))
+
+    def add(self, other: 'Requirements', factor: Fraction):
+        for target, source in ((self.base, other.base), (self.crafts, other.crafts),
+                               (self.production, other.production)):
+            for key, value in source.items():
+                target[key] += value * factor
+
+    def devices(self, graph: RecipeGraph) -> Dict[str, Fraction]:
+        return {recipe_id: crafts * graph.recipes[recipe_id].time for recipe_id, crafts in self.crafts.items()}
+
+
+def _solve_exact(matrix: List[List[Fraction]]) -> Optional[List[List[Fraction]]]:
+    """高斯-约当消元求逆；奇异时返回 None"""
+    n = len(matrix)
+    augmented = [row[:] + [Fraction(int(i == j)) for j in range(n)] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if augmented[r][col] != 0), None)
+        if pivot is None:
+            return None
+        augmented[col], augmented[pivot] = augmented[pivot], augmented[col]
+        p = augmented[col][col]
+        augmented[col] = [v / p for v in augmented[col]]
+        for r in range(n):
+            if r != col and augmented[r][col] != 0:
+                f = augmented[r][col]
+                augmented[r] = [a - f * b for a, b in zip(augmented[r], augmented[col])]
+    return [row[n:] for row in augmented]
+
+
+class RequirementSolver:
+    """所选配方上的批量需求计算；每个物品的单位需求只计算一次"""
+
+    def __init__(self, graph: RecipeGraph, base_items: Iterable[str] = ()):
+        self.graph = graph
+        self.planner = Planner(graph, base_items)
+        self.base_items = self.planner.base_items
+        self._units: Dict[str, Requirements] = {}
+
+    def recipe_for(self, item_id: str) -> Optional[Recipe]:
+        if item_id in self.base_items:
+            return None
+        return self.planner.selected_recipe(item_id)
+
+    def _consumption(self, item_id: str) -> Dict[str, Fraction]:
+        """生产 1 个 item_id 所消耗的原料（物品 -> 数量）"""
+        recipe = self.recipe_for(item_id)
+        crafts = 1 / recipe.product_count(item_id)
+        result: Dict[str, Fraction] = defaultdict(Fraction)
+        for material in recipe.materials:
+            result[material.item_id] += crafts * material.count
+        return result
+
+    def _components(self, roots: Iterable[str]) -> List[List[str]]:
+        """所选配方图（产物 -> 原料）的强连通分量，原料所在的分量在前"""
+        adjacency: Dict[str, List[str]] = {}
+        stack = list(roots)
+        while stack:
+            item_id = stack.pop()
+            if item_id in adjacency or item_id in self._units:
+                continue
+            recipe = self.recipe_for(item_id)
+            adjacency[item_id] = [m.item_id for m in recipe.materials] if recipe else []
+            stack.extend(adjacency[item_id])
+        # Tarjan 按逆拓扑顺序输出分量（后继先完成），正好是原料在前
+        return [c for c in strongly_connected_components(adjacency) if c[0] not in self._units]
+
+    def _local(self, item_id: str) -> Requirements:
+        """生产 1 个 item_id 本身（不含原料的上游）的需求"""
+        local = Requirements()
+        local.production[item_id] += 1
+        recipe = self.recipe_for(item_id)
+        if recipe is None:
+            local.base[item_id] += 1
+        else:
+            local.crafts[recipe.recipe_id] += 1 / recipe.product_count(item_id)
+        return local
+
+    def _resolve(self, component: List[str]):
+        members = set(component)
+        producible = [i for i in component if self.recipe_for(i) is not None]
+        if len(component) == 1 and (not producible or component[0] not in self._consumption(component[0])):
+            item_id = component[0]
+            unit = self._local(item_id)
+            if producible:
+                for material, amount in self._consumption(item_id).items():
+                    unit.add(self._units[material], amount)
+            self._units[item_id] = unit
+            return
+
+        # 循环：x = e_j + A x，A[i][k] = 生产 1 个 k 消耗的 i（都在分量内）
+        index = {item_id: n for n, item_id in enumerate(component)}
+        consumption = {item_id: self._consumption(item_id) for item_id in component}
+        identity_minus_a = [[Fraction(int(i == k)) for k in range(len(component))] for i in range(len(component))]
+        for k_item, materials in consumption.items():
+            for i_item, amount in materials.items():
+                if i_item in members:
+                    identity_minus_a[index[i_item]][index[k_item]] -= amount
+        inverse = _solve_exact(identity_minus_a)
+
+        if inverse is None:
+            # 循环没有净产出：分量内物品都作为基础原料
+            for item_id in component:
+                unit = Requirements()
+                unit.base[item_id] += 1
+                unit.production[item_id] += 1
+                self._units[item_id] = unit
+            return
+
+        # 每个成员自身的需求（本地制造 + 分量外原料）
+        own = {}
+        for item_id in component:
+            unit = self._local(item_id)
+            for material, amount in consumption[item_id].items():
+                if material not in members:
+                    unit.add(self._units[material], amount)
+            own[item_id] = unit
+        for j_item in component:
+            unit = Requirements()
+            for k_item in component:
+                x = inverse[index[k_item]][index[j_item]]
+                if x:
+                    unit.add(own[k_item], x)
+            self._units[j_item] = unit
+
+    def unit(self, item_id: str) -> Requirements:
+        """每秒生产 1 个 item_id 的总需求"""
+        if item_id not in self._units:
+            for component in self._components([item_id]):
+                self._resolve(component)
+        return self._units[item_id]
+
+    def solve(self, demands: Dict[str, Fraction]) -> Requirements:
+        """demands：物品 -> 每秒需求；返回所有目标合计的需求"""
+        for component in self._components(demands):
+            self._resolve(component)
+        total = Requirements()
+        for item_id, rate in demands.items():
+            total.add(self._units[item_id], Fraction(rate))
+        return total
@@ -0,0 +1,510 @@
+"""
+线性规划优化器：在所有可用配方中选择配方组合，而不是每个物品固定用制造时间最短的配方
+
+模型（目标产物 rate 个/秒）：
+- 变量：每个配方的设备数 x_r（可以是分数，integer=True 时为整数）、每种基础原料的取用速率 b_i、
+  每种物品的多余产出 s_i（副产物和溢出直接丢弃）
+- 物料平衡：对每种物品 Σ 净产出_r,i / 制造时间_r × x_r + b_i - s_i = 需求_i
+  配方按净产出计算，所以循环（A 需要 B、B 需要 A）和副产物不需要特殊处理
+- 可选上限：每种物品的总供给不超过 max_pipes 条管道（TRANSFER_RATE_PER_PIPE），
+  每种基础原料不超过 max_extraction 个取料口（BASE_MATERIAL_EXTRACTION_RATE）
+- 目标：devices（设备总数）或 base（基础原料总取用速率），另一项作为次要目标（字典序）
+
+基础原料和网页端相同：用户指定的物品、没有可用配方的物品和死锁循环中的物品。
+
+求解器：
+- highs：安装了 scipy 时使用 scipy.optimize.linprog（HiGHS，支持整数变量）
+- simplex：纯 Python 的两阶段单纯形法（Bland 规则，Fraction 精确计算），整数变量用分支定界
+"""
+
+import math
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import Dict, List, Any, Optional, Iterable, Sequence, Tuple
+
+try:
+    from scipy.optimize import linprog
+except ImportError:
+    linprog = None
+
+from .constants import TRANSFER_RATE_PER_PIPE, BASE_MATERIAL_EXTRACTION_RATE
+from .graph import RecipeGraph, Recipe
+from .plan import BaseMaterial, Connection, WAREHOUSE, OUTPUT
+
+OBJECTIVES = ('devices', 'base')
+SOLVERS = ('auto', 'simplex', 'highs')
+# 分支定界最多求解的子问题数，超过后返回已找到的最好整数解
+MAX_BRANCH_NODES = 2000
+# highs 的浮点解转换为分数时的最大分母
+FLOAT_DENOMINATOR = 10 ** 6
+
+Costs = Dict[int, Fraction]
+
+
+class OptimizationError(Exception):
+    """目标无法生产、约束无解或问题无界"""
+
+
+# -- 线性规划 ---------------------------------------------------------------
+
+
+@dataclass
+class LinearProgram:
+    """min c·x，s.t. 每行 Σ a_j x_j = b，x >= 0；不等式通过松弛变量转换为等式"""
+    names: List[str] = field(default_factory=list)
+    rows: List[Dict[int, Fraction]] = field(default_factory=list)
+    rhs: List[Fraction] = field(default_factory=list)
+
+    def variable(self, name: str) -> int:
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def equal(self, coefficients: Dict[int, Fraction], value: Fraction):
+        self.rows.append({j: Fraction(v) for j, v in coefficients.items() if v})
+        self.rhs.append(Fraction(value))
+
+    def at_most(self, coefficients: Dict[int, Fraction], value: Fraction):
+        slack = self.variable(f'slack{len(self.rows)}')
+        self.equal({**coefficients, slack: 1}, value)
+
+    def at_least(self, coefficients: Dict[int, Fraction], value: Fraction):
+        surplus = self.variable(f'surplus{len(self.rows)}')
+        self.equal({**coefficients, surplus: -1}, value)
+
+    def copy(self) -> 'LinearProgram':
+        return LinearProgram(list(self.names), list(self.rows), list(self.rhs))
+
+
+class _Tableau:
+    """稀疏单纯形表：每行是 {列: 系数}，基变量的列只在本行出现"""
+
+    def __init__(self, program: LinearProgram):
+        self.num_vars = len(program.names)
+        self.rows: List[Dict[int, Fraction]] = []
+        self.rhs: List[Fraction] = []
+        self.basis: List[int] = []
+        for k, (row, value) in enumerate(zip(program.rows, program.rhs)):
+            sign = -1 if value < 0 else 1
+            row = {j: sign * v for j, v in row.items()}
+            row[self.num_vars + k] = Fraction(1)  # 人工变量
+            self.rows.append(row)
+            self.rhs.append(sign * value)
+            self.basis.append(self.num_vars + k)
+
+    @staticmethod
+    def _subtract(target: Dict[int, Fraction], row: Dict[int, Fraction], factor: Fraction):
+        for j, v in row.items():
+            value = target.get(j, 0) - factor * v
+            if value:
+                target[j] = value
+            else:
+                target.pop(j, None)
+
+    def pivot(self, r: int, col: int, costs: Costs) -> Fraction:
+        """col 入基、第 r 行的基变量出基；同时更新约化成本，返回目标值的变化量"""
+        row = self.rows[r]
+        p = row[col]
+        if p != 1:
+            for j in row:
+                row[j] /= p
+            self.rhs[r] /= p
+
+        for k, other in enumerate(self.rows):
+            if k != r and col in other:
+                f = other[col]
+                self._subtract(other, row, f)
+                self.rhs[k] -= f * self.rhs[r]
+        self.basis[r] = col
+
+        f = costs.get(col)
+        if not f:
+            return Fraction(0)
+        self._subtract(costs, row, f)
+        return f * self.rhs[r]
+
+    def iterate(self, costs: Costs, value: Fraction) -> Fraction:
+        """Bland 规则迭代到最优；costs 是约化成本（原地更新），value 是当前目标值"""
+        while True:
+            entering = min((j for j, d in costs.items() if d < 0), default=None)
+            if entering is None:
+                return value
+            best = None
+            for r, row in enumerate(self.rows):
+                a = row.get(entering)
+                if a is not None and a > 0:
+                    key = (self.rhs[r] / a, self.basis[r])
+                    if best is None or key < best[0]:
+                        best = (key, r)
+            if best is None:
+                raise OptimizationError('线性规划无界')
+            value += self.pivot(best[1], entering, costs)
+
+    def drop_artificials(self):
+        """第一阶段之后：把仍在基中的人工变量换出（换不出的行是冗余约束），删除人工变量列"""
+        keep = []
+        for r, j in enumerate(self.basis):
+            if j >= self.num_vars:
+                col = min((c for c in self.rows[r] if c < self.num_vars), default=None)
+                if col is None:
+                    continue
+                self.pivot(r, col, {})
+            keep.append(r)
+        self.rows = [{j: v for j, v in self.rows[r].items() if j < self.num_vars} for r in keep]
+        self.rhs = [self.rhs[r] for r in keep]
+        self.basis = [self.basis[r] for r in keep]
+
+    def values(self) -> List[Fraction]:
+        result = [Fraction(0)] * self.num_vars
+        for r, j in enumerate(self.basis):
+            result[j] = self.rhs[r]
+        return result
+
+
+def simplex(program: LinearProgram, costs: Costs) -> Optional[Tuple[Fraction, List[Fraction]]]:
+    """两阶段单纯形法；无可行解时返回 None"""
+    tableau = _Tableau(program)
+
+    # 第一阶段：最小化人工变量之和
+    phase_one: Costs = {}
+    for row in tableau.rows:
+        for j, v in row.items():
+            if j < tableau.num_vars:
+                phase_one[j] = phase_one.get(j, 0) - v
+    phase_one = {j: v for j, v in phase_one.items() if v}
+    infeasibility = tableau.iterate(phase_one, sum(tableau.rhs, Fraction(0)))
+    if infeasibility > 0:
+        return None
+    tableau.drop_artificials()
+
+    # 第二阶段：用当前基表示原目标
+    reduced = {j: Fraction(c) for j, c in costs.items() if c}
+    value = Fraction(0)
+    for r, j in enumerate(tableau.basis):
+        c = costs.get(j)
+        if c:
+            value += c * tableau.rhs[r]
+            tableau._subtract(reduced, tableau.rows[r], c)
+    value = tableau.iterate(reduced, value)
+    return value, tableau.values()
+
+
+def _objective_value(costs: Costs, values: Sequence[Fraction]) -> Fraction:
+    return sum((c * values[j] for j, c in costs.items()), Fraction(0))
+
+
+def _solve_lexicographic(program: LinearProgram,
+                         objectives: Sequence[Costs]) -> Optional[Tuple[Tuple[Fraction, ...], List[Fraction]]]:
+    """依次最小化每个目标，前面目标固定为最优值"""
+    program = program.copy()
+    key = []
+    values = None
+    for costs in objectives:
+        result = simplex(program, costs)
+        if result is None:
+            return None
+        value, values = result
+        key.append(value)
+        program.equal(costs, value)
+    return tuple(key), values
+
+
+def solve_exact(program: LinearProgram, objectives: Sequence[Costs],
+                integer: Iterable[int] = ()) -> Tuple[Optional[List[Fraction]], bool]:
+    """纯 Python 求解；integer 中的变量用深度优先分支定界。返回 (解, 是否证明最优)"""
+    integer = sorted(integer)
+    best_key = None
+    best = None
+    stack: List[List[Tuple[int, bool, int]]] = [[]]  # (变量, 是否为上界, 界)
+    nodes = 0
+    while stack:
+        if nodes >= MAX_BRANCH_NODES:
+            return best, False
+        bounds = stack.pop()
+        nodes += 1
+
+        node = program.copy()
+        for j, upper, bound in bounds:
+            if upper:
+                node.at_most({j: 1}, bound)
+            else:
+                node.at_least({j: 1}, bound)
+        result = _solve_lexicographic(node, objectives)
+        if result is None:
+            continue
+        key, values = result
+        # 松弛问题的字典序最优值是该分支中任何整数解的下界
+        if best_key is not None and key >= best_key:
+            continue
+
+        fractional = next((j for j in integer if values[j].denominator != 1), None)
+        if fractional is None:
+            best_key, best = key, values[:len(program.names)]
+            continue
+        floor = math.floor(values[fractional])
+        stack.append(bounds + [(fractional, False, floor + 1)])
+        stack.append(bounds + [(fractional, True, floor)])
+    return best, True
+
+
+def solve_highs(program: LinearProgram, objectives: Sequence[Costs],
+                integer: Iterable[int] = ()) -> Tuple[Optional[List[Fraction]], bool]:
+    """scipy HiGHS 求解（浮点），结果转换为分数"""
+    n = len(program.names)
+    a_eq = [[float(row.get(j, 0)) for j in range(n)] for row in program.rows]
+    b_eq = [float(v) for v in program.rhs]
+    integrality = [0] * n
+    for j in integer:
+        integrality[j] = 1
+
+    a_ub: List[List[float]] = []
+    b_ub: List[float] = []
+    solution = None
+    for costs in objectives:
+        c = [float(costs.get(j, 0)) for j in range(n)]
+        result = linprog(c, A_ub=a_ub or None, b_ub=b_ub or None, A_eq=a_eq, b_eq=b_eq,
+                         bounds=(0, None), integrality=integrality, method='highs')
+        if result.status == 2:
+            return None, True
+        if result.status != 0:
+            raise OptimizationError(f'HiGHS 求解失败: {result.message}')
+        solution = result.x
+        a_ub.append(c)
+        b_ub.append(result.fun + 1e-9 * max(1.0, abs(result.fun)))
+
+    values = []
+    for j, x in enumerate(solution):
+        value = Fraction(round(x)) if integrality[j] else Fraction(x).limit_denominator(FLOAT_DENOMINATOR)
+        values.append(max(value, Fraction(0)))
+    return values, True
+
+
+def resolve_solver(solver: str = 'auto') -> str:
+    if solver not in SOLVERS:
+        raise ValueError(f'未知求解器: {solver}')
+    if solver == 'auto':
+        return 'highs' if linprog is not None else 'simplex'
+    if solver == 'highs' and linprog is None:
+        raise OptimizationError('highs 求解器需要安装 scipy')
+    return solver
+
+
+# -- 生产优化 ---------------------------------------------------------------
+
+
+@dataclass
+class RecipeRun:
+    recipe: Recipe
+    devices: Fraction
+
+    @property
+    def crafts_per_second(self) -> Fraction:
+        return self.devices / self.recipe.time
+
+
+@dataclass
+class Byproduct:
+    item_id: str
+    name: str
+    rate: Fraction  # 多余产出，个/秒
+
+
+@dataclass
+class OptimizedPlan:
+    objective: str
+    solver: str
+    target_id: str
+    target_name: str
+    output_rate: Fraction  # 个/秒
+    runs: List[RecipeRun]
+    base_materials: List[BaseMaterial]
+    byproducts: List[Byproduct]
+    # 物料流按供给比例分配：source 为配方 ID 或 WAREHOUSE，target 为配方 ID 或 OUTPUT
+    connections: List[Connection]
+    integer: bool = False
+    proven: bool = True  # 整数规划是否在 MAX_BRANCH_NODES 内证明了最优
+
+    @property
+    def total_devices(self) -> Fraction:
+        return sum((r.devices for r in self.runs), Fraction(0))
+
+    @property
+    def base_rate(self) -> Fraction:
+        return sum((m.rate for m in self.base_materials), Fraction(0))
+
+    @property
+    def extraction_ports(self) -> int:
+        return sum(math.ceil(m.rate / BASE_MATERIAL_EXTRACTION_RATE) for m in self.base_materials)
+
+    @property
+    def total_pipes(self) -> int:
+        return sum(c.pipes for c in self.connections)
+
+    def to_dict(self, exact: bool = False) -> Dict[str, Any]:
+        def number(value: Fraction):
+            if exact:
+                return str(value)
+            return int(value) if value.denominator == 1 else float(value)
+
+        return {
+            'objective': self.objective,
+            'solver': self.solver,
+            'integer': self.integer,
+            'proven': self.proven,
+            'targetProduct': {'id': self.target_id, 'name': self.target_name},
+            'outputRate': number(self.output_rate),
+            'totalDeviceCount': number(self.total_devices),
+            'baseMaterialRate': number(self.base_rate),
+            'extractionPorts': self.extraction_ports,
+            'pipeCount': self.total_pipes,
+            'recipes': [{
+                'recipeId': r.recipe.recipe_id,
+                'deviceId': r.recipe.device_id,
+                'deviceName': r.recipe.device_name,
+                'count': number(r.devices),
+                'craftsPerSecond': number(r.crafts_per_second),
+            } for r in self.runs],
+            'baseMaterials': [{'id': m.item_id, 'name': m.name, 'requiredRate': number(m.rate)}
+                              for m in self.base_materials],
+            'byproducts': [{'id': b.item_id, 'name': b.name, 'rate': number(b.rate)}
+                           for b in self.byproducts],
+            'connections': [{
+                'from': c.source,
+                'to': c.target,
+                'itemId': c.item_id,
+                'count': c.pipes,
+                'rate': number(c.rate),
+            } for c in self.connections],
+        }
+
+
+def net_rates(recipe: Recipe) -> Dict[str, Fraction]:
+    """每台设备每秒的净产出（负数为消耗），重复出现的原料/产物累加"""
+    rates: Dict[str, Fraction] = {}
+    for product in recipe.products:
+        rates[product.item_id] = rates.get(product.item_id, 0) + product.count / recipe.time
+    for material in recipe.materials:
+        rates[material.item_id] = rates.get(material.item_id, 0) - material.count / recipe.time
+    return rates
+
+
+class Optimizer:
+    """在同一个 RecipeGraph 上对多个目标求解配方组合"""
+
+    def __init__(self, graph: RecipeGraph, base_items: Iterable[str] = (), solver: str = 'auto'):
+        self.graph = graph
+        self.base_items = frozenset(base_items)
+        self.solver = resolve_solver(solver)
+
+    def _closure(self, target_id: str) -> Tuple[List[Recipe], List[str]]:
+        """目标上游可用的所有配方，以及这些配方涉及的全部物品（按发现顺序）"""
+        recipes: Dict[str, Recipe] = {}
+        items: Dict[str, None] = {target_id: None}
+        queue = [target_id]
+        seen = {target_id}
+        for item_id in queue:
+            if item_id in self.base_items:
+                continue
+            for recipe in self.graph.producers(item_id):
+                if recipe.recipe_id in recipes:
+                    continue
+                recipes[recipe.recipe_id] = recipe
+                for entry in recipe.products + recipe.materials:
+                    items.setdefault(entry.item_id, None)
+                for material in recipe.materials:
+                    if material.item_id not in seen:
+                        seen.add(material.item_id)
+                        queue.append(material.item_id)
+        return list(recipes.values()), list(items)
+
+    def _is_base(self, item_id: str) -> bool:
+        return item_id in self.base_items or not self.graph.producers(item_id)
+
+    def optimize(self, target_id: str, rate: Fraction = TRANSFER_RATE_PER_PIPE, objective: str = 'devices',
+                 integer: bool = False, max_pipes: Optional[int] = None,
+                 max_extraction: Optional[int] = None) -> OptimizedPlan:
+        """目标产物 rate 个/秒的最优配方组合"""
+        if objective not in OBJECTIVES:
+            raise ValueError(f'未知优化目标: {objective}')
+        if self._is_base(target_id):
+            raise OptimizationError(f'{self.graph.name(target_id)} 没有可用配方')
+        rate = Fraction(rate)
+
+        recipes, items = self._closure(target_id)
+        program = LinearProgram()
+        devices = {r.recipe_id: program.variable(f'x:{r.recipe_id}') for r in recipes}
+        base = {i: program.variable(f'b:{i}') for i in items if self._is_base(i)}
+        surplus = {i: program.variable(f's:{i}') for i in items}
+        rates = {r.recipe_id: net_rates(r) for r in recipes}
+
+        for item_id in items:
+            row = {devices[rid]: rr[item_id] for rid, rr in rates.items() if rr.get(item_id)}
+            supply = {j: v for j, v in row.items() if v > 0}
+            if item_id in base:
+                row[base[item_id]] = 1
+                supply[base[item_id]] = 1
+            row[surplus[item_id]] = -1
+            program.equal(row, rate if item_id == target_id else 0)
+            if max_pipes is not None:
+                program.at_most(supply, max_pipes * TRANSFER_RATE_PER_PIPE)
+
+        if max_extraction is not None:
+            for var in base.values():
+                program.at_most({var: 1}, max_extraction * BASE_MATERIAL_EXTRACTION_RATE)
+
+        device_costs = {j: Fraction(1) for j in devices.values()}
+        base_costs = {j: Fraction(1) for j in base.values()}
+        objectives = [device_costs, base_costs] if objective == 'devices' else [base_costs, device_costs]
+        solve = solve_highs if self.solver == 'highs' else solve_exact
+        values, proven = solve(program, objectives, devices.values() if integer else ())
+        if values is None:
+            raise OptimizationError(f'{self.graph.name(target_id)} 在当前约束下无可行方案')
+
+        runs = [RecipeRun(r, values[devices[r.recipe_id]]) for r in recipes if values[devices[r.recipe_id]] > 0]
+        base_materials = [BaseMaterial(i, self.graph.name(i), values[j]) for i, j in base.items() if values[j] > 0]
+        byproducts = [Byproduct(i, self.graph.name(i), values[j]) for i, j in surplus.items() if values[j] > 0]
+        connections = self._allocate(runs, base_materials, target_id, rate)
+        return OptimizedPlan(objective, self.solver, target_id, self.graph.name(target_id), rate,
+                             runs, base_materials, byproducts, connections, integer, proven)
+
+    @staticmethod
+    def _allocate(runs: List[RecipeRun], base_materials: List[BaseMaterial],
+                  target_id: str, rate: Fraction) -> List[Connection]:
+        """每种物品的供给按比例分给各个消费者（线性规划只给出总量，不给出具体连线）"""
+        suppliers: Dict[str, List[Tuple[str, Fraction]]] = {}
+        consumers: Dict[str, List[Tuple[str, Fraction]]] = {}
+        for run in runs:
+            for item_id, per_device in net_rates(run.recipe).items():
+                amount = per_device * run.devices
+                if amount > 0:
+                    suppliers.setdefault(item_id, []).append((run.recipe.recipe_id, amount))
+                elif amount < 0:
+                    consumers.setdefault(item_id, []).append((run.recipe.recipe_id, -amount))
+        for material in base_materials:
+            suppliers.setdefault(material.item_id, []).append((WAREHOUSE, material.rate))
+        consumers.setdefault(target_id, []).append((OUTPUT, rate))
+
+        connections = []
+        for item_id, demand in consumers.items():
+            sources = suppliers.get(item_id, [])
+            total = sum((amount for _, amount in sources), Fraction(0))
+            if total == 0:
+                continue
+            for source, supplied in sources:
+                for consumer, needed in demand:
+                    connections.append(Connection(source, consumer, item_id, supplied / total * needed))
+        return connections
+
+
+def optimize_all(graph: RecipeGraph, item_ids: Optional[Iterable[str]] = None, base_items: Iterable[str] = (),
+                 **options) -> Dict[str, OptimizedPlan]:
+    """批量优化；无可行方案的物品不出现在结果中"""
+    optimizer = Optimizer(graph, base_items, options.pop('solver', 'auto'))
+    if item_ids is None:
+        item_ids = graph.producible_items()
+    plans = {}
+    for item_id in item_ids:
+        try:
+            plans[item_id] = optimizer.optimize(item_id, **options)
+        except OptimizationError:
+            continue
+    return plans
@@ -0,0 +1,325 @@
+"""
+生产方案计算（网页端 efficiencyCalculator.ts / dependencyTree.ts 的 Python 实现）
+
+配方选择和需求传播与网页端一致，因此设备数量和基础原料速率与浏览器中的结果相同：
+- 每个物品选择制造时间最短的配方（相同时取第一个）
+- 从目标产物 1 个/分钟开始沿所选配方向下传播需求；用户指定的基础原料、当前路径上已出现的物品
+  （循环）、超过 MAX_DEPTH 的物品以及没有可用配方的物品都视为基础原料
+- 设备按产物分组：设备数 = 每分钟制造次数 × 制造时间 / 60
+
+所有数量都用 Fraction 精确计算，只在输出时转换为浮点数。三种方案：
+- efficiency：按所有分母的最小公倍数放大，使每组设备数都是整数（网页端的“最高效率方案”）
+- minimum：把 efficiency 缩放到最终产物设备为 1 台，其余设备向上取整（“最小规模方案”）
+- rate：给定目标产出速率（个/秒），设备数为精确分数
+
+connections 是实际的物料流：生产者（设备组或仓库）-> 消费者，附带速率和所需管道数
+（网页端目前每个输出只画一条固定速率的连线）。
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
+
+from .constants import TRANSFER_RATE_PER_PIPE, MAX_DEPTH
+from .graph import RecipeGraph, Recipe
+
+WAREHOUSE = 'warehouse'
+OUTPUT = 'output'
+
+
+@dataclass
+class UnitFlow:
+    """目标产物 1 个/分钟时的需求（每分钟）"""
+    requirements: Dict[str, Fraction] = field(default_factory=lambda: defaultdict(Fraction))
+    base: Dict[str, Fraction] = field(default_factory=lambda: defaultdict(Fraction))
+    crafts: Dict[str, Fraction] = field(default_factory=lambda: defaultdict(Fraction))
+    recipes: Dict[str, Recipe] = field(default_factory=dict)  # 按首次制造的顺序
+    # (来源, 消费设备组, 物品) -> 每分钟数量；来源为设备组的产物 ID 或 WAREHOUSE
+    edges: Dict[Tuple[str, str, str], Fraction] = field(default_factory=lambda: defaultdict(Fraction))
+    # 依赖树中出现过非基础节点的物品（网页端 selectedRecipes 的键），参与计算放大倍数
+    expandable: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class DevicePlan:
+    item_id: str
+    recipe: Recipe
+    count: Fraction
+    production_rate: Fraction  # 该组设备需要产出的 item_id 数量（个/秒）
+    inputs: List[Tuple[str, str]]  # (物品, 来源)
+    outputs: List[Tuple[str, str]]  # (物品, 去向)
+    overflow_rate: Fraction = Fraction(1)  # 最小规模方案中：实际设备数 / 所需设备数
+
+    @property
+    def has_overflow(self) -> bool:
+        return self.overflow_rate > 1
+
+
+@dataclass
+class Connection:
+    source: str  # 生产该物品的设备组（产物 ID）或 WAREHOUSE
+    target: str  # 消费该物品的设备组（产物 ID）
+    item_id: str
+    rate: Fraction  # 个/秒
+
+    @property
+    def pipes(self) -> int:
+        return math.ceil(self.rate / TRANSFER_RATE_PER_PIPE)
+
+
+@dataclass
+class BaseMaterial:
+    item_id: str
+    name: str
+    rate: Fraction  # 个/秒
+
+
+@dataclass
+class Plan:
+    kind: str  # 'efficiency' | 'minimum' | 'rate'
+    target_id: str
+    target_name: str
+    output_rate: Fraction  # 个/秒
+    devices: List[DevicePlan]
+    connections: List[Connection]
+    base_materials: List[BaseMaterial]
+    bottleneck: Optional[Dict[str, str]] = None
+
+    NAMES = {'efficiency': '最高效率生产方案', 'minimum': '最小规模方案', 'rate': '指定产速方案'}
+
+    @property
+    def name(self) -> str:
+        return self.NAMES[self.kind]
+
+    @property
+    def total_devices(self) -> Fraction:
+        return sum((d.count for d in self.devices), Fraction(0))
+
+    def to_dict(self, exact: bool = False) -> Dict[str, Any]:
+        """网页端 ProductionPlan 的形状；exact=True 时数量输出为 "分子/分母" 字符串"""
+        def number(value: Fraction):
+            if exact:
+                return str(value)
+            return int(value) if value.denominator == 1 else float(value)
+
+        return {
+            'type': self.kind,
+            'name': self.name,
+            'targetProduct': {'id': self.target_id, 'name': self.target_name},
+            'calculatedOutputRate': number(self.output_rate),
+            'devices': [{
+                'itemId': d.item_id,
+                'deviceId': d.recipe.device_id,
+                'deviceName': d.recipe.device_name,
+                'recipeId': d.recipe.recipe_id,
+                'count': number(d.count),
+                'productionRate': number(d.production_rate),
+                'inputs': [{'itemId': i, 'source': s} for i, s in d.inputs],
+                'outputs': [{'itemId': i, 'destination': s} for i, s in d.outputs],
+                **({'hasOverflow': True, 'overflowRate': number(d.overflow_rate)} if d.has_overflow else {}),
+            } for d in self.devices],
+            'totalDeviceCount': number(self.total_devices),
+            'bottleneck': self.bottleneck,
+            'connections': [{
+                'from': c.source,
+                'to': c.target,
+                'itemId': c.item_id,
+                'count': c.pipes,
+                'rate': number(c.rate),
+            } for c in self.connections],
+            'baseMaterials': [{'id': m.item_id, 'name': m.name, 'requiredRate': number(m.rate)}
+                              for m in self.base_materials],
+        }
+
+
+class Planner:
+    """在同一个 RecipeGraph 上规划任意多个目标；每个目标的单位需求只计算一次"""
+
+    def __init__(self, graph: RecipeGraph, base_items: Iterable[str] = ()):
+        self.graph = graph
+        self.base_items = frozenset(base_items)
+        self._selected: Dict[str, Optional[Recipe]] = {}
+        self._unit_flows: Dict[str, UnitFlow] = {}
+
+    # -- 配方选择 ---------------------------------------------------------
+
+    def selected_recipe(self, item_id: str) -> Optional[Recipe]:
+        """制造时间最短的配方（selectRecipesForEfficiency）"""
+        if item_id not in self._selected:
+            best = None
+            for recipe in self.graph.producers(item_id):
+                if best is None or recipe.time < best.time:
+                    best = recipe
+            self._selected[item_id] = best
+        return self._selected[item_id]
+
+    def _expandable_items(self, target_id: str) -> Set[str]:
+        """依赖树（沿所有配方展开）中以非基础节点出现过的物品"""
+        expandable = set()
+        depth = {target_id: 0}
+        queue = [target_id]
+        for item_id in queue:
+            if item_id in self.base_items or depth[item_id] >= MAX_DEPTH:
+                continue
+            producers = self.graph.producers(item_id)
+            if not producers:
+                continue
+            expandable.add(item_id)
+            for recipe in producers:
+                for material in recipe.materials:
+                    if material.item_id not in depth:
+                        depth[material.item_id] = depth[item_id] + 1
+                        queue.append(material.item_id)
+        return expandable
+
+    # -- 需求传播 ---------------------------------------------------------
+
+    def unit_flow(self, target_id: str) -> UnitFlow:
+        if target_id not in self._unit_flows:
+            flow = UnitFlow()
+            self._propagate(target_id, Fraction(1), frozenset(), 0, flow, None)
+            flow.expandable = self._expandable_items(target_id)
+            self._unit_flows[target_id] = flow
+        return self._unit_flows[target_id]
+
+    def _propagate(self, item_id: str, amount: Fraction, path: frozenset, depth: int,
+                   flow: UnitFlow, consumer: Optional[str]):
+        if amount == 0:
+            return
+        flow.requirements[item_id] += amount
+
+        is_base = item_id in self.base_items or item_id in path or depth >= MAX_DEPTH
+        recipe = None if is_base else self.selected_recipe(item_id)
+        if recipe is None:
+            flow.base[item_id] += amount
+            if consumer is not None:
+                flow.edges[(WAREHOUSE, consumer, item_id)] += amount
+            return
+
+        if consumer is not None:
+            flow.edges[(item_id, consumer, item_id)] += amount
+        crafts = amount / recipe.product_count(item_id)
+        flow.crafts[item_id] += crafts
+        flow.recipes.setdefault(item_id, recipe)
+
+        child_path = path | {item_id}
+        for material in recipe.materials:
+            self._propagate(material.item_id, crafts * material.count, child_path, depth + 1, flow, item_id)
+
+    # -- 方案 -------------------------------------------------------------
+
+    def _build_plan(self, kind: str, target_id: str, flow: UnitFlow, factor: Fraction) -> Plan:
+        """factor：目标产物每分钟产出数（单位需求的放大倍数）"""
+        per_second = factor / 60
+        sources: Dict[str, Dict[str, str]] = defaultdict(dict)
+        connections = []
+        for (source, consumer, item_id), amount in flow.edges.items():
+            sources[consumer].setdefault(item_id, source)
+            connections.append(Connection(source, consumer, item_id, amount * per_second))
+
+        devices = []
+        for item_id, recipe in flow.recipes.items():
+            count = flow.crafts[item_id] * recipe.time / 60 * factor
+            if count == 0:
+                continue
+            devices.append(DevicePlan(
+                item_id=item_id,
+                recipe=recipe,
+                count=count,
+                production_rate=flow.requirements[item_id] * per_second,
+                inputs=[(m.item_id, sources[item_id].get(m.item_id, WAREHOUSE))
+                        for m in recipe.materials],
+                outputs=[(p.item_id, OUTPUT if p.item_id == target_id else p.item_id)
+                         for p in recipe.products],
+            ))
+
+        base_materials = [BaseMaterial(item_id, self.graph.name(item_id), amount * per_second)
+                          for item_id, amount in flow.base.items() if amount > 0]
+
+        plan = Plan(kind, target_id, self.graph.name(target_id), per_second,
+                    devices, connections, base_materials)
+        plan.bottleneck = find_bottleneck(plan)
+        return plan
+
+    def efficiency_plan(self, target_id: str) -> Plan:
+        """所有设备数为整数的最小方案（calculateMaximumEfficiencyPlan）"""
+        flow = self.unit_flow(target_id)
+        denominators = [Fraction(1)]
+        denominators += [flow.crafts[i] * r.time / 60 for i, r in flow.recipes.items()]
+        denominators += flow.base.values()
+        denominators += [amount for i, amount in flow.requirements.items() if i in flow.expandable]
+        scale = 1
+        for value in denominators:
+            scale = math.lcm(scale, value.denominator)
+        return self._build_plan('efficiency', target_id, flow, Fraction(scale))
+
+    def rate_plan(self, target_id: str, rate: Fraction) -> Plan:
+        """目标产物 rate 个/秒时的精确方案"""
+        return self._build_plan('rate', target_id, self.unit_flow(target_id), Fraction(rate) * 60)
+
+    def minimum_plan(self, target_id: str, efficiency: Optional[Plan] = None) -> Plan:
+        """最终产物设备为 1 台、其余设备向上取整（calculateMinimumScalePlan）"""
+        efficiency = efficiency or self.efficiency_plan(target_id)
+        final = next((d for d in efficiency.devices if any(o == OUTPUT for _, o in d.outputs)), None)
+        if final is None or final.count == 0:
+            return Plan('minimum', efficiency.target_id, efficiency.target_name, efficiency.output_rate,
+                        efficiency.devices, efficiency.connections, efficiency.base_materials,
+                        efficiency.bottleneck)
+
+        factor = 1 / final.count
+        devices = []
+        for device in efficiency.devices:
+            exact = device.count * factor
+            rounded = Fraction(math.ceil(exact))
+            devices.append(DevicePlan(
+                item_id=device.item_id,
+                recipe=device.recipe,
+                count=rounded,
+                production_rate=device.production_rate * factor,
+                inputs=device.inputs,
+                outputs=device.outputs,
+                overflow_rate=rounded / exact,
+            ))
+        plan = Plan(
+            'minimum', efficiency.target_id, efficiency.target_name, efficiency.output_rate * factor,
+            devices,
+            [Connection(c.source, c.target, c.item_id, c.rate * factor) for c in efficiency.connections],
+            [BaseMaterial(m.item_id, m.name, m.rate * factor) for m in efficiency.base_materials],
+        )
+        plan.bottleneck = find_bottleneck(plan)
+        return plan
+
+    def plan(self, target_id: str, rate: Optional[Fraction] = None) -> Dict[str, Plan]:
+        """rate 为 None 时返回 efficiency + minimum，否则返回 rate 方案"""
+        if rate is not None:
+            return {'rate': self.rate_plan(target_id, rate)}
+        efficiency = self.efficiency_plan(target_id)
+        return {'efficiency': efficiency, 'minimum': self.minimum_plan(target_id, efficiency)}
+
+
+def find_bottleneck(plan: Plan) -> Optional[Dict[str, str]]:
+    """产出速率最低的设备组（不是最终产物设备时）"""
+    if not plan.devices:
+        return None
+    final = next((d for d in plan.devices if any(o == OUTPUT for _, o in d.outputs)), None)
+    if final is None:
+        return None
+    slowest = min(plan.devices, key=lambda d: d.production_rate)
+    if slowest is final:
+        return None
+    return {
+        'itemId': slowest.recipe.device_id,
+        'description': f"{slowest.recipe.device_name} 产能受限 ({float(slowest.production_rate):.2f} 个/秒)",
+    }
+
+
+def plan_all(graph: RecipeGraph, item_ids: Optional[Iterable[str]] = None,
+             base_items: Iterable[str] = (), rate: Optional[Fraction] = None) -> Dict[str, Dict[str, Plan]]:
+    """批量规划：默认规划所有可生产的物品。返回 itemId -> {方案类型: Plan}"""
+    planner = Planner(graph, base_items)
+    if item_ids is None:
+        item_ids = graph.producible_items()
+    return {item_id: planner.plan(item_id, rate) for item_id in item_ids}
+
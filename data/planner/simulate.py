@@ -0,0 +1,454 @@
+"""
+生产方案的离散事件仿真
+
+网页端和 Planner 只计算稳态配比，不考虑设备启动、缓存、管道容量和停工。Simulator 把一个 Plan（设备组、设备数、
+物料流）按配方的 manufacturingTime 逐次制造地模拟，事件按时间放在堆（heapq）中：
+
+- 设备组：count 台相同的设备，只记录空闲 / 制造中 / 产物积压的台数；同一时刻开工的设备合并为一个完成事件
+- 缓存：每个设备组每种原料一个输入缓存、每种需要输送的产物一个输出缓存，容量为 buffer_crafts 次制造的量 × 台数；
+  输出缓存满时制造完成的设备不能卸货（积压），输入缓存不够一次制造时设备空闲（缺料）
+- 管道：每条物料流有 pipes 条管道，每条每 1 / TRANSFER_RATE_PER_PIPE 秒输送 1 个（同一物料流的管道同步输送）；
+  仓库（基础原料）的供应量不限，只受管道数限制
+- 最终产物直接计入产出；最终产物同时被循环内的设备使用时，按计划产速从输出缓存取走，其余留给循环。
+  没有物料流接收的产物（副产物）计入多余产出后丢弃
+- 空闲的设备和管道不产生事件，只在相关缓存变化时被唤醒，因此数千台设备、数小时的仿真也只需数秒
+
+结果：稳态产出速率（最后四分之一时间）、整体平均速率、达到稳态的时间（此后每个窗口的产速都在稳态 ±5% 内）、
+每个缓存的平均 / 峰值 / 最终存量，以及每个设备组的利用率和停工时间（按缺少的原料和产物积压分别统计）。
+"""
+
+import bisect
+import heapq
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+
+from .constants import TRANSFER_RATE_PER_PIPE
+from .plan import Plan, DevicePlan, WAREHOUSE, OUTPUT
+
+BUFFER_CRAFTS = 2
+STEADY_TOLERANCE = 0.05
+EPSILON = 1e-9
+
+_CRAFT, _TRANSFER, _SAMPLE = 0, 1, 2
+
+
+class _Buffer:
+    """带时间加权平均的缓存"""
+    __slots__ = ('level', 'capacity', 'area', 'peak', 'last')
+
+    def __init__(self, capacity: float):
+        self.level = 0.0
+        self.capacity = capacity
+        self.area = 0.0
+        self.peak = 0.0
+        self.last = 0.0
+
+    def add(self, now: float, amount: float):
+        self.area += self.level * (now - self.last)
+        self.last = now
+        self.level += amount
+        if self.level > self.peak:
+            self.peak = self.level
+
+    def average(self, now: float) -> float:
+        if now <= 0:
+            return self.level
+        return (self.area + self.level * (now - self.last)) / now
+
+
+class _Link:
+    """一条物料流：source 为设备组（None 为仓库），target 为设备组（None 为最终产出）"""
+    __slots__ = ('source', 'target', 'item_id', 'batch', 'interval', 'next_free', 'scheduled', 'moved')
+
+    def __init__(self, source: Optional['_Group'], target: Optional['_Group'], item_id: str,
+                 batch: float, interval: float):
+        self.source = source
+        self.target = target
+        self.item_id = item_id
+        self.batch = batch
+        self.interval = interval
+        self.next_free = 0.0
+        self.scheduled = False
+        self.moved = 0.0
+
+
+class _Group:
+    __slots__ = ('device', 'count', 'time', 'needs', 'makes', 'inputs', 'outputs', 'sinks',
+                 'in_links', 'out_links', 'idle', 'busy', 'blocked', 'reason', 'last',
+                 'busy_time', 'blocked_time', 'starved', 'crafts')
+
+    def __init__(self, device: DevicePlan, count: int):
+        self.device = device
+        self.count = count
+        self.time = float(device.recipe.time)
+        # 数量为 0 的原料 / 产物（配方库中存在，如锦草软饮的锦草溶液）不消耗也不产出，Planner 也不为它连线
+        self.needs: Dict[str, float] = {}
+        for material in device.recipe.materials:
+            if float(material.count) > 0:
+                self.needs[material.item_id] = self.needs.get(material.item_id, 0.0) + float(material.count)
+        self.makes: Dict[str, float] = {}
+        for product in device.recipe.products:
+            if float(product.count) > 0:
+                self.makes[product.item_id] = self.makes.get(product.item_id, 0.0) + float(product.count)
+        self.inputs: Dict[str, _Buffer] = {}
+        self.outputs: Dict[str, _Buffer] = {}
+        self.sinks: Dict[str, str] = {}  # 不经缓存的产物 -> OUTPUT 或 'surplus'
+        self.in_links: Dict[str, List[_Link]] = {}
+        self.out_links: Dict[str, List[_Link]] = {}
+        self.idle = count
+        self.busy = 0
+        self.blocked = 0
+        self.reason: Optional[str] = None  # 空闲设备缺少的原料
+        self.last = 0.0
+        self.busy_time = 0.0
+        self.blocked_time = 0.0
+        self.starved: Dict[str, float] = {}
+        self.crafts = 0
+
+    def account(self, now: float):
+        elapsed = now - self.last
+        if elapsed > 0:
+            self.busy_time += self.busy * elapsed
+            self.blocked_time += self.blocked * elapsed
+            if self.idle and self.reason is not None:
+                self.starved[self.reason] = self.starved.get(self.reason, 0.0) + self.idle * elapsed
+        self.last = now
+
+
+@dataclass
+class GroupStats:
+    item_id: str
+    recipe_id: str
+    device_name: str
+    count: int
+    crafts: int
+    utilization: float  # 制造中的设备时间 / (台数 × 仿真时长)
+    blocked: float  # 产物积压的设备·秒
+    starved: Dict[str, float]  # 缺少的原料 -> 空闲的设备·秒
+
+    @property
+    def stalled(self) -> float:
+        return self.blocked + sum(self.starved.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'itemId': self.item_id,
+            'recipeId': self.recipe_id,
+            'deviceName': self.device_name,
+            'count': self.count,
+            'crafts': self.crafts,
+            'utilization': self.utilization,
+            'blocked': self.blocked,
+            'starved': self.starved,
+        }
+
+
+@dataclass
+class BufferStats:
+    group: str  # 设备组（产物 ID）
+    item_id: str
+    kind: str  # 'input' | 'output'
+    capacity: float
+    average: float
+    peak: float
+    final: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'group': self.group, 'itemId': self.item_id, 'kind': self.kind, 'capacity': self.capacity,
+                'average': self.average, 'peak': self.peak, 'final': self.final}
+
+
+@dataclass
+class SimulationResult:
+    target_id: str
+    duration: float
+    planned_rate: float  # 个/秒
+    output_rate: float  # 稳态产速（最后四分之一时间）
+    average_rate: float  # 整个仿真的平均产速
+    produced: float
+    steady_state_time: Optional[float]  # 秒；没有达到稳态时为 None
+    groups: List[GroupStats]
+    buffers: List[BufferStats]
+    surplus: Dict[str, float] = field(default_factory=dict)  # 副产物 -> 个
+    samples: List[Tuple[float, float]] = field(default_factory=list)  # (时间, 累计产出)
+    events: int = 0
+    wall_seconds: float = 0.0
+
+    def hotspots(self, limit: int = 5) -> List[GroupStats]:
+        """停工时间最多的设备组"""
+        ranked = sorted(self.groups, key=lambda g: -g.stalled)
+        return [g for g in ranked[:limit] if g.stalled > 0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'targetId': self.target_id,
+            'duration': self.duration,
+            'plannedRate': self.planned_rate,
+            'outputRate': self.output_rate,
+            'averageRate': self.average_rate,
+            'produced': self.produced,
+            'steadyStateTime': self.steady_state_time,
+            'surplus': self.surplus,
+            'groups': [g.to_dict() for g in self.groups],
+            'buffers': [b.to_dict() for b in self.buffers],
+            'hotspots': [g.item_id for g in self.hotspots()],
+            'samples': self.samples,
+            'events': self.events,
+        }
+
+
+class Simulator:
+    """对一个 Plan 做离散事件仿真；scale 把设备数和管道数同时放大（模拟多套相同的产线）"""
+
+    def __init__(self, plan: Plan, buffer_crafts: int = BUFFER_CRAFTS, scale: int = 1):
+        self.plan = plan
+        self.scale = scale
+        self.planned_rate = float(plan.output_rate) * scale
+        interval = float(1 / TRANSFER_RATE_PER_PIPE)
+
+        self.groups: Dict[str, _Group] = {}
+        for device in plan.devices:
+            count = math.ceil(device.count) * scale
+            if count > 0:
+                self.groups[device.item_id] = _Group(device, count)
+
+        self.links: List[_Link] = []
+        for conn in plan.connections:
+            target = self.groups.get(conn.target)
+            if target is None or conn.item_id not in target.needs:
+                continue
+            source = None if conn.source == WAREHOUSE else self.groups.get(conn.source)
+            if conn.source != WAREHOUSE and (source is None or conn.item_id not in source.makes):
+                continue
+            link = _Link(source, target, conn.item_id, float(conn.pipes * scale), interval)
+            self.links.append(link)
+            target.in_links.setdefault(conn.item_id, []).append(link)
+            if source is not None:
+                source.out_links.setdefault(conn.item_id, []).append(link)
+
+        for group in self.groups.values():
+            for item_id, need in group.needs.items():
+                group.inputs[item_id] = _Buffer(need * group.count * buffer_crafts)
+                if item_id not in group.in_links:
+                    # 计划中没有来源的原料（不应出现）：按一条管道从仓库供应
+                    link = _Link(None, group, item_id, float(scale), interval)
+                    self.links.append(link)
+                    group.in_links[item_id] = [link]
+            for item_id, amount in group.makes.items():
+                if item_id == plan.target_id and not group.out_links.get(item_id):
+                    group.sinks[item_id] = OUTPUT
+                elif group.out_links.get(item_id):
+                    group.outputs[item_id] = _Buffer(amount * group.count * buffer_crafts)
+                    if item_id == plan.target_id:
+                        # 最终产物也被循环使用：按计划产速取走，其余留在缓存中
+                        link = _Link(group, None, item_id, 1.0, 1 / self.planned_rate if self.planned_rate else math.inf)
+                        self.links.append(link)
+                        group.out_links[item_id].append(link)
+                else:
+                    group.sinks[item_id] = 'surplus'
+
+        self._queue: List[Tuple[float, int, int, Any]] = []
+        self._seq = 0
+        self.now = 0.0
+        self.produced = 0.0
+        self.surplus: Dict[str, float] = {}
+        self.events = 0
+
+    # -- 事件队列 -----------------------------------------------------------
+
+    def _schedule(self, when: float, kind: int, payload: Any):
+        self._seq += 1
+        heapq.heappush(self._queue, (when, self._seq, kind, payload))
+
+    def _wake_link(self, link: _Link):
+        if not link.scheduled:
+            link.scheduled = True
+            self._schedule(max(self.now, link.next_free), _TRANSFER, link)
+
+    # -- 设备组 -------------------------------------------------------------
+
+    def _try_start(self, group: _Group):
+        group.account(self.now)
+        if not group.idle:
+            return
+        startable = group.idle
+        missing = None
+        for item_id, need in group.needs.items():
+            possible = int(group.inputs[item_id].level / need + EPSILON)
+            if possible < startable:
+                startable = possible
+                missing = item_id
+        if startable > 0:
+            for item_id, need in group.needs.items():
+                group.inputs[item_id].add(self.now, -need * startable)
+                for link in group.in_links[item_id]:
+                    self._wake_link(link)
+            group.idle -= startable
+            group.busy += startable
+            self._schedule(self.now + group.time, _CRAFT, (group, startable))
+        group.reason = missing if group.idle else None
+
+    def _release(self, group: _Group):
+        """积压的设备尽量卸货"""
+        group.account(self.now)
+        unload = group.blocked
+        for item_id, buffer in group.outputs.items():
+            amount = group.makes[item_id]
+            unload = min(unload, int((buffer.capacity - buffer.level) / amount + EPSILON))
+        if unload <= 0:
+            return
+        for item_id, amount in group.makes.items():
+            total = amount * unload
+            sink = group.sinks.get(item_id)
+            if sink == OUTPUT:
+                self.produced += total
+            elif sink is not None:
+                self.surplus[item_id] = self.surplus.get(item_id, 0.0) + total
+            else:
+                group.outputs[item_id].add(self.now, total)
+                for link in group.out_links[item_id]:
+                    self._wake_link(link)
+        group.blocked -= unload
+        group.idle += unload
+
+    def _craft_done(self, group: _Group, finished: int):
+        group.account(self.now)
+        group.busy -= finished
+        group.blocked += finished
+        group.crafts += finished
+        self._release(group)
+        self._try_start(group)
+
+    def _transfer(self, link: _Link):
+        link.scheduled = False
+        source = link.source.outputs[link.item_id] if link.source is not None else None
+        target = link.target.inputs[link.item_id] if link.target is not None else None
+        amount = link.batch
+        if source is not None:
+            amount = min(amount, math.floor(source.level + EPSILON))
+        if target is not None:
+            amount = min(amount, math.floor(target.capacity - target.level + EPSILON))
+        if amount <= 0:
+            return  # 等待来源或目标缓存变化时再唤醒
+
+        link.moved += amount
+        link.next_free = self.now + link.interval
+        if source is not None:
+            source.add(self.now, -amount)
+        if target is not None:
+            target.add(self.now, amount)
+        else:
+            self.produced += amount
+        if link.source is not None:
+            self._release(link.source)
+            self._try_start(link.source)
+        if link.target is not None:
+            self._try_start(link.target)
+        self._wake_link(link)
+
+    # -- 运行 ---------------------------------------------------------------
+
+    def run(self, duration: float, sample_interval: Optional[float] = None) -> SimulationResult:
+        """从所有缓存为空开始仿真 duration 秒"""
+        started = time.perf_counter()
+        longest = max((g.time for g in self.groups.values()), default=1.0)
+        sample_interval = sample_interval or max(1.0, longest)
+        samples = [(0.0, 0.0)]
+
+        for link in self.links:
+            if link.source is None:
+                self._wake_link(link)
+        for group in self.groups.values():
+            self._try_start(group)
+        self._schedule(sample_interval, _SAMPLE, None)
+
+        queue = self._queue
+        while queue and queue[0][0] <= duration:
+            self.now, _, kind, payload = heapq.heappop(queue)
+            self.events += 1
+            if kind == _CRAFT:
+                self._craft_done(*payload)
+            elif kind == _TRANSFER:
+                self._transfer(payload)
+            else:
+                samples.append((self.now, self.produced))
+                self._schedule(self.now + sample_interval, _SAMPLE, None)
+        self.now = duration
+        if samples[-1][0] < duration:
+            samples.append((duration, self.produced))
+
+        for group in self.groups.values():
+            group.account(duration)
+        result = SimulationResult(
+            target_id=self.plan.target_id,
+            duration=duration,
+            planned_rate=self.planned_rate,
+            output_rate=_rate_between(samples, duration * 3 / 4, duration),
+            average_rate=self.produced / duration if duration else 0.0,
+            produced=self.produced,
+            steady_state_time=_steady_state_time(samples, max(60.0, 10 * longest)),
+            groups=[GroupStats(
+                item_id=item_id,
+                recipe_id=g.device.recipe.recipe_id,
+                device_name=g.device.recipe.device_name,
+                count=g.count,
+                crafts=g.crafts,
+                utilization=g.busy_time / (g.count * duration) if duration else 0.0,
+                blocked=g.blocked_time,
+                starved=g.starved,
+            ) for item_id, g in self.groups.items()],
+            buffers=[BufferStats(item_id, buffer_item, kind, buffer.capacity, buffer.average(duration),
+                                 buffer.peak, buffer.level)
+                     for item_id, g in self.groups.items()
+                     for kind, buffers in (('input', g.inputs), ('output', g.outputs))
+                     for buffer_item, buffer in buffers.items()],
+            surplus=self.surplus,
+            samples=samples,
+            events=self.events,
+        )
+        result.wall_seconds = time.perf_counter() - started
+        return result
+
+
+def _produced_at(samples: List[Tuple[float, float]], moment: float) -> float:
+    """累计产出在 moment 时的值（样本之间线性插值）"""
+    k = bisect.bisect_left(samples, (moment, -math.inf))
+    if k >= len(samples):
+        return samples[-1][1]
+    at, produced = samples[k]
+    if k == 0 or at == moment:
+        return produced
+    before, produced_before = samples[k - 1]
+    return produced_before + (produced - produced_before) * (moment - before) / (at - before)
+
+
+def _rate_between(samples: List[Tuple[float, float]], start: float, end: float) -> float:
+    if end <= start:
+        return 0.0
+    return (_produced_at(samples, end) - _produced_at(samples, start)) / (end - start)
+
+
+def _steady_state_time(samples: List[Tuple[float, float]], window: float) -> Optional[float]:
+    """此后每个长度为 window 的窗口的产速都在最终产速 ±STEADY_TOLERANCE 内的最早时间（窗口起点）"""
+    end = samples[-1][0]
+    if end < 2 * window:
+        return None
+    final = _rate_between(samples, end * 3 / 4, end)
+    if final <= 0:
+        return None
+    steady = None
+    for moment, _ in reversed(samples):
+        if moment < window:
+            break
+        rate = _rate_between(samples, moment - window, moment)
+        if abs(rate - final) > STEADY_TOLERANCE * final:
+            break
+        steady = moment - window
+    return steady
+
+
+def simulate(plan: Plan, duration: float = 3600.0, buffer_crafts: int = BUFFER_CRAFTS,
+             scale: int = 1) -> SimulationResult:
+    return Simulator(plan, buffer_crafts, scale).run(duration)
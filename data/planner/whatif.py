@@ -0,0 +1,217 @@
+"""
+忽略设备 / 基础原料的假设分析
+
+网页端在加载配方时按忽略设备过滤（recipeLoader.getIgnoredDevices），每次修改都要清空缓存、重建所有索引。
+WhatIfEngine 在包含所有设备的配方图上建一次索引，之后修改忽略设备或自定义基础原料只重新计算受影响的部分：
+- 配方按编号存为位集，每个设备预先计算自己的配方位集；切换设备只改变这些配方
+- 受影响的物品 = 这些配方的产物（或改动的基础原料）及其 downstream（ClosureIndex），
+  只有它们所在的强连通分量按拓扑顺序重新计算，其余物品保持原状态
+
+每个物品的状态（与网页端规则相同）：
+- 自定义基础原料、不出现在任何配方产物中的原料、没有未忽略配方的物品、死锁循环中的物品都是基础原料，从仓库取用，成本为 1；
+  死锁按 RecipeGraph._find_deadlocks / 网页端 buildCycleGroups 的规则判断：索引保留死锁物品的配方，切换设备时在这些
+  设备的配方产物所在的物品图分量内按未忽略的配方重新求强连通分量，没有外部入口的循环是死锁
+- 其余物品用 cost 最低的配方（recipe）生产；cost 是每生产 1 个消耗的基础原料总数，只计所选配方的原料，
+  副产物不抵扣；相同时取制造时间最短、再按 asProducts 顺序
+- craftable：由配方生产（不是基础原料）的物品
+
+成本从 +inf 开始反复松弛；不是死锁、但所选配方中没有外部入口的循环（如种子 ↔ 作物，外部入口在物品图的同一分量中）
+再从 0 开始松弛，收敛到最低的稳态成本。
+循环没有净产出时成本不收敛，这些物品和死锁循环一样当作基础原料（与 RequirementSolver 把奇异的循环当作基础原料一致）。
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Set
+
+from .closure import ClosureIndex, bits
+from .dag import ProductionDag
+from .graph import RecipeGraph, Recipe
+
+MAX_RELAXATIONS = 1000
+TOLERANCE = 1e-12
+INFINITY = float('inf')
+
+
+class WhatIfEngine:
+    """在完整配方图上增量计算忽略设备、自定义基础原料后的可生产物品和最低成本配方"""
+
+    def __init__(self, graph: RecipeGraph, ignored_devices: Iterable[str] = (), base_items: Iterable[str] = ()):
+        if graph.ignored_devices:
+            raise ValueError('WhatIfEngine 需要包含所有设备的配方图（load_graph(ignored_devices=())）')
+        self.graph = graph
+        self.closure = ClosureIndex(ProductionDag(graph, with_deadlocks=True))
+        index = self.closure.index
+        n = len(self.closure.items)
+
+        # 配方编号：recipes[k] 的第 k 位；每个物品的配方（asProducts 顺序）、每个设备的配方位集
+        self.recipes: List[Recipe] = []
+        recipe_index: Dict[str, int] = {}
+        self._item_recipes: List[List[int]] = [[] for _ in range(n)]
+        self._recipe_products: List[int] = []
+        for i, item_id in enumerate(self.closure.items):
+            for recipe in self.closure.dag.nodes[item_id].recipes:
+                k = recipe_index.get(recipe.recipe_id)
+                if k is None:
+                    k = recipe_index[recipe.recipe_id] = len(self.recipes)
+                    self.recipes.append(recipe)
+                    self._recipe_products.append(0)
+                self._item_recipes[i].append(k)
+                self._recipe_products[k] |= 1 << i
+        self._recipe_materials = [self.closure.mask(m.item_id for m in r.materials) for r in self.recipes]
+        self._recipe_inputs = [[(index[m.item_id], float(m.count)) for m in r.materials] for r in self.recipes]
+        self._output = [{i: float(self.recipes[k].product_count(self.closure.items[i])) for i in bits(products)}
+                        for k, products in enumerate(self._recipe_products)]
+        self.device_masks: Dict[str, int] = {}
+        for k, recipe in enumerate(self.recipes):
+            self.device_masks[recipe.device_id] = self.device_masks.get(recipe.device_id, 0) | (1 << k)
+
+        self.ignored_devices: Set[str] = set()
+        self.base_items: Set[str] = set()
+        self._disabled = 0
+        self._base_mask = 0
+        self._dead = self.closure.deadlocks(frozenset(), range(len(graph.components)))
+        self.craftable_mask = 0
+        self.costs: List[float] = [1.0] * n
+        self.choices: List[Optional[int]] = [None] * n
+        self._recompute(range(len(self.closure.components)))
+        self.update(ignored_devices, base_items)
+
+    # -- 修改 ---------------------------------------------------------------
+
+    def update(self, ignored_devices: Optional[Iterable[str]] = None,
+               base_items: Optional[Iterable[str]] = None) -> List[str]:
+        """设置忽略设备和/或自定义基础原料（None 表示不变），返回可生产状态或最低成本配方变化的物品"""
+        affected = 0
+        if ignored_devices is not None:
+            ignored_devices = set(ignored_devices)
+            toggled = ignored_devices ^ self.ignored_devices
+            for device_id in toggled:
+                recipes = self.device_masks.get(device_id, 0)
+                self._disabled ^= recipes
+                for k in bits(recipes):
+                    affected |= self._recipe_products[k]
+            self.ignored_devices = ignored_devices
+            if toggled:
+                # 这些设备的配方所在的物品图分量重新判断死锁
+                components = self.closure.graph_components_of(self.closure.device_recipes(toggled))
+                scope = self.closure.mask(item_id for c in components for item_id in self.graph.components[c])
+                dead = self.closure.deadlocks(self.closure.device_recipes(ignored_devices), components)
+                affected |= (self._dead ^ dead) & scope
+                self._dead = (self._dead & ~scope) | dead
+        if base_items is not None:
+            base_items = set(base_items)
+            changed = self.closure.mask(base_items ^ self.base_items)
+            self._base_mask ^= changed
+            affected |= changed
+            self.base_items = base_items
+        if not affected:
+            return []
+
+        for i in bits(affected):
+            affected |= self.closure.downstream_masks[i]
+        before = {i: (bool(self.craftable_mask >> i & 1), self.choices[i]) for i in bits(affected)}
+        self._recompute(sorted({self.closure.component_of[i] for i in bits(affected)}))
+        return [self.closure.items[i] for i, state in before.items()
+                if state != (bool(self.craftable_mask >> i & 1), self.choices[i])]
+
+    def ignore(self, device_id: str) -> List[str]:
+        return self.update(ignored_devices=self.ignored_devices | {device_id})
+
+    def restore(self, device_id: str) -> List[str]:
+        return self.update(ignored_devices=self.ignored_devices - {device_id})
+
+    # -- 计算 ---------------------------------------------------------------
+
+    def _recipe_cost(self, k: int, i: int) -> float:
+        return sum(count * self.costs[m] for m, count in self._recipe_inputs[k] if count) / self._output[k][i]
+
+    def _enabled(self, i: int) -> List[int]:
+        return [k for k in self._item_recipes[i] if not self._disabled >> k & 1]
+
+    def _recompute(self, component_ids: Iterable[int]):
+        raw = self.closure.raw_mask | self._base_mask | self._dead
+        for c in component_ids:
+            members = self.closure.component_masks[c]
+            supplied = members & raw
+            for i in bits(members & ~supplied):
+                if not self._enabled(i):
+                    supplied |= 1 << i
+
+            while True:
+                pending = members & ~supplied
+                for i in bits(members):
+                    self.costs[i] = 1.0 if supplied >> i & 1 else INFINITY
+                    self.choices[i] = None
+                self._relax(pending)
+                stuck = sum(1 << i for i in bits(pending) if self.costs[i] == INFINITY)
+                if not stuck:
+                    break
+                # 没有外部入口的循环：从 0 开始求稳态成本，不收敛的物品当作基础原料
+                for i in bits(stuck):
+                    self.costs[i] = 0.0
+                failed = self._relax(stuck)
+                if not failed:
+                    break
+                supplied |= failed
+
+            self.craftable_mask = (self.craftable_mask & ~members) | (members & ~supplied)
+
+    def _relax(self, mask: int) -> int:
+        """反复用最低成本的配方更新 mask 中物品的成本，返回最后一轮仍在变化的物品"""
+        members = list(bits(mask))
+        candidates = {i: self._enabled(i) for i in members}
+        changed = 0
+        for _ in range(MAX_RELAXATIONS):
+            changed = 0
+            for i in members:
+                # 成本相同时保留当前配方，避免循环内的配方替换掉进入循环的配方
+                best = None
+                current = self.choices[i]
+                for k in ([current] if current is not None else []) + candidates[i]:
+                    cost = self._recipe_cost(k, i)
+                    key = (round(cost, 9), self.recipes[k].time)
+                    if best is None or key < best[0]:
+                        best = (key, cost, k)
+                _, cost, k = best
+                if cost != self.costs[i] and not abs(cost - self.costs[i]) <= TOLERANCE * max(1.0, cost):
+                    changed |= 1 << i
+                self.costs[i] = cost
+                self.choices[i] = k if cost < INFINITY else None
+            if not changed:
+                break
+        return changed
+
+    # -- 查询 ---------------------------------------------------------------
+
+    def craftable(self, item_id: str) -> bool:
+        i = self.closure.index.get(item_id)
+        return i is not None and bool(self.craftable_mask >> i & 1)
+
+    def craftable_items(self) -> List[str]:
+        return self.closure.items_of(self.craftable_mask)
+
+    def cheapest(self, item_id: str) -> Optional[Recipe]:
+        i = self.closure.index.get(item_id)
+        if i is None or self.choices[i] is None:
+            return None
+        return self.recipes[self.choices[i]]
+
+    def cost(self, item_id: str) -> float:
+        """每个 item_id 消耗的基础原料总数（基础原料为 1）"""
+        i = self.closure.index.get(item_id)
+        if i is None:
+            return 1.0
+        return self.costs[i]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ignoredDevices': sorted(self.ignored_devices),
+            'baseItems': sorted(self.base_items),
+            'items': {
+                item_id: {
+                    'craftable': bool(self.craftable_mask >> i & 1),
+                    'cost': round(self.costs[i], 9),
+                    'recipe': self.recipes[self.choices[i]].recipe_id if self.choices[i] is not None else None,
+                }
+                for i, item_id in enumerate(self.closure.items)
+            },
+        }
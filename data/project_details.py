@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+把 item_details 的原始 API 响应投影为前端详情页使用的精简格式（由 publish.py 调用，也可单独运行查看效果）
+
+投影格式：
+    {itemId, name, mainType, subType, cover, description: Block[], document: Block[]}
+
+- description 为 brief.description，document 为 documentMap 中的第一篇文档（详情页只显示这一篇）
+- 只保留 DocumentRenderer 渲染的块：text / list / horizontalLine / table / quote，丢弃布局属性和其他元数据
+- blockIds/blockMap 展平为按显示顺序排列的块数组，列表项、引用和表格单元格直接内嵌子块，
+  前端不再需要按 id 查 blockMap
+- 表格单元格在这里解析（cellMap 或 parentId 两种形式，与 detail_parser.py 相同），被合并单元格覆盖的格子省略
+
+单独运行（仓库根目录）：列出原始文件最大的若干物品，对比投影前后的大小和解析时间
+    python3 data/project_details.py [--top N]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from update_image_paths import local_image_path
+
+
+DETAILS_SOURCE_DIR = Path('data/item_details')
+DEFAULT_TOP = 10
+
+
+def project_inline(element: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    kind = element.get('kind')
+    if kind == 'text':
+        inline = {'kind': 'text', 'text': element.get('text', {}).get('text', '')}
+        if element.get('bold'):
+            inline['bold'] = True
+        if element.get('color'):
+            inline['color'] = element['color']
+        return inline
+    if kind == 'entry':
+        entry = element.get('entry', {})
+        return {'kind': 'entry', 'id': entry.get('id', ''), 'count': entry.get('count', '0')}
+    # pronunciation 等不渲染
+    return None
+
+
+class DocumentProjector:
+    """投影一篇文档（一个 blockMap）。每个块最多输出一次，防止异常数据中的循环引用"""
+
+    def __init__(self, block_map: Dict[str, Dict[str, Any]]):
+        self.block_map = block_map
+        self.visited = set()
+        self._children_index = None
+
+    def children_of(self, parent_id: str) -> List[str]:
+        if self._children_index is None:
+            self._children_index = {}
+            for block_id, block in self.block_map.items():
+                if block.get('parentId'):
+                    self._children_index.setdefault(block['parentId'], []).append(block_id)
+        return self._children_index.get(parent_id, [])
+
+    def blocks(self, block_ids: List[str]) -> List[Dict[str, Any]]:
+        result = []
+        for block_id in block_ids:
+            block = self.block(block_id)
+            if block is not None:
+                result.append(block)
+        return result
+
+    def block(self, block_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.block_map.get(block_id)
+        if raw is None or block_id in self.visited:
+            return None
+        self.visited.add(block_id)
+
+        kind = raw.get('kind')
+        if kind == 'text':
+            return self.text(raw)
+        if kind == 'list':
+            return self.list(raw.get('list', {}))
+        if kind == 'horizontalLine':
+            return {'kind': 'horizontalLine'}
+        if kind == 'table':
+            return self.table(raw.get('table', {}))
+        if kind == 'quote':
+            return {'kind': 'quote', 'blocks': self.blocks(raw.get('quote', {}).get('childIds', []))}
+        return None
+
+    def text(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        block = {'kind': 'text'}
+        if raw.get('align') in ('center', 'right'):
+            block['align'] = raw['align']
+        inlines = [project_inline(e) for e in raw.get('text', {}).get('inlineElements', [])]
+        block['inlines'] = [i for i in inlines if i is not None]
+        return block
+
+    def list(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        # 列表类型在 list.kind 中（ordered/unordered）；另一种格式直接用 blockIds，每个子块是一项
+        if 'itemIds' in raw:
+            item_map = raw.get('itemMap', {})
+            items = [self.blocks(item_map.get(item_id, {}).get('childIds', [])) for item_id in raw['itemIds']]
+        else:
+            items = [self.blocks([block_id]) for block_id in raw.get('blockIds', [])]
+        block = {'kind': 'list', 'items': [item for item in items if item]}
+        if (raw.get('kind') or raw.get('type')) == 'ordered':
+            block['ordered'] = True
+        return block
+
+    def table(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        cell_map = raw.get('cellMap', {})
+        rows = []
+        for row_id in raw.get('rowIds', []):
+            row = []
+            for col_id in raw.get('columnIds', []):
+                cell_id = f'{row_id}_{col_id}'
+                if cell_id in cell_map:
+                    raw_cell = cell_map[cell_id]
+                    child_ids = raw_cell.get('childIds', [])
+                else:
+                    # 没有 cellMap 条目：要么子块通过 parentId 挂在格子上，要么被合并单元格覆盖
+                    raw_cell = {}
+                    child_ids = self.children_of(cell_id)
+                    if not child_ids:
+                        continue
+                cell = {'blocks': self.blocks(child_ids)}
+                for span in ('rowSpan', 'colSpan'):
+                    value = int(raw_cell.get(span) or 1)
+                    if value > 1:
+                        cell[span] = value
+                row.append(cell)
+            rows.append(row)
+
+        block = {'kind': 'table', 'rows': rows}
+        if raw.get('rowHeader'):
+            block['header'] = True
+        return block
+
+
+def project_document(doc: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if not isinstance(doc, dict) or 'blockMap' not in doc:
+        return []
+    return DocumentProjector(doc['blockMap']).blocks(doc.get('blockIds', []))
+
+
+def project_item_detail(data: Dict[str, Any]) -> Dict[str, Any]:
+    item = data.get('data', {}).get('item', {})
+    item_id = item.get('itemId', '')
+    brief = item.get('brief', {})
+
+    detail = {
+        'itemId': item_id,
+        'name': item.get('name'),
+        'mainType': item.get('mainType', {}).get('name'),
+        'subType': item.get('subType', {}).get('name'),
+    }
+    if brief.get('cover'):
+        detail['cover'] = local_image_path(item_id, brief['cover'])
+
+    document_map = item.get('document', {}).get('documentMap', {})
+    detail['description'] = project_document(brief.get('description'))
+    detail['document'] = project_document(next(iter(document_map.values()), None))
+    return detail
+
+
+def parse_time_ms(content: str, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(content)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    top = DEFAULT_TOP
+    if '--top' in sys.argv:
+        top = int(sys.argv[sys.argv.index('--top') + 1])
+
+    if not DETAILS_SOURCE_DIR.exists():
+        print(f"✗ 目录不存在: {DETAILS_SOURCE_DIR}（请在仓库根目录运行）")
+        sys.exit(1)
+
+    paths = sorted(DETAILS_SOURCE_DIR.glob('*.json'), key=lambda p: p.stat().st_size, reverse=True)
+
+    print("=" * 60)
+    print(f"item_details 投影（原始文件最大的 {top} 个）")
+    print("=" * 60)
+    print(f"{'物品':<8} {'原始':>10} {'投影':>10} {'比例':>7} {'解析(原始)':>11} {'解析(投影)':>11}")
+
+    total_raw = total_projected = 0
+    for index, path in enumerate(paths):
+        raw = path.read_text(encoding='utf-8')
+        projected = json.dumps(project_item_detail(json.loads(raw)), ensure_ascii=False, separators=(',', ':'))
+        raw_size = len(raw.encode('utf-8'))
+        projected_size = len(projected.encode('utf-8'))
+        total_raw += raw_size
+        total_projected += projected_size
+        if index < top:
+            print(f"{path.stem:<8} {raw_size:>10} {projected_size:>10} {raw_size / projected_size:>6.1f}x "
+                  f"{parse_time_ms(raw):>9.2f}ms {parse_time_ms(projected):>9.2f}ms")
+
+    print("-" * 60)
+    print(f"全部 {len(paths)} 个: {total_raw} B -> {total_projected} B ({total_raw / max(total_projected, 1):.1f}x)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
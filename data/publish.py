@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+发布前端数据（在 web/ 中 npm run build 之后运行，从仓库根目录执行）
+
+源文件（data/ 和 web/public/data 中提交的文件）保持不变，发布结果只写入构建产物 web/dist/data，
+覆盖 vite 从 web/public 复制过去的原始副本：
+- 把前端读取的 JSON 以最小化格式（无缩进、无多余空格）写入 web/dist/data
+- item_details：从 data/item_details 生成详情页使用的投影分片（见 project_details.py）
+- item_lookup.json：图片指向 optimize_images.py 生成的最优版本（已生成时；提交的文件保持原图路径）
+- 为每个文件生成 .gz（以及安装了 brotli 时的 .br）预压缩副本，供静态服务器直接返回
+- 写入 web/dist/data/manifest.json：文件 -> 内容哈希/大小，前端据此给请求加 ?v=<hash> 以便缓存失效
+- 内容未变化且压缩副本齐全的文件不会重写
+- 输出发布前后的总字节数对比
+"""
+
+import gzip
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from project_details import project_item_detail
+from update_image_paths import preferred_image_paths
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+PUBLISH_DIR = Path('web/dist/data')
+DETAILS_SOURCE_DIR = Path('data/item_details')
+DETAILS_DIR = 'item_details'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+HASH_LENGTH = 12
+
+# (源文件, 发布路径)；不存在的源文件跳过
+PUBLISH_FILES = [
+    ('data/recipe_database.json', 'recipe_database.json'),
+    ('data/recipe_database.compact.json', 'recipe_database.compact.json'),
+    ('data/recipe_database.bin', 'recipe_database.bin'),
+    ('web/public/data/item_lookup.json', 'item_lookup.json'),
+    ('web/public/data/icon_atlas.json', 'icon_atlas.json'),
+    ('web/public/data/overrides/device_text_map.json', 'overrides/device_text_map.json'),
+    ('web/public/data/overrides/ignored_devices.json', 'overrides/ignored_devices.json'),
+    ('web/public/data/plan_cache.json', 'plan_cache.json'),
+    ('web/public/data/production_dag.json', 'production_dag.json'),
+]
+
+
+def minify(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def pretty_size(data: Any) -> int:
+    """仓库其余脚本的写出格式（indent=2），作为"发布前"的大小"""
+    return len(json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+
+
+def read_json(path: Path) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_if_changed(path: Path, content: bytes, suffix: str, compress) -> int:
+    """写入 path+suffix 的压缩副本，返回压缩后大小"""
+    target = path.with_name(path.name + suffix)
+    compressed = compress(content)
+    if not target.exists() or target.read_bytes() != compressed:
+        target.write_bytes(compressed)
+    return len(compressed)
+
+
+def gzip_bytes(content: bytes) -> bytes:
+    # mtime=0 让相同内容产生相同的 .gz，避免无意义的改动
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(content: bytes) -> bytes:
+    return brotli.compress(content, quality=11)
+
+
+def publish_file(rel_path: str, content: bytes, previous: Optional[dict]) -> Tuple[dict, bool]:
+    """写入文件和压缩副本，返回 (清单条目, 是否有改动)"""
+    path = PUBLISH_DIR / rel_path
+    digest = content_hash(content)
+
+    siblings = [path.with_name(path.name + '.gz')]
+    if brotli:
+        siblings.append(path.with_name(path.name + '.br'))
+    unchanged = (previous and previous.get('hash') == digest and path.exists()
+                 and all(s.exists() for s in siblings)
+                 and (not brotli or 'br' in previous))
+    if unchanged and path.read_bytes() == content:
+        return previous, False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    entry = {
+        'hash': digest,
+        'bytes': len(content),
+        'gzip': write_if_changed(path, content, '.gz', gzip_bytes),
+    }
+    if brotli:
+        entry['br'] = write_if_changed(path, content, '.br', brotli_bytes)
+    return entry, True
+
+
+def remove_published(rel_path: str):
+    path = PUBLISH_DIR / rel_path
+    for target in (path, path.with_name(path.name + '.gz'), path.with_name(path.name + '.br')):
+        if target.exists():
+            target.unlink()
+
+
+def load_manifest() -> dict:
+    path = PUBLISH_DIR / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        manifest = read_json(path)
+    except (json.JSONDecodeError, OSError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def collect_sources() -> Dict[str, Tuple[bytes, int]]:
+    """发布路径 -> (发布内容, 发布前大小)"""
+    sources = {}
+
+    for source, rel_path in PUBLISH_FILES:
+        source_path = Path(source)
+        if not source_path.exists():
+            continue
+        if source_path.suffix == '.json':
+            data = read_json(source_path)
+            if rel_path == 'item_lookup.json':
+                preferred_image_paths(data)
+            sources[rel_path] = (minify(data), pretty_size(data))
+        else:
+            content = source_path.read_bytes()
+            sources[rel_path] = (content, len(content))
+
+    if DETAILS_SOURCE_DIR.exists():
+        for source_path in sorted(DETAILS_SOURCE_DIR.glob('*.json')):
+            data = read_json(source_path)
+            rel_path = f'{DETAILS_DIR}/{source_path.name}'
+            sources[rel_path] = (minify(project_item_detail(data)), source_path.stat().st_size)
+    else:
+        print(f"⚠️  详情目录不存在，跳过 item_details: {DETAILS_SOURCE_DIR}")
+
+    return sources
+
+
+def format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.2f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} B"
+
+
+def print_report(sources: Dict[str, Tuple[bytes, int]], files: Dict[str, dict]):
+    groups: Dict[str, Dict[str, int]] = {}
+    for rel_path, (_, before) in sources.items():
+        group = DETAILS_DIR if rel_path.startswith(DETAILS_DIR + '/') else rel_path
+        entry = files[rel_path]
+        totals = groups.setdefault(group, {'count': 0, 'before': 0, 'bytes': 0, 'gzip': 0, 'br': 0})
+        totals['count'] += 1
+        totals['before'] += before
+        totals['bytes'] += entry['bytes']
+        totals['gzip'] += entry['gzip']
+        totals['br'] += entry.get('br', 0)
+
+    print(f"\n{'文件':<34} {'发布前':>10} {'最小化':>10} {'gzip':>10} {'brotli':>10}")
+    total = {'before': 0, 'bytes': 0, 'gzip': 0, 'br': 0}
+    for group, totals in groups.items():
+        name = f"{group}/ ({totals['count']} 个)" if group == DETAILS_DIR else group
+        br = format_size(totals['br']) if brotli else '-'
+        print(f"{name:<34} {format_size(totals['before']):>10} {format_size(totals['bytes']):>10} "
+              f"{format_size(totals['gzip']):>10} {br:>10}")
+        for key in total:
+            total[key] += totals[key]
+
+    print("-" * 80)
+    br = format_size(total['br']) if brotli else '-'
+    print(f"{'合计':<34} {format_size(total['before']):>10} {format_size(total['bytes']):>10} "
+          f"{format_size(total['gzip']):>10} {br:>10}")
+    if total['before']:
+        smallest = total['br'] if brotli else total['gzip']
+        print(f"最小化: {total['bytes'] / total['before']:.1%}，"
+              f"传输({'brotli' if brotli else 'gzip'}): {smallest / total['before']:.1%}")
+
+
+def main():
+    print("=" * 60)
+    print("发布前端数据")
+    print("=" * 60)
+
+    if not PUBLISH_DIR.parent.exists():
+        print(f"✗ 构建目录不存在: {PUBLISH_DIR.parent}（请先在 web/ 运行 npm run build，并在仓库根目录运行）")
+        sys.exit(1)
+    PUBLISH_DIR.mkdir(exist_ok=True)
+    if not brotli:
+        print("⚠️  未安装 brotli，只生成 .gz（pip install brotli 可额外生成 .br）")
+
+    sources = collect_sources()
+    previous = load_manifest().get('files', {})
+
+    files = {}
+    written = 0
+    for rel_path, (content, _) in sources.items():
+        entry, changed = publish_file(rel_path, content, previous.get(rel_path))
+        files[rel_path] = entry
+        if changed:
+            written += 1
+
+    removed = 0
+    for rel_path in previous:
+        if rel_path not in files:
+            remove_published(rel_path)
+            removed += 1
+    # vite 从 web/public 复制过来、已经没有源文件的详情
+    details_dir = PUBLISH_DIR / DETAILS_DIR
+    if details_dir.exists():
+        for path in details_dir.glob('*.json'):
+            rel_path = f'{DETAILS_DIR}/{path.name}'
+            if rel_path not in files:
+                remove_published(rel_path)
+                removed += 1
+
+    manifest = {'version': MANIFEST_VERSION, 'files': dict(sorted(files.items()))}
+    with open(PUBLISH_DIR / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"\n✓ 写入 {written} 个文件，{len(files) - written} 个未变化，删除 {removed} 个")
+    print_report(sources, files)
+
+    print("\n" + "=" * 60)
+    print(f"清单: {PUBLISH_DIR / MANIFEST_NAME}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
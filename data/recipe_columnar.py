@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Compact columnar export of recipe_database.json.
+
+Layout (the same columns are used by the compact JSON and the binary file):
+
+    items / itemNames        interned item ids; every item reference is an index here
+    devices / deviceNames    interned device ids
+    recipeIds, sources       recipe i has id recipeIds[i]
+    recipeDevice[i]          device index
+    recipeSource[i]          index into sources
+    recipeTime[i]            manufacturingTime (>= 0); -2 when absent, -1 when null,
+                               -3 - k for the verbatim (non-numeric) text timeTexts[k]
+    materialOffsets          CSR: materials of recipe i are
+    materialItems              materialItems[materialOffsets[i]:materialOffsets[i+1]]
+    materialCounts             (numeric counts, same slice)
+    productOffsets / productItems / productCounts
+    asMaterialsOffsets       CSR over items: recipes using item j as material are
+    asMaterialsRecipes         asMaterialsRecipes[asMaterialsOffsets[j]:asMaterialsOffsets[j+1]]
+    asProductsOffsets / asProductsRecipes
+    byDeviceOffsets / byDeviceRecipes   (CSR over devices)
+    cycleIgnoredDevices      cycleAnalysis (only when the database has one):
+    componentOffsets           CSR over components in topological order, items in
+    componentItems               componentItems[componentOffsets[c]:componentOffsets[c+1]]
+    condensationOffsets /      material components of component c
+    condensationTargets
+    componentFlags[c]          bit 0: cyclic, bit 1: deadlock cycle group
+    databaseHash             content hash of the source database (string; in the binary header)
+
+Binary file (.bin, little-endian):
+    b'RCDB' | u32 version | u32 header length | header JSON (utf-8) | column data
+The header holds the string tables and, per column, its dtype
+(u8/u16/u32/i8/i16/i32/f32/f64), byte offset and length. Every column starts at an
+8-byte aligned offset so it can be viewed directly as a typed array.
+
+Usage (from data/):
+    python3 recipe_columnar.py              # 写出 recipe_database.compact.json 和 recipe_database.bin
+    python3 recipe_columnar.py --benchmark  # 与 recipe_database.json 比较大小和解析时间
+"""
+
+import gzip
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, Any, Tuple
+
+
+FORMAT_VERSION = 4
+MAGIC = b'RCDB'
+SOURCE_PATH = 'recipe_database.json'
+COMPACT_PATH = 'recipe_database.compact.json'
+BINARY_PATH = 'recipe_database.bin'
+WEB_DATA_DIR = os.path.join('..', 'web', 'public', 'data')
+
+STRING_TABLES = ('items', 'itemNames', 'devices', 'deviceNames', 'recipeIds', 'sources', 'timeTexts', 'cycleIgnoredDevices')
+# 单个字符串，和字符串表一样放在二进制文件的头部
+STRING_FIELDS = ('databaseHash',)
+
+# dtype -> array typecode
+TYPECODES = {'u8': 'B', 'u16': 'H', 'u32': 'I', 'i8': 'b', 'i16': 'h', 'i32': 'i', 'f32': 'f', 'f64': 'd'}
+# manufacturingTime 不能为负，哨兵值不会与真实值（包括 0）冲突
+TIME_ABSENT = -2
+TIME_NULL = -1
+# detail_parser 无法解析的制造时间按原文保存（build_time_mapping 的回退），放进 timeTexts 表
+TIME_TEXT = -3
+COMPONENT_CYCLIC = 1
+COMPONENT_DEADLOCK = 2
+
+
+def id_order(item_id: str) -> Tuple[int, str]:
+    return (len(item_id), item_id)
+
+
+def parse_number(value: Any):
+    """'2' -> 2, '0.5' -> 0.5；保证能无损还原为原来的字符串"""
+    if isinstance(value, (int, float)):
+        return value
+    number = float(value)
+    if number.is_integer() and str(int(number)) == value:
+        return int(number)
+    if str(number) != value:
+        raise ValueError(f"无法无损转换为数字: {value!r}")
+    return number
+
+
+def format_number(value) -> str:
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def encode_time(recipe: Dict[str, Any], time_texts: Dict[str, int]):
+    if 'manufacturingTime' not in recipe:
+        return TIME_ABSENT
+    if recipe['manufacturingTime'] is None:
+        return TIME_NULL
+    try:
+        value = parse_number(recipe['manufacturingTime'])
+    except ValueError:
+        return TIME_TEXT - time_texts.setdefault(recipe['manufacturingTime'], len(time_texts))
+    if value < 0:
+        raise ValueError(f"配方 {recipe.get('id')} 的 manufacturingTime 为负数: {value!r}")
+    return value
+
+
+# ---------------------------------------------------------------------------
+# writer
+# ---------------------------------------------------------------------------
+
+def encode(db: Dict[str, Any]) -> Dict[str, Any]:
+    """recipe_database dict -> columnar dict (string tables + flat numeric columns)"""
+    recipes = list(db['recipes'].values())
+
+    item_names = {}
+    device_names = {}
+    for recipe in recipes:
+        for entry in recipe.get('materials', []) + recipe.get('products', []):
+            if item_names.setdefault(entry['id'], entry['name']) != entry['name']:
+                raise ValueError(f"物品 {entry['id']} 名称不一致")
+        if device_names.setdefault(recipe['deviceId'], recipe['deviceName']) != recipe['deviceName']:
+            raise ValueError(f"设备 {recipe['deviceId']} 名称不一致")
+    for name in ('asMaterials', 'asProducts'):
+        for item_id in db.get(name, {}):
+            item_names.setdefault(item_id, '')
+
+    items = sorted(item_names, key=id_order)
+    devices = sorted(device_names, key=id_order)
+    sources = sorted({recipe['source'] for recipe in recipes})
+    item_index = {item_id: i for i, item_id in enumerate(items)}
+    device_index = {device_id: i for i, device_id in enumerate(devices)}
+    source_index = {source: i for i, source in enumerate(sources)}
+    recipe_index = {recipe['id']: i for i, recipe in enumerate(recipes)}
+    time_texts = {}
+
+    col = {
+        'items': items,
+        'itemNames': [item_names[i] for i in items],
+        'devices': devices,
+        'deviceNames': [device_names[d] for d in devices],
+        'recipeIds': [recipe['id'] for recipe in recipes],
+        'sources': sources,
+        'recipeDevice': [device_index[r['deviceId']] for r in recipes],
+        'recipeSource': [source_index[r['source']] for r in recipes],
+        'recipeTime': [encode_time(r, time_texts) for r in recipes],
+        'timeTexts': list(time_texts),
+    }
+
+    for part, key in (('material', 'materials'), ('product', 'products')):
+        offsets, entries, counts = [0], [], []
+        for recipe in recipes:
+            for entry in recipe.get(key, []):
+                entries.append(item_index[entry['id']])
+                counts.append(parse_number(entry['count']))
+            offsets.append(len(entries))
+        col[f'{part}Offsets'] = offsets
+        col[f'{part}Items'] = entries
+        col[f'{part}Counts'] = counts
+
+    for name, keys, index in (('asMaterials', items, item_index),
+                              ('asProducts', items, item_index),
+                              ('byDevice', devices, device_index)):
+        offsets, targets = [0], []
+        source = db.get(name, {})
+        for key in keys:
+            targets.extend(recipe_index[recipe_id] for recipe_id in source.get(key, []))
+            offsets.append(len(targets))
+        col[f'{name}Offsets'] = offsets
+        col[f'{name}Recipes'] = targets
+
+    analysis = db.get('cycleAnalysis')
+    if analysis is not None:
+        encode_cycle_analysis(col, analysis, item_index)
+    if 'databaseHash' in db:
+        col['databaseHash'] = db['databaseHash']
+    return col
+
+
+def encode_cycle_analysis(col: Dict[str, Any], analysis: Dict[str, Any], item_index: Dict[str, int]):
+    cyclic, deadlocks = set(analysis['cyclic']), set(analysis['cycleGroups'])
+    col['cycleIgnoredDevices'] = analysis['ignoredDevices']
+    for name, rows in (('component', [[item_index[i] for i in c] for c in analysis['components']]),
+                       ('condensation', analysis['condensation'])):
+        offsets, values = [0], []
+        for row in rows:
+            values.extend(row)
+            offsets.append(len(values))
+        col[f'{name}Offsets'] = offsets
+        col[f'{name}Items' if name == 'component' else f'{name}Targets'] = values
+    col['componentFlags'] = [(COMPONENT_CYCLIC if c in cyclic else 0) | (COMPONENT_DEADLOCK if c in deadlocks else 0)
+                             for c in range(len(analysis['components']))]
+
+
+def write_compact_json(col: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'format': 'recipe-columnar', 'version': FORMAT_VERSION, **col}, f,
+                  ensure_ascii=False, separators=(',', ':'))
+
+
+def column_dtype(values: List) -> str:
+    """能无损存下所有值的最小类型"""
+    if any(isinstance(v, float) and not v.is_integer() for v in values):
+        if all(struct.unpack('<f', struct.pack('<f', v))[0] == v for v in values):
+            return 'f32'
+        return 'f64'
+    low, high = min(values, default=0), max(values, default=0)
+    for bits in (8, 16, 32):
+        if low >= 0 and high < 1 << bits:
+            return f'u{bits}'
+        if low >= -(1 << (bits - 1)) and high < 1 << (bits - 1):
+            return f'i{bits}'
+    return 'f64'
+
+
+def write_binary(col: Dict[str, Any], path: str):
+    header = {'version': FORMAT_VERSION, 'columns': {}}
+    header.update({name: col[name] for name in STRING_TABLES + STRING_FIELDS if name in col})
+
+    blobs = []
+    offset = 0
+    for name, values in col.items():
+        if name in STRING_TABLES or name in STRING_FIELDS:
+            continue
+        dtype = column_dtype(values)
+        data = array(TYPECODES[dtype], values)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        raw = data.tobytes()
+        header['columns'][name] = {'dtype': dtype, 'offset': offset, 'length': len(values)}
+        blobs.append(raw + b'\0' * (-len(raw) % 8))
+        offset += len(blobs[-1])
+
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    prefix_len = len(MAGIC) + 8 + len(header_bytes)
+    header_bytes += b' ' * (-prefix_len % 8)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<II', FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for blob in blobs:
+            f.write(blob)
+
+
+# ---------------------------------------------------------------------------
+# reader
+# ---------------------------------------------------------------------------
+
+def read_compact_json(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        col = json.load(f)
+    if col.get('format') != 'recipe-columnar' or col.get('version') != FORMAT_VERSION:
+        raise ValueError(f"{path} 不是 recipe-columnar v{FORMAT_VERSION} 文件")
+    col.pop('format')
+    col.pop('version')
+    return col
+
+
+def read_binary(path: str) -> Dict[str, Any]:
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    if raw[:4] != MAGIC:
+        raise ValueError(f"{path} 不是 recipe-columnar 二进制文件")
+    version, header_len = struct.unpack_from('<II', raw, 4)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"不支持的版本: {version}")
+
+    header = json.loads(raw[12:12 + header_len].decode('utf-8'))
+    base = 12 + header_len
+
+    col = {name: header[name] for name in STRING_TABLES + STRING_FIELDS if name in header}
+    for name, info in header['columns'].items():
+        data = array(TYPECODES[info['dtype']])
+        start = base + info['offset']
+        data.frombytes(raw[start:start + info['length'] * data.itemsize])
+        if sys.byteorder == 'big':
+            data.byteswap()
+        col[name] = data
+    return col
+
+
+def csr_slice(col: Dict[str, Any], name: str, i: int):
+    offsets = col[f'{name}Offsets']
+    return offsets[i], offsets[i + 1]
+
+
+def decode(col: Dict[str, Any]) -> Dict[str, Any]:
+    """columnar dict -> recipe_database dict（与原 JSON 结构相同）"""
+    items, item_names = col['items'], col['itemNames']
+    devices, device_names = col['devices'], col['deviceNames']
+    recipe_ids = col['recipeIds']
+
+    recipes = {}
+    for i, recipe_id in enumerate(recipe_ids):
+        device = col['recipeDevice'][i]
+        recipe = {'deviceId': devices[device], 'deviceName': device_names[device]}
+        for part, key in (('material', 'materials'), ('product', 'products')):
+            start, end = csr_slice(col, part, i)
+            recipe[key] = [
+                {'id': items[item], 'name': item_names[item], 'count': format_number(count)}
+                for item, count in zip(col[f'{part}Items'][start:end], col[f'{part}Counts'][start:end])
+            ]
+        recipe['source'] = col['sources'][col['recipeSource'][i]]
+        time_value = col['recipeTime'][i]
+        if time_value == TIME_NULL:
+            recipe['manufacturingTime'] = None
+        elif time_value <= TIME_TEXT:
+            recipe['manufacturingTime'] = col['timeTexts'][TIME_TEXT - int(time_value)]
+        elif time_value != TIME_ABSENT:
+            recipe['manufacturingTime'] = int(time_value) if float(time_value).is_integer() else time_value
+        recipe['id'] = recipe_id
+        recipes[recipe_id] = recipe
+
+    db = {'recipes': recipes}
+    for name, keys in (('asMaterials', items), ('asProducts', items), ('byDevice', devices)):
+        index = {}
+        for j, key in enumerate(keys):
+            start, end = csr_slice(col, name, j)
+            if end > start:
+                index[key] = [recipe_ids[r] for r in col[f'{name}Recipes'][start:end]]
+        db[name] = index
+
+    if 'cycleIgnoredDevices' in col:
+        flags = col['componentFlags']
+        components = []
+        condensation = []
+        for c in range(len(flags)):
+            start, end = csr_slice(col, 'component', c)
+            components.append([items[i] for i in col['componentItems'][start:end]])
+            start, end = csr_slice(col, 'condensation', c)
+            condensation.append(list(col['condensationTargets'][start:end]))
+        db['cycleAnalysis'] = {
+            'ignoredDevices': list(col['cycleIgnoredDevices']),
+            'components': components,
+            'condensation': condensation,
+            'cyclic': [c for c, f in enumerate(flags) if f & COMPONENT_CYCLIC],
+            'cycleGroups': [c for c, f in enumerate(flags) if f & COMPONENT_DEADLOCK],
+        }
+    if 'databaseHash' in col:
+        db['databaseHash'] = col['databaseHash']
+    return db
+
+
+# ---------------------------------------------------------------------------
+# benchmark
+# ---------------------------------------------------------------------------
+
+def time_best(func, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark(rounds: int = 20):
+    if not (os.path.exists(COMPACT_PATH) and os.path.exists(BINARY_PATH)):
+        export()
+
+    with open(SOURCE_PATH, 'rb') as f:
+        original = f.read()
+
+    print("\n" + "="*60)
+    print(f"大小（{rounds} 次取最快的解析时间）")
+    print("="*60)
+    print(f"{'文件':32} {'字节':>10} {'gzip':>10} {'解析':>10} {'解析+还原':>10}")
+
+    def row(path: str, parse, parse_full):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        parse_ms = time_best(parse, rounds) * 1000
+        full_ms = time_best(parse_full, rounds) * 1000 if parse_full else parse_ms
+        print(f"{path:32} {len(raw):>10} {len(gzip.compress(raw, 9)):>10} "
+              f"{parse_ms:>8.2f}ms {full_ms:>8.2f}ms")
+        return len(raw)
+
+    original_size = row(SOURCE_PATH, lambda: json.loads(original), None)
+    compact_size = row(COMPACT_PATH, lambda: read_compact_json(COMPACT_PATH),
+                       lambda: decode(read_compact_json(COMPACT_PATH)))
+    binary_size = row(BINARY_PATH, lambda: read_binary(BINARY_PATH),
+                      lambda: decode(read_binary(BINARY_PATH)))
+
+    print(f"\n紧凑 JSON: {compact_size / original_size:.1%}，二进制: {binary_size / original_size:.1%}")
+    print("="*60)
+
+
+# ---------------------------------------------------------------------------
+
+def export(source_path: str = SOURCE_PATH):
+    with open(source_path, 'r', encoding='utf-8') as f:
+        db = json.load(f)
+
+    col = encode(db)
+    if decode(col) != db:
+        raise ValueError("列式格式无法无损还原 recipe_database.json")
+
+    write_compact_json(col, COMPACT_PATH)
+    write_binary(col, BINARY_PATH)
+    if decode(read_binary(BINARY_PATH)) != db:
+        raise ValueError(f"{BINARY_PATH} 读回后与原数据不一致")
+
+    print(f"✓ {len(col['recipeIds'])} 个配方，{len(col['items'])} 个物品，{len(col['devices'])} 个设备")
+    print(f"✓ 已保存到 {COMPACT_PATH} 和 {BINARY_PATH}")
+
+    if os.path.exists(WEB_DATA_DIR):
+        write_compact_json(col, os.path.join(WEB_DATA_DIR, COMPACT_PATH))
+        write_binary(col, os.path.join(WEB_DATA_DIR, BINARY_PATH))
+        print(f"✓ 已同步到 {WEB_DATA_DIR}")
+
+
+if __name__ == '__main__':
+    if '--benchmark' in sys.argv:
+        benchmark()
+    else:
+        export()
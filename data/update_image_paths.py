@@ -4,67 +4,69 @@ import os
 from pathlib import Path
 
 
+IMAGE_VARIANTS_PATH = Path('data/image_variants.json')
+PUBLIC_ROOT = Path('web/public')
+
+
+def load_image_variants() -> dict:
+    """optimize_images.py 生成的清单：itemId -> {'preferred': 最优版本路径, ...}"""
+    if not IMAGE_VARIANTS_PATH.exists():
+        return {}
+    with open(IMAGE_VARIANTS_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def preferred_image_paths(lookup: dict) -> int:
+    """发布时把 lookup 中的图片指向 optimize_images.py 生成的最优版本（文件存在时），返回改动数。
+
+    提交的 item_lookup.json 保持原图路径，优化版本不提交，只在 publish.py 写出的副本中使用。
+    """
+    variants = load_image_variants()
+    updated = 0
+    for item_id, item in lookup.items():
+        preferred = variants.get(item_id, {}).get('preferred')
+        if preferred and item.get('image') != preferred and (PUBLIC_ROOT / preferred.lstrip('/')).exists():
+            item['image'] = preferred
+            updated += 1
+    return updated
+
+
+def local_image_path(item_id: str, url: str) -> str:
+    """远程图片 URL -> download_images.py 保存的本地路径；已是本地路径则原样返回"""
+    if not url.startswith('http'):
+        return url
+    ext = Path(url).suffix or '.png'
+    return f"/images/items/{item_id}{ext}"
+
+
 def update_json_paths():
     print("=== 更新JSON文件中的图片路径 ===\n")
     
     base_dir = Path('web/public/data')
     
-    print("1. 更新 item_lookup.json...")
+    print("更新 item_lookup.json...")
     lookup_path = base_dir / 'item_lookup.json'
     if lookup_path.exists():
         with open(lookup_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
+        # 只改为本地原图路径；优化版本由 publish.py 在发布的副本中替换
         updated = 0
         for item_id, item in data.items():
             if 'image' in item:
                 old_url = item['image']
                 if old_url.startswith('http'):
-                    ext = Path(old_url).suffix or '.png'
-                    new_path = f"/images/items/{item_id}{ext}"
-                    item['image'] = new_path
+                    item['image'] = local_image_path(item_id, old_url)
                     updated += 1
         
-        with open(lookup_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if updated:
+            with open(lookup_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         
         print(f"   ✓ 更新了 {updated} 个物品的图片路径")
     else:
         print(f"   ✗ 文件不存在: {lookup_path}")
     
-    print("\n2. 更新 item_details/*.json...")
-    details_dir = base_dir / 'item_details'
-    if details_dir.exists():
-        files = list(details_dir.glob('*.json'))
-        updated_files = 0
-        
-        for file_path in files:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            changed = False
-            
-            if 'data' in data and 'item' in data['data']:
-                item = data['data']['item']
-                item_id = item.get('itemId', '')
-                
-                if 'brief' in item and 'cover' in item['brief']:
-                    old_url = item['brief']['cover']
-                    if old_url.startswith('http'):
-                        ext = Path(old_url).suffix or '.png'
-                        new_path = f"/images/items/{item_id}{ext}"
-                        item['brief']['cover'] = new_path
-                        changed = True
-            
-            if changed:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                updated_files += 1
-        
-        print(f"   ✓ 更新了 {updated_files}/{len(files)} 个详情文件")
-    else:
-        print(f"   ✗ 目录不存在: {details_dir}")
-    
     print("\n" + "="*50)
     print("更新完成！")
     print("="*50)
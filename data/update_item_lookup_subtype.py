@@ -3,6 +3,8 @@ import json
 from pathlib import Path
 from typing import Dict, Any
 
+from detail_parser import build_lookup_entry
+
 
 def load_item_lookup_with_subtype() -> Dict[str, Any]:
     item_lookup = {}
@@ -31,28 +33,12 @@ def load_item_lookup_with_subtype() -> Dict[str, Any]:
                 print(f"  跳过 {item_id}: 无 item 数据")
                 continue
 
-            item_name = item.get('name', '')
-            item_id_real = item.get('itemId', '')
-            sub_type = item.get('subType', {})
-            sub_type_id = sub_type.get('id', '')
-            sub_type_name = sub_type.get('name', '')
-
-            image_url = ''
-            brief = item.get('brief', {})
-            if brief:
-                image_url = brief.get('cover', '')
-
-            if not item_name or not item_id_real:
+            entry = build_lookup_entry(item)
+            if not entry:
                 print(f"  跳过 {item_id}: 缺少必要字段")
                 continue
 
-            item_lookup[item_id_real] = {
-                'itemId': item_id_real,
-                'name': item_name,
-                'image': image_url,
-                'subTypeID': sub_type_id,
-                'subTypeName': sub_type_name
-            }
+            item_lookup[entry['itemId']] = entry
 
             count += 1
 
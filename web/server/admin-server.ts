@@ -64,6 +64,17 @@ const SCRIPTS_CONFIG = {
     outputFiles: [
       '../data/device_production_tables'
     ]
+  },
+  'pipeline': {
+    id: 'pipeline',
+    name: 'Run Pipeline',
+    command: 'python3',
+    args: ['../data/pipeline.py'],
+    cwd: path.join(__dirname, '..'),
+    description: '只运行过期的阶段 (pipeline.py)，可用 ?targets=stage1,stage2 指定阶段',
+    outputFiles: [
+      '../data/pipeline_state.json'
+    ]
   }
 } as const;
 
@@ -346,12 +357,19 @@ app.get('/api/scripts/:id/execute', (req, res) => {
     return res.status(404).json({ error: 'Script not found' });
   }
 
+  const targets = typeof req.query.targets === 'string'
+    ? req.query.targets.split(',').filter(Boolean)
+    : [];
+  if (targets.length > 0 && (id !== 'pipeline' || targets.some((t) => !/^[a-z-]+$/.test(t)))) {
+    return res.status(400).json({ error: 'Invalid targets' });
+  }
+
   res.setHeader('Content-Type', 'text/event-stream');
   res.setHeader('Cache-Control', 'no-cache');
   res.setHeader('Connection', 'keep-alive');
 
   const executionId = `${id}-${Date.now()}`;
-  const childProcess = spawn(script.command, script.args, {
+  const childProcess = spawn(script.command, [...script.args, ...targets], {
     cwd: script.cwd,
     env: { ...process.env, PYTHONUNBUFFERED: '1' }
   });
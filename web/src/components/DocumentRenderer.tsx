@@ -1,9 +1,8 @@
-import type { Block, TextBlock, ListBlock, InlineElement } from '../types/document';
+import type { Block, TextBlock, ListBlock, TableBlock, InlineElement } from '../types/document';
 import type { ItemLookup } from '../types/catalog';
 
 interface DocumentRendererProps {
   blocks: Block[];
-  blockMap: Record<string, Block>;
   itemLookup?: ItemLookup;
 }
 
@@ -18,11 +17,11 @@ function InlineElementRenderer({ element, itemLookup }: InlineElementRendererPro
       fontWeight: element.bold ? 'bold' : 'normal',
       color: element.color || 'inherit',
     };
-    return <span style={style}>{element.text.text}</span>;
+    return <span style={style}>{element.text}</span>;
   }
 
   if (element.kind === 'entry') {
-    const { id, count } = element.entry;
+    const { id, count } = element;
     const item = itemLookup?.[id];
     const displayText = item ? item.name : `[${id}]`;
     const countText = count !== '0' ? ` x${count}` : '';
@@ -53,7 +52,7 @@ function TextBlockRenderer({ block, itemLookup }: TextBlockRendererProps) {
 
   return (
     <p className={`mb-2 ${alignClass}`}>
-      {block.text.inlineElements.map((element, index) => (
+      {block.inlines.map((element, index) => (
         <InlineElementRenderer key={index} element={element} itemLookup={itemLookup} />
       ))}
     </p>
@@ -62,78 +61,97 @@ function TextBlockRenderer({ block, itemLookup }: TextBlockRendererProps) {
 
 interface ListBlockRendererProps {
   block: ListBlock;
-  blockMap: Record<string, Block>;
   itemLookup?: ItemLookup;
 }
 
-function ListBlockRenderer({ block, blockMap, itemLookup }: ListBlockRendererProps) {
-  const ListTag = block.list.type === 'ordered' ? 'ol' : 'ul';
-  const listClass = block.list.type === 'ordered' ? 'list-decimal' : 'list-disc';
-
-  // Handle both blockIds format (standard) and itemIds/itemMap format (alternative)
-  const childIds = block.list.blockIds || (block.list as any).itemIds || [];
-  const itemMap = (block.list as any).itemMap;
+function ListBlockRenderer({ block, itemLookup }: ListBlockRendererProps) {
+  const ListTag = block.ordered ? 'ol' : 'ul';
+  const listClass = block.ordered ? 'list-decimal' : 'list-disc';
 
   return (
     <ListTag className={`${listClass} ml-6 mb-2`}>
-      {childIds.map((childId: string) => {
-        // For itemIds format, get the child block IDs from itemMap
-        if (itemMap && itemMap[childId]) {
-          const item = itemMap[childId];
-          const childBlockIds = item.childIds || [];
-          
-          return (
-            <li key={childId} className="mb-1">
-              {childBlockIds.map((blockId: string) => {
-                const childBlock = blockMap[blockId];
-                if (!childBlock) return null;
-                return (
-                  <BlockRenderer key={blockId} block={childBlock} blockMap={blockMap} itemLookup={itemLookup} />
-                );
-              })}
-            </li>
-          );
-        }
-
-        // For blockIds format, render the block directly
-        const childBlock = blockMap[childId];
-        if (!childBlock) return null;
-
-        return (
-          <li key={childId} className="mb-1">
-            <BlockRenderer block={childBlock} blockMap={blockMap} itemLookup={itemLookup} />
-          </li>
-        );
-      })}
+      {block.items.map((childBlocks, index) => (
+        <li key={index} className="mb-1">
+          <BlockList blocks={childBlocks} itemLookup={itemLookup} />
+        </li>
+      ))}
     </ListTag>
   );
 }
 
+interface TableBlockRendererProps {
+  block: TableBlock;
+  itemLookup?: ItemLookup;
+}
+
+function TableBlockRenderer({ block, itemLookup }: TableBlockRendererProps) {
+  return (
+    <div className="overflow-x-auto mb-4">
+      <table className="min-w-full border-collapse text-sm">
+        <tbody>
+          {block.rows.map((row, rowIndex) => {
+            const CellTag = block.header && rowIndex === 0 ? 'th' : 'td';
+            return (
+              <tr key={rowIndex} className={CellTag === 'th' ? 'bg-gray-50' : ''}>
+                {row.map((cell, cellIndex) => (
+                  <CellTag
+                    key={cellIndex}
+                    rowSpan={cell.rowSpan}
+                    colSpan={cell.colSpan}
+                    className="border border-gray-200 px-3 py-2 align-top"
+                  >
+                    <BlockList blocks={cell.blocks} itemLookup={itemLookup} />
+                  </CellTag>
+                ))}
+              </tr>
+            );
+          })}
+        </tbody>
+      </table>
+    </div>
+  );
+}
+
 interface BlockRendererProps {
   block: Block;
-  blockMap: Record<string, Block>;
   itemLookup?: ItemLookup;
 }
 
-function BlockRenderer({ block, blockMap, itemLookup }: BlockRendererProps) {
+function BlockRenderer({ block, itemLookup }: BlockRendererProps) {
   switch (block.kind) {
     case 'text':
       return <TextBlockRenderer block={block} itemLookup={itemLookup} />;
     case 'list':
-      return <ListBlockRenderer block={block} blockMap={blockMap} itemLookup={itemLookup} />;
+      return <ListBlockRenderer block={block} itemLookup={itemLookup} />;
     case 'horizontalLine':
       return <hr className="my-4 border-gray-300" />;
+    case 'table':
+      return <TableBlockRenderer block={block} itemLookup={itemLookup} />;
+    case 'quote':
+      return (
+        <blockquote className="border-l-4 border-gray-300 pl-4 text-gray-600 mb-2">
+          <BlockList blocks={block.blocks} itemLookup={itemLookup} />
+        </blockquote>
+      );
     default:
       return null;
   }
 }
 
-export default function DocumentRenderer({ blocks, blockMap, itemLookup }: DocumentRendererProps) {
+function BlockList({ blocks, itemLookup }: DocumentRendererProps) {
   return (
-    <div className="prose max-w-none">
-      {blocks.map((block) => (
-        <BlockRenderer key={block.id} block={block} blockMap={blockMap} itemLookup={itemLookup} />
+    <>
+      {blocks.map((block, index) => (
+        <BlockRenderer key={index} block={block} itemLookup={itemLookup} />
       ))}
+    </>
+  );
+}
+
+export default function DocumentRenderer({ blocks, itemLookup }: DocumentRendererProps) {
+  return (
+    <div className="prose max-w-none">
+      <BlockList blocks={blocks} itemLookup={itemLookup} />
     </div>
   );
 }
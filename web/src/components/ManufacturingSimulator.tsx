@@ -4,9 +4,25 @@ import type { ItemLookup } from '../types/catalog';
 import { loadRecipeLookup } from '../utils/recipeLoader';
 import { buildDependencyTree } from '../utils/dependencyTree';
 import { calculateMaximumEfficiencyPlan, getSelectedRecipes, calculateMinimumScalePlan } from '../utils/efficiencyCalculator';
+import { getCachedPlans, type CachedPlans } from '../utils/planCache';
 import PlanVisualizer from './PlanVisualizer';
 import BaseMaterialSelector from './BaseMaterialSelector';
 
+function calculatePlans(
+  targetItemId: string,
+  targetItemName: string,
+  tree: DependencyNode,
+  itemLookup: ItemLookup
+): CachedPlans {
+  console.log('[PLANS] Calculating efficiency plan (auto-rate mode)');
+  const efficiency = calculateMaximumEfficiencyPlan(targetItemId, targetItemName, tree, itemLookup);
+  console.log('[PLANS] Efficiency plan:', { devices: efficiency.devices.length, rate: efficiency.calculatedOutputRate });
+
+  const minimum = calculateMinimumScalePlan(efficiency);
+  console.log('[PLANS] Minimum plan:', { devices: minimum.devices.length, rate: minimum.calculatedOutputRate });
+  return { efficiency, minimum };
+}
+
 interface ManufacturingSimulatorProps {
   targetItemId: string;
   targetItemName: string;
@@ -61,6 +77,19 @@ export default function ManufacturingSimulator({
       try {
         const recipeLookup = await loadRecipeLookup(itemLookup);
         console.log('[INIT] Recipe lookup loaded');
+
+        const cached = await getCachedPlans(targetItemId, targetItemName);
+        if (cached) {
+          console.log('[INIT] Using precomputed plans');
+          setState((prev) => ({
+            ...prev,
+            efficiencyPlan: cached.efficiency,
+            minimumPlan: cached.minimum,
+            loading: false,
+          }));
+          // 先渲染缓存的方案，再构建基础原料选择器需要的依赖树
+          await new Promise((resolve) => setTimeout(resolve, 0));
+        }
         
         const tree = buildDependencyTree({
           targetItemId,
@@ -73,17 +102,8 @@ export default function ManufacturingSimulator({
 
         setDependencyTree(tree);
         
-        console.log('[INIT] Calculating efficiency plan (auto-rate mode)');
-        const efficiencyPlan = calculateMaximumEfficiencyPlan(
-          targetItemId,
-          targetItemName,
-          tree,
-          itemLookup
-        );
-        console.log('[INIT] Efficiency plan calculated:', { devices: efficiencyPlan.devices.length, rate: efficiencyPlan.calculatedOutputRate });
-
-        const minimumPlan = calculateMinimumScalePlan(efficiencyPlan);
-        console.log('[INIT] Minimum plan calculated:', { devices: minimumPlan.devices.length, rate: minimumPlan.calculatedOutputRate });
+        const { efficiency: efficiencyPlan, minimum: minimumPlan } =
+          cached ?? calculatePlans(targetItemId, targetItemName, tree, itemLookup);
 
         const selected = getSelectedRecipes(tree);
         setSelectedRecipes(selected);
@@ -130,17 +150,12 @@ export default function ManufacturingSimulator({
 
         setDependencyTree(tree);
         
-        console.log('[REFRESH] Calculating efficiency plan (auto-rate mode)');
-        const efficiencyPlan = calculateMaximumEfficiencyPlan(
-          targetItemId,
-          targetItemName,
-          tree,
-          itemLookup
-        );
-        console.log('[REFRESH] Efficiency plan:', { devices: efficiencyPlan.devices.length, rate: efficiencyPlan.calculatedOutputRate });
-
-        const minimumPlan = calculateMinimumScalePlan(efficiencyPlan);
-        console.log('[REFRESH] Minimum plan:', { devices: minimumPlan.devices.length, rate: minimumPlan.calculatedOutputRate });
+        // 没有自定义基础原料时方案与缓存相同
+        const cached = allBaseMaterials.size === 0
+          ? await getCachedPlans(targetItemId, targetItemName)
+          : null;
+        const { efficiency: efficiencyPlan, minimum: minimumPlan } =
+          cached ?? calculatePlans(targetItemId, targetItemName, tree, itemLookup);
 
         const selected = getSelectedRecipes(tree);
         setSelectedRecipes(selected);
@@ -250,7 +265,7 @@ export default function ManufacturingSimulator({
             </div>
           )}
 
-          {dependencyTree && (
+          {(dependencyTree || state.efficiencyPlan) && (
             <div className="mb-6">
               {activeTab === 'efficiency' && state.efficiencyPlan ? (
                 <PlanVisualizer plan={state.efficiencyPlan} itemLookup={itemLookup} />
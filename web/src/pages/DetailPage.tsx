@@ -1,8 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import type { ItemResponse } from '../types/detail';
+import type { ItemDetail } from '../types/detail';
 import type { ItemLookup } from '../types/catalog';
-import type { Block } from '../types/document';
 import type { ManufacturingRecipe } from '../types/manufacturing';
 import DocumentRenderer from '../components/DocumentRenderer';
 import ProductRecipeTable from '../components/ProductRecipeTable';
@@ -10,12 +9,13 @@ import MaterialRecipeTable from '../components/MaterialRecipeTable';
 import ManufacturingSimulator from '../components/ManufacturingSimulator';
 import ItemImage from '../components/ItemImage';
 import { Skeleton } from '../components/ui/Skeleton';
+import { fetchData } from '../utils/dataUrl';
 import { cn } from '@/lib/utils';
 
 export default function DetailPage() {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
-  const [itemData, setItemData] = useState<ItemResponse | null>(null);
+  const [itemData, setItemData] = useState<ItemDetail | null>(null);
   const [itemLookup, setItemLookup] = useState<ItemLookup | null>(null);
   const [materialRecipes, setMaterialRecipes] = useState<ManufacturingRecipe[]>([]);
   const [productRecipes, setProductRecipes] = useState<ManufacturingRecipe[]>([]);
@@ -28,12 +28,12 @@ export default function DetailPage() {
     setLoading(true);
     setError(null);
 
-    const loadItemData = fetch(`${import.meta.env.BASE_URL}data/item_details/${id}.json`).then((res) => {
+    const loadItemData = fetchData(`item_details/${id}.json`).then((res) => {
       if (!res.ok) throw new Error(`Item not found: ${id}`);
       return res.json();
     });
 
-    const loadItemLookup = fetch(`${import.meta.env.BASE_URL}data/item_lookup.json`).then((res) => res.json());
+    const loadItemLookup = fetchData('item_lookup.json').then((res) => res.json());
 
     Promise.all([loadItemData, loadItemLookup])
       .then(async ([itemRes, lookupRes]) => {
@@ -88,27 +88,14 @@ export default function DetailPage() {
     );
   }
 
-  const item = itemData.data.item;
-  const coverImage = item.brief?.cover;
+  const item = itemData;
+  const coverImage = item.cover;
   const itemName = item.name || '未知物品';
-  const mainType = item.mainType?.name;
-  const subType = item.subType?.name;
+  const mainType = item.mainType;
+  const subType = item.subType;
 
-  const extractDocument = (docMap: Record<string, any> | undefined) => {
-    if (!docMap) return null;
-    const docId = Object.keys(docMap)[0];
-    const doc = docMap[docId];
-    if (!doc || !doc.blockIds || !doc.blockMap) return null;
-
-    const blocks: Block[] = doc.blockIds
-      .map((blockId: string) => doc.blockMap[blockId])
-      .filter((block: any) => block !== undefined);
-
-    return { blocks, blockMap: doc.blockMap };
-  };
-
-  const briefDoc = extractDocument(item.brief?.description as any);
-  const mainDoc = extractDocument(item.document?.documentMap as any);
+  const briefBlocks = item.description;
+  const mainBlocks = item.document;
 
   return (
     <div className="container mx-auto px-4 py-6 max-w-4xl" data-testid="detail-page">
@@ -147,11 +134,10 @@ export default function DetailPage() {
               </div>
             )}
             
-            {briefDoc && (
+            {briefBlocks.length > 0 && (
               <div className="text-gray-700">
                 <DocumentRenderer
-                  blocks={briefDoc.blocks}
-                  blockMap={briefDoc.blockMap}
+                  blocks={briefBlocks}
                   itemLookup={itemLookup || undefined}
                 />
               </div>
@@ -167,12 +153,11 @@ export default function DetailPage() {
             />
           )}
 
-        {mainDoc && (
+        {mainBlocks.length > 0 && (
           <div className="border-t pt-6">
             <h2 className="text-xl font-semibold mb-4 pb-2 border-b border-gray-100">详细信息</h2>
             <DocumentRenderer
-              blocks={mainDoc.blocks}
-              blockMap={mainDoc.blockMap}
+              blocks={mainBlocks}
               itemLookup={itemLookup || undefined}
             />
           </div>
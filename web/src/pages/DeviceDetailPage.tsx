@@ -1,20 +1,20 @@
 import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import type { ItemResponse } from '../types/detail';
+import type { ItemDetail } from '../types/detail';
 import type { DeviceProductionTable as DeviceProductionTableType } from '../types/device';
 import type { ItemLookup } from '../types/catalog';
-import type { Block } from '../types/document';
 import type { RecipeDatabase } from '../types/manufacturing';
 import DocumentRenderer from '../components/DocumentRenderer';
 import DeviceProductionTable from '../components/DeviceProductionTable';
 import ItemImage from '../components/ItemImage';
 import { Skeleton } from '../components/ui/Skeleton';
 import { cn } from '@/lib/utils';
+import { fetchData } from '../utils/dataUrl';
 
 export default function DeviceDetailPage() {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
-  const [deviceData, setDeviceData] = useState<ItemResponse | null>(null);
+  const [deviceData, setDeviceData] = useState<ItemDetail | null>(null);
   const [recipeDatabase, setRecipeDatabase] = useState<RecipeDatabase | null>(null);
   const [itemLookup, setItemLookup] = useState<ItemLookup | null>(null);
   const [loading, setLoading] = useState(true);
@@ -27,15 +27,15 @@ export default function DeviceDetailPage() {
     setError(null);
 
     Promise.all([
-      fetch(`${import.meta.env.BASE_URL}data/item_details/${id}.json`).then((res) => {
+      fetchData(`item_details/${id}.json`).then((res) => {
         if (!res.ok) throw new Error(`Device not found: ${id}`);
         return res.json();
       }),
-      fetch(`${import.meta.env.BASE_URL}data/recipe_database.json`).then((res) => {
+      fetchData('recipe_database.json').then((res) => {
         if (!res.ok) throw new Error('Failed to load recipe database');
         return res.json();
       }),
-      fetch(`${import.meta.env.BASE_URL}data/item_lookup.json`).then((res) => res.json()),
+      fetchData('item_lookup.json').then((res) => res.json()),
     ])
       .then(([deviceRes, recipeDatabaseRes, lookupRes]) => {
         setDeviceData(deviceRes);
@@ -84,7 +84,7 @@ export default function DeviceDetailPage() {
   // 从 recipe_database 构建设备生产表
   const productionTable: DeviceProductionTableType | null = recipeDatabase && id && recipeDatabase.byDevice[id] ? {
     deviceId: id,
-    deviceName: deviceData?.data?.item?.name || '未知设备',
+    deviceName: deviceData?.name || '未知设备',
     recipeCount: recipeDatabase.byDevice[id].length,
     recipes: recipeDatabase.byDevice[id].map((recipeId: string) => recipeDatabase.recipes[recipeId]).map((recipe) => ({
       materials: recipe.materials.map((m) => ({
@@ -101,27 +101,14 @@ export default function DeviceDetailPage() {
     })),
   } : null;
 
-  const device = deviceData.data.item;
-  const coverImage = device.brief?.cover;
+  const device = deviceData;
+  const coverImage = device.cover;
   const deviceName = device.name || '未知设备';
-  const mainType = device.mainType?.name;
-  const subType = device.subType?.name;
+  const mainType = device.mainType;
+  const subType = device.subType;
 
-  const extractDocument = (docMap: Record<string, any> | undefined) => {
-    if (!docMap) return null;
-    const docId = Object.keys(docMap)[0];
-    const doc = docMap[docId];
-    if (!doc || !doc.blockIds || !doc.blockMap) return null;
-
-    const blocks: Block[] = doc.blockIds
-      .map((blockId: string) => doc.blockMap[blockId])
-      .filter((block: any) => block !== undefined);
-
-    return { blocks, blockMap: doc.blockMap };
-  };
-
-  const briefDoc = extractDocument(device.brief?.description as any);
-  const mainDoc = extractDocument(device.document?.documentMap as any);
+  const briefBlocks = device.description;
+  const mainBlocks = device.document;
 
   return (
     <div className="container mx-auto px-4 py-6 max-w-4xl" data-testid="device-detail-page">
@@ -159,11 +146,10 @@ export default function DeviceDetailPage() {
               </div>
             )}
             
-            {briefDoc && (
+            {briefBlocks.length > 0 && (
               <div className="text-gray-700">
                 <DocumentRenderer
-                  blocks={briefDoc.blocks}
-                  blockMap={briefDoc.blockMap}
+                  blocks={briefBlocks}
                   itemLookup={itemLookup || undefined}
                 />
               </div>
@@ -171,12 +157,11 @@ export default function DeviceDetailPage() {
           </div>
         </div>
 
-        {mainDoc && (
+        {mainBlocks.length > 0 && (
           <div className="border-t pt-6">
             <h2 className="text-xl font-semibold mb-4 pb-2 border-b border-gray-100">详细信息</h2>
             <DocumentRenderer
-              blocks={mainDoc.blocks}
-              blockMap={mainDoc.blockMap}
+              blocks={mainBlocks}
               itemLookup={itemLookup || undefined}
             />
           </div>
@@ -5,6 +5,7 @@ import ItemCard from '../components/ItemCard';
 import { SearchInput } from '../components/ui/SearchInput';
 import { Skeleton } from '../components/ui/Skeleton';
 import { loadRecipeLookup } from '../utils/recipeLoader';
+import { fetchData } from '../utils/dataUrl';
 
 export default function SearchPage() {
   const [itemLookup, setItemLookup] = useState<ItemLookup | null>(null);
@@ -17,7 +18,7 @@ export default function SearchPage() {
     const loadData = async () => {
       try {
         const [itemResponse, recipeData] = await Promise.all([
-          fetch(`${import.meta.env.BASE_URL}data/item_lookup.json`),
+          fetchData('item_lookup.json'),
           loadRecipeLookup()
         ]);
 
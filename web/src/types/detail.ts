@@ -1,19 +1,12 @@
-export interface ItemBrief {
-  cover: string;
-  description?: { documentMap: Record<string, unknown> };
-}
+import type { Block } from './document';
 
-export interface ItemData {
+// data/item_details/{id}.json 经 data/publish.py 投影后的格式
+export interface ItemDetail {
   itemId: string;
   name?: string;
-  brief?: ItemBrief;
-  document?: { documentMap: Record<string, unknown> };
-  mainType?: { name: string };
-  subType?: { name: string };
-}
-
-export interface ItemResponse {
-  code: number;
-  message: string;
-  data: { item: ItemData };
+  mainType?: string;
+  subType?: string;
+  cover?: string;
+  description: Block[];
+  document: Block[];
 }
@@ -1,33 +1,51 @@
+// 投影后的文档格式（data/project_details.py）：块按显示顺序排列，子块直接内嵌
+
 export interface InlineText {
   kind: 'text';
-  text: { text: string };
+  text: string;
   bold?: boolean;
   color?: string;
 }
 
 export interface InlineEntry {
   kind: 'entry';
-  entry: { id: string; showType: string; count: string };
+  id: string;
+  count: string;
 }
 
 export type InlineElement = InlineText | InlineEntry;
 
 export interface TextBlock {
-  id: string;
   kind: 'text';
-  text: { inlineElements: InlineElement[]; kind: string };
-  align?: string;
+  inlines: InlineElement[];
+  align?: 'center' | 'right';
 }
 
 export interface ListBlock {
-  id: string;
   kind: 'list';
-  list: { type: string; blockIds: string[] };
+  items: Block[][];
+  ordered?: boolean;
 }
 
 export interface HorizontalLineBlock {
-  id: string;
   kind: 'horizontalLine';
 }
 
-export type Block = TextBlock | ListBlock | HorizontalLineBlock;
+export interface TableCell {
+  blocks: Block[];
+  rowSpan?: number;
+  colSpan?: number;
+}
+
+export interface TableBlock {
+  kind: 'table';
+  rows: TableCell[][];
+  header?: boolean;
+}
+
+export interface QuoteBlock {
+  kind: 'quote';
+  blocks: Block[];
+}
+
+export type Block = TextBlock | ListBlock | HorizontalLineBlock | TableBlock | QuoteBlock;
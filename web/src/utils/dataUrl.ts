@@ -0,0 +1,38 @@
+/**
+ * 数据文件路径工具函数
+ *
+ * 部署时 data/publish.py 在构建产物中生成 data/manifest.json（文件 -> 内容哈希），
+ * 这里给数据请求加上 ?v=<hash>，使缓存的数据文件在内容变化后立即失效。
+ * 没有清单时（开发环境直接使用 web/public）使用原始路径。
+ */
+
+interface DataManifest {
+  version: number;
+  files: Record<string, { hash: string; bytes: number; gzip: number; br?: number }>;
+}
+
+let manifestPromise: Promise<DataManifest | null> | null = null;
+
+function loadManifest(): Promise<DataManifest | null> {
+  if (!manifestPromise) {
+    manifestPromise = fetch(`${import.meta.env.BASE_URL}data/manifest.json`, { cache: 'no-cache' })
+      .then((res) => (res.ok ? res.json() : null))
+      .catch(() => null);
+  }
+  return manifestPromise;
+}
+
+export async function getDataHash(path: string): Promise<string | undefined> {
+  const manifest = await loadManifest();
+  return manifest?.files?.[path]?.hash;
+}
+
+export async function getDataUrl(path: string): Promise<string> {
+  const url = `${import.meta.env.BASE_URL}data/${path}`;
+  const hash = await getDataHash(path);
+  return hash ? `${url}?v=${hash}` : url;
+}
+
+export async function fetchData(path: string): Promise<Response> {
+  return fetch(await getDataUrl(path));
+}
@@ -10,6 +10,27 @@ interface BuildOptions {
   visited?: Set<string>;
 }
 
+interface ExpandResult {
+  node: DependencyNode;
+  height: number;
+  // 子树中有因循环或深度限制截断的节点时，结果取决于到达它的路径，不能共享
+  pathDependent: boolean;
+}
+
+function baseNode(itemId: string, itemName: string): DependencyNode {
+  return {
+    itemId,
+    itemName,
+    isBase: true,
+    recipes: [],
+    children: [],
+  };
+}
+
+/**
+ * 构建依赖树。同一个物品被多个父节点使用时（如铁制零件），与路径无关的子树只构建一次，
+ * 各父节点引用同一个节点对象；data/planner/dag.py 的 ProductionDag 是同一结构的离线版本。
+ */
 export function buildDependencyTree(options: BuildOptions): DependencyNode {
   const {
     targetItemId,
@@ -21,84 +42,84 @@ export function buildDependencyTree(options: BuildOptions): DependencyNode {
     visited = new Set(),
   } = options;
 
-  const isBaseMaterial = baseMaterialIds.has(targetItemId);
+  const shared = new Map<string, ExpandResult>();
 
-  if (isBaseMaterial) {
-    return {
-      itemId: targetItemId,
-      itemName: targetItemName,
-      isBase: true,
-      recipes: [],
-      children: [],
-    };
-  }
+  const expand = (
+    itemId: string,
+    itemName: string,
+    depthLeft: number,
+    path: Set<string>
+  ): ExpandResult => {
+    if (baseMaterialIds.has(itemId)) {
+      return { node: baseNode(itemId, itemName), height: 1, pathDependent: false };
+    }
 
-  if (visited.has(targetItemId)) {
-    console.warn(`检测到循环依赖: ${targetItemName} (${targetItemId})`);
-    return {
-      itemId: targetItemId,
-      itemName: targetItemName,
-      isBase: true,
-      recipes: [],
-      children: [],
-    };
-  }
-  visited.add(targetItemId);
-
-  if (maxDepth <= 0) {
-    return {
-      itemId: targetItemId,
-      itemName: targetItemName,
-      isBase: true,
-      recipes: [],
-      children: [],
-    };
-  }
+    if (path.has(itemId)) {
+      console.warn(`检测到循环依赖: ${itemName} (${itemId})`);
+      return { node: baseNode(itemId, itemName), height: 1, pathDependent: true };
+    }
 
+    const reusable = shared.get(itemId);
+    if (reusable && reusable.height <= depthLeft) {
+      return reusable;
+    }
+
+    if (depthLeft <= 0) {
+      return { node: baseNode(itemId, itemName), height: 1, pathDependent: true };
+    }
 
-  const recipes = recipeLookup.asProducts.get(targetItemId) || [];
-  let filteredRecipes = recipes;
+    const recipes = recipeLookup.asProducts.get(itemId) || [];
+    let filteredRecipes = recipes;
 
-  if (cycleGroups) {
-    const cycleGroup = cycleGroups.get(targetItemId);
-    if (cycleGroup) {
-      console.warn(
-        `[Deadlock] ${targetItemName} (${targetItemId}) is part of a deadlock cycle; no production recipes available.`
-      );
-      filteredRecipes = [];
+    if (cycleGroups) {
+      const cycleGroup = cycleGroups.get(itemId);
+      if (cycleGroup) {
+        console.warn(
+          `[Deadlock] ${itemName} (${itemId}) is part of a deadlock cycle; no production recipes available.`
+        );
+        filteredRecipes = [];
+      }
     }
-  }
 
-  const children: DependencyNode[] = [];
-  const uniqueMaterialIds = new Set<string>();
-
-  for (const recipe of filteredRecipes) {
-    for (const material of recipe.materials) {
-      if (uniqueMaterialIds.has(material.id)) continue;
-      uniqueMaterialIds.add(material.id);
-
-      if (!isBaseMaterial && !baseMaterialIds.has(material.id)) {
-        const childNode = buildDependencyTree({
-          targetItemId: material.id,
-          targetItemName: material.name,
-          baseMaterialIds,
-          recipeLookup,
-          cycleGroups,
-          maxDepth: maxDepth - 1,
-          visited: new Set(visited),
-        });
-        children.push(childNode);
+    const childPath = new Set(path);
+    childPath.add(itemId);
+    const children: DependencyNode[] = [];
+    const uniqueMaterialIds = new Set<string>();
+    let height = 1;
+    let pathDependent = false;
+
+    for (const recipe of filteredRecipes) {
+      for (const material of recipe.materials) {
+        if (uniqueMaterialIds.has(material.id)) continue;
+        uniqueMaterialIds.add(material.id);
+
+        if (!baseMaterialIds.has(material.id)) {
+          const child = expand(material.id, material.name, depthLeft - 1, childPath);
+          children.push(child.node);
+          height = Math.max(height, child.height + 1);
+          pathDependent = pathDependent || child.pathDependent;
+        }
       }
     }
-  }
 
-  return {
-    itemId: targetItemId,
-    itemName: targetItemName,
-    isBase: isBaseMaterial || filteredRecipes.length === 0,
-    recipes: filteredRecipes,
-    children,
+    const result: ExpandResult = {
+      node: {
+        itemId,
+        itemName,
+        isBase: filteredRecipes.length === 0,
+        recipes: filteredRecipes,
+        children,
+      },
+      height,
+      pathDependent,
+    };
+    if (!pathDependent) {
+      shared.set(itemId, result);
+    }
+    return result;
   };
+
+  return expand(targetItemId, targetItemName, maxDepth, visited).node;
 }
 
 export function selectOptimalRecipe(
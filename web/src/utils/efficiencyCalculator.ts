@@ -412,7 +412,7 @@ function getItemName(itemId: string, tree: DependencyNode, itemLookup: ItemLooku
   return itemLookup[itemId]?.name || `物品 ${itemId}`;
 }
 
-function buildConnections(
+export function buildConnections(
   devices: DeviceConfig[],
   connections: Connection[]
 ): void {
@@ -431,7 +431,7 @@ function buildConnections(
   }
 }
 
-function findBottleneck(
+export function findBottleneck(
   devices: DeviceConfig[]
 ): { itemId: string; description: string } | null {
   if (devices.length === 0) {
@@ -486,13 +486,11 @@ export function calculateMinimumScalePlan(
     const hasOverflow = roundedCount > exactCount + 0.001; // 使用小容差避免浮点误差
     const overflowRate = hasOverflow ? roundedCount / exactCount : 1;
     
-    // 计算新的生产率（基于实际设备数量）
-    const newProductionRate = (device.productionRate / device.count) * roundedCount;
-    
     return {
       ...device,
       count: roundedCount,
-      productionRate: newProductionRate * scaleFactor,
+      // 需求产出按比例缩小；向上取整多出的产能由 overflowRate 表示
+      productionRate: device.productionRate * scaleFactor,
       hasOverflow,
       overflowRate,
     };
@@ -0,0 +1,156 @@
+/**
+ * 预先计算的生产方案
+ *
+ * data/build_plan_cache.py 为每个可生产物品计算最高效率方案和最小规模方案，写入 web/public/data/plan_cache.json。
+ * 缓存只对应默认配置：databaseHash 与已加载的 recipe_database.json 中的 databaseHash 相同、忽略设备与当前设置相同，
+ * 且用户没有指定基础原料。其余情况返回 null，由调用方在浏览器中计算。
+ */
+
+import type { ProductionPlan, DeviceConfig, Connection } from '../types/manufacturing';
+import { fetchData } from './dataUrl';
+import { loadRecipeLookup, getRecipes, getIgnoredDevices, getDatabaseHash } from './recipeLoader';
+import { buildConnections, findBottleneck } from './efficiencyCalculator';
+
+const PLAN_CACHE_VERSION = 1;
+
+// [物品ID, 配方ID, 设备数, 产出个/秒, 溢出倍数（仅最小规模方案中有溢出的设备）]
+type CachedDevice = [string, string, number, number, number?];
+
+interface CachedPlan {
+  rate: number;
+  devices: CachedDevice[];
+  base: Array<[string, string, number]>; // [物品ID, 名称, 个/秒]
+}
+
+interface PlanCache {
+  version: number;
+  databaseHash: string;
+  ignoredDevices: string[];
+  plans: Record<string, { efficiency: CachedPlan; minimum: CachedPlan }>;
+}
+
+export interface CachedPlans {
+  efficiency: ProductionPlan;
+  minimum: ProductionPlan;
+}
+
+let planCachePromise: Promise<PlanCache | null> | null = null;
+
+function loadPlanCache(): Promise<PlanCache | null> {
+  if (!planCachePromise) {
+    planCachePromise = fetchData('plan_cache.json')
+      .then((res) => (res.ok ? res.json() : null))
+      .catch(() => null);
+  }
+  return planCachePromise;
+}
+
+async function isCacheCurrent(cache: PlanCache): Promise<boolean> {
+  if (cache.version !== PLAN_CACHE_VERSION) {
+    return false;
+  }
+  // 与实际加载的配方库比较；配方库没有 databaseHash（旧版本生成）时无法确认，不使用缓存
+  await loadRecipeLookup();
+  const databaseHash = getDatabaseHash();
+  if (!databaseHash || databaseHash !== cache.databaseHash) {
+    return false;
+  }
+  const ignoredDevices = await getIgnoredDevices();
+  return (
+    ignoredDevices.size === cache.ignoredDevices.length &&
+    cache.ignoredDevices.every((id) => ignoredDevices.has(id))
+  );
+}
+
+function hydrateDevices(
+  cached: CachedPlan,
+  targetItemId: string,
+  withOverflow: boolean
+): DeviceConfig[] | null {
+  const recipes = getRecipes();
+  const baseIds = new Set(cached.base.map(([id]) => id));
+  const devices: DeviceConfig[] = [];
+
+  for (const [, recipeId, count, productionRate, overflowRate] of cached.devices) {
+    const recipe = recipes.get(recipeId);
+    if (!recipe) {
+      return null;
+    }
+    const device: DeviceConfig = {
+      deviceId: recipe.deviceId,
+      deviceName: recipe.deviceName,
+      recipe,
+      count,
+      productionRate,
+      inputs: recipe.materials.map((material) => ({
+        itemId: material.id,
+        source: baseIds.has(material.id) ? 'warehouse' : `device-${material.id}`,
+      })),
+      outputs: recipe.products.map((product) => ({
+        itemId: product.id,
+        destination: product.id === targetItemId ? 'output' : `device-${product.id}`,
+      })),
+    };
+    if (withOverflow) {
+      device.hasOverflow = overflowRate !== undefined;
+      device.overflowRate = overflowRate ?? 1;
+    }
+    devices.push(device);
+  }
+  return devices;
+}
+
+function baseMaterials(cached: CachedPlan): ProductionPlan['baseMaterials'] {
+  return cached.base.map(([id, name, requiredRate]) => ({ id, name, requiredRate }));
+}
+
+/**
+ * 默认配置下 targetItemId 的缓存方案；缓存不存在、已过期或没有该物品时返回 null
+ */
+export async function getCachedPlans(
+  targetItemId: string,
+  targetItemName: string
+): Promise<CachedPlans | null> {
+  const cache = await loadPlanCache();
+  const entry = cache?.plans[targetItemId];
+  if (!cache || !entry || !(await isCacheCurrent(cache))) {
+    return null;
+  }
+
+  const efficiencyDevices = hydrateDevices(entry.efficiency, targetItemId, false);
+  const minimumDevices = hydrateDevices(entry.minimum, targetItemId, true);
+  if (!efficiencyDevices || !minimumDevices) {
+    return null;
+  }
+
+  // 与 calculateMinimumScalePlan 相同，最小规模方案沿用最高效率方案的连线和瓶颈
+  const connections: Connection[] = [];
+  buildConnections(efficiencyDevices, connections);
+  const bottleneck = findBottleneck(efficiencyDevices);
+  const targetProduct = { id: targetItemId, name: targetItemName };
+
+  return {
+    efficiency: {
+      type: 'efficiency',
+      name: '最高效率生产方案',
+      targetProduct,
+      calculatedOutputRate: entry.efficiency.rate,
+      devices: efficiencyDevices,
+      totalDeviceCount: efficiencyDevices.reduce((sum, d) => sum + d.count, 0),
+      bottleneck,
+      connections,
+      baseMaterials: baseMaterials(entry.efficiency),
+    },
+    minimum: {
+      type: 'minimum',
+      name: '最小规模方案',
+      targetProduct,
+      calculatedOutputRate: entry.minimum.rate,
+      devices: minimumDevices,
+      totalDeviceCount: minimumDevices.reduce((sum, d) => sum + d.count, 0),
+      bottleneck,
+      connections,
+      baseMaterials: baseMaterials(entry.minimum),
+    },
+  };
+}
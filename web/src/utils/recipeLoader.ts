@@ -1,5 +1,6 @@
 import type { ManufacturingRecipe, RecipeLookup } from '../types/manufacturing';
 import type { ItemLookup } from '../types/catalog';
+import { fetchData } from './dataUrl';
 
 function tarjanSCC(adj: Map<string, Set<string>>): string[][] {
   let index = 0;
@@ -64,6 +65,31 @@ function buildItemAdjacency(recipes: ManufacturingRecipe[]): Map<string, Set<str
   return adj;
 }
 
+/**
+ * 使用配方库中预先计算的死锁循环；忽略设备与计算时不同则返回 null，需要重新计算
+ */
+function cycleGroupsFromAnalysis(
+  analysis: CycleAnalysis | undefined,
+  ignoredDevices: Set<string>
+): Map<string, Set<string>> | null {
+  if (
+    !analysis ||
+    analysis.ignoredDevices.length !== ignoredDevices.size ||
+    !analysis.ignoredDevices.every((id) => ignoredDevices.has(id))
+  ) {
+    return null;
+  }
+
+  const cycleGroupByItem = new Map<string, Set<string>>();
+  for (const index of analysis.cycleGroups) {
+    const set = new Set(analysis.components[index]);
+    for (const v of set) {
+      cycleGroupByItem.set(v, set);
+    }
+  }
+  return cycleGroupByItem;
+}
+
 function buildCycleGroups(
   adj: Map<string, Set<string>>,
   asProducts: Map<string, ManufacturingRecipe[]>
@@ -121,11 +147,22 @@ interface RecipeEntry {
   manufacturingTime?: number;
 }
 
+// extract_recipe_database.py 按默认忽略设备预先计算的强连通分量（按拓扑顺序，原料在前）
+interface CycleAnalysis {
+  ignoredDevices: string[];
+  components: string[][];
+  condensation: number[][];
+  cyclic: number[];
+  cycleGroups: number[]; // 死锁循环在 components 中的下标
+}
+
 interface RecipeDatabase {
   recipes: Record<string, RecipeEntry>;
   asMaterials: Record<string, string[]>;
   asProducts: Record<string, string[]>;
   byDevice: Record<string, string[]>;
+  cycleAnalysis?: CycleAnalysis;
+  databaseHash?: string; // 内容哈希，data/planner/graph.py 的 database_hash
 }
 
 const STORAGE_KEY = 'ignored_devices';
@@ -153,7 +190,7 @@ async function loadDefaultIgnoredDevices(): Promise<Set<string>> {
   }
   
   try {
-    const response = await fetch(`${import.meta.env.BASE_URL}data/overrides/ignored_devices.json`);
+    const response = await fetchData('overrides/ignored_devices.json');
     if (response.ok) {
       const data = await response.json();
       if (Array.isArray(data.ignoredDevices)) {
@@ -169,7 +206,7 @@ async function loadDefaultIgnoredDevices(): Promise<Set<string>> {
   return defaultIgnoredDevicesCache;
 }
 
-async function getIgnoredDevices(): Promise<Set<string>> {
+export async function getIgnoredDevices(): Promise<Set<string>> {
   // Load defaults from config file first
   const defaults = await loadDefaultIgnoredDevices();
   
@@ -191,6 +228,7 @@ async function getIgnoredDevices(): Promise<Set<string>> {
 
 let cachedRecipeLookup: RecipeLookup | null = null;
 let cachedRecipes: Map<string, ManufacturingRecipe> | null = null;
+let cachedDatabaseHash: string | undefined;
 
 function hasNetOutput(recipe: ManufacturingRecipe): boolean {
   for (const product of recipe.products) {
@@ -215,13 +253,14 @@ export async function loadRecipeLookup(_itemLookup?: ItemLookup): Promise<Recipe
   const byDevice = new Map<string, ManufacturingRecipe[]>();
   cachedRecipes = new Map<string, ManufacturingRecipe>();
 
-  const response = await fetch(`${import.meta.env.BASE_URL}data/recipe_database.json`);
+  const response = await fetchData('recipe_database.json');
   if (!response.ok) {
     console.error('Failed to load recipe_database.json');
     return { asMaterials, asProducts, byDevice, cycleGroups: new Map() };
   }
 
   const database: RecipeDatabase = await response.json();
+  cachedDatabaseHash = database.databaseHash;
 
   for (const [recipeId, recipe] of Object.entries(database.recipes)) {
     if (ignoredDevices.has(recipe.deviceId)) {
@@ -245,9 +284,6 @@ export async function loadRecipeLookup(_itemLookup?: ItemLookup): Promise<Recipe
 
   }
 
-  const recipesArray = Array.from(cachedRecipes?.values() ?? []);
-  const adj = buildItemAdjacency(recipesArray);
-
   const populateLookup = (
     source: Record<string, string[]>,
     target: Map<string, ManufacturingRecipe[]>
@@ -267,7 +303,9 @@ export async function loadRecipeLookup(_itemLookup?: ItemLookup): Promise<Recipe
   populateLookup(database.asProducts, asProducts);
   populateLookup(database.byDevice, byDevice);
 
-  const cycleGroups = buildCycleGroups(adj, asProducts);
+  const cycleGroups =
+    cycleGroupsFromAnalysis(database.cycleAnalysis, ignoredDevices) ??
+    buildCycleGroups(buildItemAdjacency(Array.from(cachedRecipes?.values() ?? [])), asProducts);
 
   cachedRecipeLookup = { asMaterials, asProducts, byDevice, cycleGroups };
   return cachedRecipeLookup;
@@ -277,9 +315,17 @@ export function getRecipes(): Map<string, ManufacturingRecipe> {
   return cachedRecipes || new Map();
 }
 
+/**
+ * 已加载的 recipe_database.json 的 databaseHash（调用 loadRecipeLookup 之后可用）
+ */
+export function getDatabaseHash(): string | undefined {
+  return cachedDatabaseHash;
+}
+
 export function clearRecipeCache(): void {
   cachedRecipeLookup = null;
   cachedRecipes = null;
+  cachedDatabaseHash = undefined;
   notifyCacheUpdate();
   console.log('[RecipeLoader] Cache cleared, will reload on next use');
 }